@@ -1,19 +1,144 @@
 # api/auth.py
 import requests
 import os
+import threading
+import time
 from dotenv import load_dotenv
 
+from api import client
+from metrics import timed
+
 load_dotenv()
 
+# Segundos antes do "expires_in" em que o token passa a ser considerado vencido
+TOKEN_EXPIRY_MARGIN = float(os.getenv("TOKEN_EXPIRY_MARGIN", "30"))
+# Fração final da vida útil do token em que a renovação é disparada em segundo plano
+TOKEN_REFRESH_AHEAD = float(os.getenv("TOKEN_REFRESH_AHEAD", "0.2"))
+# Validade assumida quando o servidor não informa "expires_in"
+TOKEN_DEFAULT_TTL = float(os.getenv("TOKEN_DEFAULT_TTL", "300"))
+
+
+def _fetch_token():
+    """Solicita um novo token ao servidor OAuth e retorna (access_token, expires_in)."""
+    response = client.post(
+        os.getenv("AUTH_URL"),
+        auth=requests.auth.HTTPBasicAuth(os.getenv("CLIENT_ID"), os.getenv("CLIENT_SECRET")),
+        headers={"Content-Type": "application/x-www-form-urlencoded"},
+        data={"grant_type": "client_credentials"}
+    )
+    response.raise_for_status()
+    body = response.json()
+    return body.get("access_token"), body.get("expires_in")
+
+
+class TokenProvider:
+    """Cache de token compartilhado pelo processo, com renovação antecipada.
+
+    O token é reaproveitado até ``margin`` segundos antes do ``expires_in``
+    (no máximo metade da validade, para tokens curtos).
+    Quando entra na fração final da validade (``refresh_ahead``), o token atual
+    continua sendo entregue e uma renovação é feita em segundo plano. Chamadas
+    concorrentes sem token válido aguardam uma única renovação em andamento.
+    """
+
+    def __init__(self, fetch=_fetch_token, margin=TOKEN_EXPIRY_MARGIN,
+                 refresh_ahead=TOKEN_REFRESH_AHEAD, default_ttl=TOKEN_DEFAULT_TTL,
+                 clock=time.monotonic):
+        self._fetch = fetch
+        self._margin = margin
+        self._refresh_ahead = refresh_ahead
+        self._default_ttl = default_ttl
+        self._clock = clock
+        self._token = None
+        self._expires_at = 0.0
+        self._refresh_at = 0.0
+        self._state_lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._background = None
+        self._stats = {"hits": 0, "misses": 0, "refreshes": 0,
+                       "background_refreshes": 0, "errors": 0}
+
+    def get_token(self):
+        """Retorna um token válido, renovando-o apenas quando necessário."""
+        now = self._clock()
+        with self._state_lock:
+            if self._token is not None and now < self._expires_at:
+                self._stats["hits"] += 1
+                if now >= self._refresh_at:
+                    self._start_background_refresh()
+                return self._token
+            self._stats["misses"] += 1
+
+        # Apenas uma thread renova; as demais esperam no lock e reaproveitam o resultado
+        with self._refresh_lock:
+            with self._state_lock:
+                if self._token is not None and self._clock() < self._expires_at:
+                    return self._token
+            return self._refresh()
+
+    def invalidate(self):
+        """Descarta o token atual (por exemplo, após uma resposta 401)."""
+        with self._state_lock:
+            self._token = None
+            self._expires_at = self._refresh_at = 0.0
+
+    def stats(self):
+        """Retorna os contadores de acertos, faltas e renovações."""
+        with self._state_lock:
+            return dict(self._stats)
+
+    def _refresh(self):
+        """Busca um novo token e atualiza o cache. Deve ser chamada com _refresh_lock."""
+        try:
+            token, expires_in = self._fetch()
+        except Exception:
+            with self._state_lock:
+                self._stats["errors"] += 1
+            raise
+        ttl = float(expires_in) if expires_in else self._default_ttl
+        now = self._clock()
+        with self._state_lock:
+            self._token = token
+            # Margem limitada a metade da validade: com tokens curtos, ela não pode consumir o token inteiro
+            self._expires_at = now + ttl - min(self._margin, ttl / 2)
+            self._refresh_at = self._expires_at - ttl * self._refresh_ahead
+            self._stats["refreshes"] += 1
+        return token
+
+    def _start_background_refresh(self):
+        """Dispara a renovação em segundo plano, se nenhuma estiver em andamento."""
+        if self._background is not None and self._background.is_alive():
+            return
+        self._background = threading.Thread(target=self._background_refresh, daemon=True)
+        self._background.start()
+
+    def _background_refresh(self):
+        if not self._refresh_lock.acquire(blocking=False):
+            return
+        try:
+            with self._state_lock:
+                if self._clock() < self._refresh_at:
+                    return
+                self._stats["background_refreshes"] += 1
+            self._refresh()
+        except Exception:
+            # O token atual continua válido; a próxima chamada tenta novamente
+            pass
+        finally:
+            self._refresh_lock.release()
+
+
+token_provider = TokenProvider()
+
+
+@timed("get_access_token")
 def get_access_token():
     try:
-        response = requests.post(
-            os.getenv("AUTH_URL"),
-            auth=requests.auth.HTTPBasicAuth(os.getenv("CLIENT_ID"), os.getenv("CLIENT_SECRET")),
-            headers={"Content-Type": "application/x-www-form-urlencoded"},
-            data={"grant_type": "client_credentials"}
-        )
-        response.raise_for_status()
-        return response.json().get("access_token")
+        return token_provider.get_token()
     except Exception as e:
         raise ValueError(f"Erro ao obter o token: {str(e)}")
+
+
+def get_token_stats():
+    """Contadores do cache de token, para confirmar a redução de chamadas de autenticação."""
+    return token_provider.stats()
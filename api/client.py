@@ -0,0 +1,83 @@
+# api/client.py
+import re
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from config import (
+    HTTP_POOL_CONNECTIONS, HTTP_POOL_MAXSIZE, HTTP_POOL_BLOCK, HTTP_KEEP_ALIVE,
+    HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT, HTTP_MAX_RETRIES, HTTP_BACKOFF_FACTOR,
+)
+from metrics import count, timer
+
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def _build_session():
+    """Cria uma sessão com pool de conexões, keep-alive e retentativas com backoff."""
+    retry = Retry(
+        total=HTTP_MAX_RETRIES,
+        connect=HTTP_MAX_RETRIES,
+        read=HTTP_MAX_RETRIES,
+        status=HTTP_MAX_RETRIES,
+        backoff_factor=HTTP_BACKOFF_FACTOR,
+        status_forcelist=RETRY_STATUS,
+        # As consultas do superbusca são POSTs somente de leitura, seguros para repetir
+        allowed_methods=frozenset(["GET", "POST"]),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=HTTP_POOL_CONNECTIONS,
+        pool_maxsize=HTTP_POOL_MAXSIZE,
+        pool_block=HTTP_POOL_BLOCK,
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    if not HTTP_KEEP_ALIVE:
+        session.headers["Connection"] = "close"
+    return session
+
+
+def get_session():
+    """Retorna a sessão HTTP compartilhada pelo processo."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+
+def post(url, timeout=None, **kwargs):
+    """POST pela sessão compartilhada, sempre com timeout de conexão e leitura."""
+    if timeout is None:
+        timeout = (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+    path = _path(url)
+    with timer("http_post", path=path):
+        response = get_session().post(url, timeout=timeout, **kwargs)
+    count("ancora_http_responses_total", help="Respostas HTTP recebidas, por rota e status",
+          path=path, status=response.status_code)
+    return response
+
+
+def _path(url) -> str:
+    """Rota da URL, sem host nem barras repetidas, usada como rótulo das métricas."""
+    return re.sub(r"/{2,}", "/", urlsplit(url or "").path) or "/"
+
+
+def close():
+    """Fecha as conexões abertas; a próxima chamada cria uma nova sessão."""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
@@ -0,0 +1,228 @@
+# api/decoding.py
+"""Decodificação de JSON das respostas da API.
+
+Usa orjson quando instalado (ou msgspec, na falta dele) e o ``json`` da
+biblioteca padrão como alternativa. ``iter_json_array`` extrai os elementos
+de um array aninhado enquanto o corpo da resposta ainda está chegando.
+"""
+import codecs
+import json
+import re
+from typing import Any, Iterable, Iterator, Sequence, Union
+
+try:
+    import orjson
+except ImportError:  # orjson é opcional
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # msgspec é opcional
+    msgspec = None
+
+if orjson is not None:
+    BACKEND = "orjson"
+elif msgspec is not None:
+    BACKEND = "msgspec"
+else:
+    BACKEND = "json"
+
+_msgspec_decoder = msgspec.json.Decoder() if msgspec is not None else None
+_msgspec_encoder = msgspec.json.Encoder() if msgspec is not None else None
+
+
+def loads(data: Union[bytes, bytearray, memoryview, str]) -> Any:
+    """Decodifica JSON a partir de bytes ou texto."""
+    if orjson is not None:
+        return orjson.loads(data)
+    if _msgspec_decoder is not None:
+        return _msgspec_decoder.decode(data.encode("utf-8") if isinstance(data, str) else data)
+    return json.loads(data)
+
+
+def dumps(value: Any) -> bytes:
+    """Serializa em JSON compacto (UTF-8, sem escapes de acentos)."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(value)
+        except TypeError:
+            pass  # chaves não-texto ou tipos que o orjson não aceita: usa o json
+    elif _msgspec_encoder is not None:
+        try:
+            return _msgspec_encoder.encode(value)
+        except TypeError:
+            pass
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def response_json(response) -> Any:
+    """Equivalente a ``response.json()``, decodificando direto dos bytes do corpo."""
+    return loads(response.content)
+
+
+# --- Decodificação incremental --------------------------------------------------
+
+_TOKENS = re.compile(rb'[{}\[\]",:]')
+_STRING_END = re.compile(rb'["\\]')
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_OBJECT, _ARRAY = ord("{"), ord("[")
+_QUOTE, _COMMA, _COLON = ord('"'), ord(","), ord(":")
+_raw_decode = json.JSONDecoder().raw_decode
+
+
+class _ArrayScanner:
+    """Localiza o array em ``path`` e entrega seus elementos à medida que os bytes chegam.
+
+    Até o array, só os caracteres estruturais são examinados (via regex),
+    para acompanhar as chaves. Dentro dele, cada elemento é decodificado pelo
+    scanner em C do ``json`` a partir do ponto em que começa; um elemento
+    cortado no fim do pedaço é refeito quando o próximo pedaço chegar.
+    """
+
+    def __init__(self, path: Sequence[str]):
+        self.path = tuple(path)
+        self.done = False
+        self.found = False
+        self._buf = bytearray()
+        self._pos = 0
+        self._stack = []        # tipos dos contêineres abertos
+        self._keys = []         # chave atual de cada objeto aberto
+        self._expect_key = False
+        self._in_string = False
+        self._key_start = None  # início da chave sendo lida
+        # Dentro do array o buffer passa a ser texto
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._text = ""
+        self._after_value = False
+
+    def _at_target(self) -> bool:
+        if len(self._stack) != len(self.path) or self._expect_key:
+            return False
+        return all(kind == _OBJECT and key == name
+                   for kind, key, name in zip(self._stack, self._keys, self.path))
+
+    def feed(self, chunk: bytes, final: bool = False) -> list:
+        if self.found:
+            self._text += self._utf8.decode(chunk, final)
+            return self._items(final)
+        self._buf += chunk
+        self._seek()
+        if self.found:
+            rest = bytes(self._buf[self._pos:])
+            self._buf = bytearray()
+            self._text = self._utf8.decode(rest, final)
+            return self._items(final)
+        return []
+
+    def _seek(self):
+        """Avança até o "[" do array procurado, acompanhando objetos e chaves."""
+        buf = self._buf
+        pos = self._pos
+        stack = self._stack
+        while True:
+            if self._in_string:
+                m = _STRING_END.search(buf, pos)
+                if m is None:
+                    pos = len(buf)
+                    break
+                if buf[m.start()] != _QUOTE:  # barra invertida: pula o caractere escapado
+                    if m.end() >= len(buf):
+                        pos = m.start()
+                        break
+                    pos = m.end() + 1
+                    continue
+                pos = m.end()
+                self._in_string = False
+                if self._key_start is not None:
+                    self._keys[-1] = loads(bytes(buf[self._key_start:pos]))
+                    self._key_start = None
+                continue
+
+            m = _TOKENS.search(buf, pos)
+            if m is None:
+                pos = len(buf)
+                break
+            c = buf[m.start()]
+            pos = m.end()
+            if c == _QUOTE:
+                self._in_string = True
+                if stack and stack[-1] == _OBJECT and self._expect_key:
+                    self._key_start = m.start()
+            elif c == _OBJECT or c == _ARRAY:
+                if c == _ARRAY and self._at_target():
+                    self.found = True
+                    break
+                stack.append(c)
+                self._keys.append(None)
+                self._expect_key = c == _OBJECT
+            elif c == _COMMA:
+                if stack and stack[-1] == _OBJECT:
+                    self._expect_key = True
+            elif c == _COLON:
+                self._expect_key = False
+            else:  # } ou ]
+                if stack:
+                    stack.pop()
+                    self._keys.pop()
+                self._expect_key = False
+
+        # Descarta o que já foi consumido, preservando a chave em andamento
+        keep = pos if self._key_start is None else min(pos, self._key_start)
+        if keep and not self.found:
+            del buf[:keep]
+            pos -= keep
+            if self._key_start is not None:
+                self._key_start -= keep
+        self._pos = pos
+
+    def _items(self, final: bool) -> list:
+        text = self._text
+        i = 0
+        items = []
+        while True:
+            i = _WHITESPACE.match(text, i).end()
+            if i >= len(text):
+                break
+            ch = text[i]
+            if ch == "]":
+                self.done = True
+                break
+            if self._after_value:
+                if ch != ",":
+                    raise ValueError(f"JSON inválido: esperado ',' ou ']' no array, encontrado {ch!r}")
+                i += 1
+                self._after_value = False
+                continue
+            try:
+                value, end = _raw_decode(text, i)
+            except json.JSONDecodeError:
+                if final:
+                    raise
+                break  # elemento incompleto: espera o próximo pedaço
+            if end >= len(text) and not final:
+                break  # um número no fim do pedaço pode continuar no próximo
+            items.append(value)
+            i = end
+            self._after_value = True
+        self._text = text[i:]
+        return items
+
+
+def iter_json_array(chunks: Iterable[bytes], path: Sequence[str] = ("pageResult", "data")) -> Iterator[Any]:
+    """Entrega os elementos do array em ``path`` conforme os pedaços do JSON chegam.
+
+    ``chunks`` pode ser ``response.iter_content(...)`` de uma requisição com
+    ``stream=True``. Se o array não existir, nada é entregue; se o corpo
+    terminar no meio dele, levanta ValueError.
+    """
+    scanner = _ArrayScanner(path)
+    for chunk in chunks:
+        if not chunk:
+            continue
+        yield from scanner.feed(chunk)
+        if scanner.done:
+            return
+    if scanner.found:
+        yield from scanner.feed(b"", final=True)
+        if not scanner.done:
+            raise ValueError("JSON incompleto: a resposta terminou no meio do array")
@@ -1,337 +1,520 @@
-import streamlit as st
-import pandas as pd
+import os
+from collections import OrderedDict
 from datetime import datetime
-from endpoints.search import search_products
-import os 
-from endpoints.manufacturers import get_manufacturers
-from algorithms import merge_sort, get_top_k_items, BinarySearchTree
-import networkx as nx
-from geopy.distance import geodesic
-from geopy.geocoders import Nominatim
-import math
+
+import streamlit as st
+
+import metrics
+from config import AUTOCOMPLETE_INDEX_PATH, CATALOG_FALLBACK_TIMEOUT, CATALOG_SNAPSHOT_PATH
 
 # Carrega variáveis de ambiente
 from dotenv import load_dotenv
 load_dotenv()
 
-# Configuração da página
-st.set_page_config(page_title="Consulta de Veículos e Produtos", layout="wide")
+# O Streamlit reexecuta este script a cada interação. Por isso as dependências
+# pesadas (pandas, networkx, geopy, scipy, pyarrow) são importadas dentro da
+# seção que as usa, os recursos do processo ficam em st.cache_resource e os
+# resultados das consultas ficam na sessão do usuário.
 
-# Título do aplicativo
-st.title("🚗 Sistema de Consulta de Veículos e Produtos")
+FABRICANTES_PADRAO = ["BOSCH", "VW", "FIAT", "FORD", "GM", "TOYOTA", "HONDA", "HYUNDAI", "VOLVO", "BMW"]
+SECOES = ["Consulta de Produtos", "Lista de Montadoras", "Lojas e Rotas"]
+RESULTADOS_POR_SESSAO = 8  # consultas guardadas por sessão; as mais antigas saem primeiro
 
-# Sidebar para configurações
-with st.sidebar:
-    st.header("Configurações")
-    items_per_page = st.number_input("Itens por página", min_value=1, max_value=100, value=10)
-    
-# Abas para diferentes funcionalidades
-tab1, tab2, tab3 = st.tabs(["Consulta de Produtos", "Lista de Montadoras", "Lojas e Rotas"])
+@st.cache_resource(show_spinner=False)
+def carregar_indice_fabricantes():
+    """Abre o índice de autocomplete uma vez por processo.
+
+    Usa o arquivo gerado por ``python -m autocomplete_index build`` quando existe;
+    caso contrário monta um índice em memória com as montadoras da API.
+    """
+    if os.path.exists(AUTOCOMPLETE_INDEX_PATH):
+        from autocomplete_index import MappedPrefixIndex
+        return MappedPrefixIndex(AUTOCOMPLETE_INDEX_PATH)
+    from autocomplete import PrefixIndex
+    from endpoints.manufacturers import manufacturer_name
+    from endpoints.pagination import iter_manufacturers
+    nomes = list(FABRICANTES_PADRAO)
+    try:
+        nomes += [manufacturer_name(m) for m in iter_manufacturers()]
+    except Exception:
+        pass  # Sem acesso à API, o autocomplete usa apenas a lista padrão
+    return PrefixIndex.build(nome for nome in nomes if nome)
+
+@st.cache_resource(show_spinner=False)
+def carregar_catalogo_lojas():
+    """Carrega o cadastro de lojas uma vez por processo.
+
+    A planilha só é relida quando muda; no resto do tempo vem do cache .npz,
+    já com a matriz de distâncias entre as lojas. O índice espacial e as
+    distâncias pelo método do app também são montados aqui, uma vez só.
+    """
+    from route_planner import METODO_DISTANCIA
+    from stores import StoreCatalog, load_stores
+    try:
+        catalogo = load_stores()
+    except Exception:
+        catalogo = StoreCatalog([], [], [], [], [])
+    if len(catalogo) == 0:
+        # Dados simulados de lojas, usados quando a planilha lojas_ancora.xlsx está vazia
+        catalogo = StoreCatalog.from_dict({
+            "Loja Centro": {"endereco": "Rua XV de Novembro, 1000, Centro, Curitiba", "lat": -25.4284, "lon": -49.2673},
+            "Loja Batel": {"endereco": "Avenida do Batel, 1500, Batel, Curitiba", "lat": -25.4352, "lon": -49.2945},
+            "Loja Portão": {"endereco": "Avenida República Argentina, 3000, Portão, Curitiba", "lat": -25.4658, "lon": -49.2901},
+            "Loja Santa Felicidade": {"endereco": "Avenida Manoel Ribas, 5000, Santa Felicidade, Curitiba", "lat": -25.4190, "lon": -49.3056},
+            "Loja Boqueirão": {"endereco": "Rua da Cidadania Boqueirão, Boqueirão, Curitiba", "lat": -25.4820, "lon": -49.2897}
+        })
+    catalogo.index()
+    catalogo.distances(METODO_DISTANCIA)
+    return catalogo
+
+@st.cache_resource(show_spinner=False)
+def carregar_lojas():
+    """Lojas no formato {nome: {"endereco", "lat", "lon"}}, montado uma vez por processo (somente leitura)."""
+    return carregar_catalogo_lojas().as_dict()
+
+@st.cache_resource(show_spinner=False)
+def carregar_geocodificador():
+    """Geocodificador único do processo, com cache em disco: endereços repetidos não vão à rede."""
+    from geocoding import get_geocoder
+    return get_geocoder()
+
+@st.cache_resource(show_spinner=False, ttl=600)
+def carregar_indice_catalogo():
+    """Índice de busca do retrato local do catálogo, ou None se o retrato não existe.
+
+    Remontado a cada 10 minutos, para incluir o que ``python -m catalog_search varrer``
+    gravou nesse meio-tempo.
+    """
+    if not CATALOG_SNAPSHOT_PATH or not os.path.exists(CATALOG_SNAPSHOT_PATH):
+        return None
+    from catalog_search import load_index
+    return load_index(CATALOG_SNAPSHOT_PATH, reload=True)
+
+@st.cache_resource(show_spinner=False)
+def carregar_executor():
+    """Threads do processo para as consultas à API com prazo."""
+    from concurrent.futures import ThreadPoolExecutor
+    return ThreadPoolExecutor(max_workers=4, thread_name_prefix="consulta-api")
+
+@st.cache_resource(show_spinner=False)
+def preaquecer_imports():
+    """Importa em segundo plano, uma vez por processo, o que a primeira consulta vai precisar.
+
+    A primeira tela aparece sem esperar pandas e pyarrow; enquanto o usuário
+    preenche o formulário, eles são carregados numa thread.
+    """
+    import importlib
+    import threading
+
+    def importar():
+        for modulo in ("pandas", "pyarrow", "endpoints.pagination", "algorithms"):
+            try:
+                importlib.import_module(modulo)
+            except ImportError:
+                pass
+
+    threading.Thread(target=importar, name="preaquecer-imports", daemon=True).start()
+    return True
+
+def resultado_da_sessao(chave, buscar):
+    """Resultado de ``buscar()`` guardado na sessão do usuário.
+
+    Reordenar, trocar o Top K ou mudar de seção reexecuta o script, mas a
+    mesma consulta não volta à API. Erros não são guardados.
+    """
+    resultados = st.session_state.setdefault("resultados", OrderedDict())
+    if chave in resultados:
+        resultados.move_to_end(chave)
+        return resultados[chave]
+    valor = buscar()
+    resultados[chave] = valor
+    while len(resultados) > RESULTADOS_POR_SESSAO:
+        resultados.popitem(last=False)
+    return valor
+
+def com_prazo(buscar, fabricante, placa):
+    """Resultado de ``buscar()``, ou TimeoutError se a API passar de CATALOG_FALLBACK_TIMEOUT.
+
+    O prazo só vale quando o retrato local tem produtos desta consulta para
+    mostrar no lugar; sem eles, a consulta espera o que for preciso. A consulta
+    lenta continua em segundo plano e, ao terminar, fica no cache das
+    requisições para a próxima tentativa.
+    """
+    from concurrent.futures import TimeoutError as PrazoEsgotado
+    if produtos_do_retrato(fabricante, placa) is None:
+        return buscar()
+    futuro = carregar_executor().submit(buscar)
+    try:
+        return futuro.result(timeout=CATALOG_FALLBACK_TIMEOUT)
+    except PrazoEsgotado:
+        raise TimeoutError(f"a API não respondeu em {CATALOG_FALLBACK_TIMEOUT:g} s") from None
+
+def produtos_do_retrato(fabricante, placa):
+    """Produtos do fabricante e placa no retrato local, ou None se ele não tem nenhum."""
+    indice = carregar_indice_catalogo()
+    if indice is None:
+        return None
+    hits = indice.search("", limit=None, fabricante=fabricante, placa=placa)
+    return [hit.product for hit in hits] or None
+
+def formatos_exportacao():
+    """Formatos de exportação de todas as páginas; Parquet só com pyarrow instalado."""
+    from export import parquet_available
+    formatos = {"CSV": ("csv", "text/csv"), "CSV compactado (gzip)": ("csv.gz", "application/gzip")}
+    if parquet_available():
+        formatos["Parquet"] = ("parquet", "application/octet-stream")
+    return formatos
+
+def exportar_todas_paginas(exportar, nome, formato, key):
+    """Exporta a consulta inteira em fluxo para um arquivo temporário e oferece o download.
+
+    As páginas vão direto para o disco, bloco a bloco; o arquivo é removido
+    assim que o Streamlit o carrega para o botão de download.
+    """
+    import tempfile
+    fmt, mime = formatos_exportacao()[formato]
+    fd, caminho = tempfile.mkstemp(suffix="." + fmt)
+    os.close(fd)
+    try:
+        total = exportar(caminho, fmt)
+        with open(caminho, "rb") as arquivo:
+            st.download_button(
+                f"Baixar {total} linhas",
+                arquivo,
+                f"{nome}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{fmt}",
+                mime,
+                key=key
+            )
+    finally:
+        os.remove(caminho)
+
+def buscar_produtos(fabricante, placa, itens, todas_paginas):
+    """Produtos da consulta já convertidos em ``Product``."""
+    from endpoints.pagination import iter_product_records
+    from endpoints.search import search_products
+    from products import parse_products
+    if todas_paginas:
+        return parse_products(list(iter_product_records(fabricante, placa, itens=itens)))
+    response = search_products(fabricante, placa, 0, itens)
+    if not isinstance(response, dict) or "data" not in response:
+        raise ValueError("Estrutura de dados inválida retornada pela API")
+    return parse_products(response["data"])
+
+def buscar_top_k_produtos(fabricante, placa, itens, sort_key, k, decrescente):
+    """Top K de todas as páginas, selecionado enquanto elas chegam, sem guardar o resultado inteiro."""
+    from algorithms import get_top_k_items
+    from endpoints.pagination import iter_product_records
+    from products import parse_products
+    return parse_products(get_top_k_items(
+        iter_product_records(fabricante, placa, itens=itens), key=sort_key, k=k, largest=decrescente
+    ))
+
+def buscar_montadoras(itens, todas_paginas):
+    from endpoints.manufacturers import get_manufacturers
+    from endpoints.pagination import iter_manufacturers
+    if todas_paginas:
+        return list(iter_manufacturers(itens=itens))
+    response = get_manufacturers(0, itens)
+    if not isinstance(response, dict) or "data" not in response:
+        raise ValueError("Estrutura de dados inválida retornada pela API")
+    return response["data"]
+
+def secao_produtos(items_per_page, todas_paginas):
+    from algorithms import get_top_k_items, merge_sort
+    from products import products_to_dataframe
 
-with tab1:
     st.header("Consulta de Produtos por Veículo")
-    
+
     col1, col2 = st.columns(2)
-    
+
     with col1:
-        fabricante = st.text_input("Fabricante do Produto", value="BOSCH")
-    
+        fabricante = st.text_input("Fabricante do Produto", value="BOSCH", key="w-fabricante")
+
     with col2:
-        placa = st.text_input("Placa do Veículo", value="DEM8i14")
-    
+        placa = st.text_input("Placa do Veículo", value="DEM8i14", key="w-placa")
+
     # Opções de ordenação
     st.subheader("Opções de Ordenação")
     sort_col, order_col, k_col = st.columns(3)
-    
+
     with sort_col:
-        sort_key = st.selectbox("Ordenar por", 
-                              ["codigoReferencia", "nomeProduto", "marca", "csa"], 
+        sort_key = st.selectbox("Ordenar por",
+                              ["codigoReferencia", "nomeProduto", "marca", "csa"],
                               index=0,
+                              key="w-sort-key",
                               format_func=lambda x: {
                                   "codigoReferencia": "Código Referência",
                                   "nomeProduto": "Nome do Produto",
                                   "marca": "Marca",
                                   "csa": "Código CSA"
                               }.get(x, x))
-    
+
     with order_col:
-        sort_order = st.selectbox("Ordem", ["Crescente", "Decrescente"], index=0)
-    
+        sort_order = st.selectbox("Ordem", ["Crescente", "Decrescente"], index=0, key="w-sort-order")
+
     with k_col:
-        top_k = st.number_input("Top K itens", min_value=1, max_value=100, value=5)
-        get_top = st.checkbox("Obter apenas Top K")
-    
+        top_k = st.number_input("Top K itens", min_value=1, max_value=100, value=5, key="w-top-k")
+        get_top = st.checkbox("Obter apenas Top K", key="w-get-top")
+
+    # O botão só registra a consulta; o resultado continua na tela ao reordenar
     if st.button("Buscar Produtos", key="search_products"):
-        with st.spinner("Buscando produtos..."):
-            try:
-                response = search_products(fabricante, placa, 0, items_per_page)
-                
-                if isinstance(response, dict) and "data" in response:
-                    produtos_lista = response["data"]
-                    count = len(produtos_lista)
-                    
-                    if produtos_lista:
-                        st.success(f"Encontrados {count} produtos")
-                        
-                        # Extrair os dados de cada produto
-                        produtos = []
-                        for item in produtos_lista:
-                            if isinstance(item, dict) and "data" in item:
-                                produtos.append(item["data"])
-                            else:
-                                produtos.append(item)
-                        
-                        # Aplicar ordenação
-                        produtos_ordenados = merge_sort(
-                            produtos, 
-                            key=sort_key, 
-                            ascending=(sort_order == "Crescente")
-                        )
-                        
-                        # Aplicar Top K se necessário
-                        if get_top:
-                            produtos_ordenados = get_top_k_items(
-                                produtos_ordenados,
-                                key=sort_key,
-                                k=top_k,
-                                largest=(sort_order == "Decrescente")
-                            )
-                        
-                        # Criar DataFrame com campos relevantes
-                        df_data = []
-                        for produto in produtos_ordenados:
-                            row = {
-                                "Código": produto.get("codigoReferencia", ""),
-                                "Nome": produto.get("nomeProduto", ""),
-                                "Marca": produto.get("marca", ""),
-                                "CSA": produto.get("csa", ""),
-                                "CNA": produto.get("cna", ""),
-                                "Família": produto.get("familia", {}).get("descricao", ""),
-                                "Subfamília": produto.get("familia", {}).get("subFamilia", {}).get("descricao", "")
-                            }
-                            
-                            similares = produto.get("similares", [])
-                            if similares:
-                                row["Similares"] = ", ".join([f"{s['marca']} {s['codigoReferencia']}" for s in similares])
-                            
-                            df_data.append(row)
-                        
-                        df = pd.DataFrame(df_data)
-                        st.dataframe(df)
-                        
-                        csv = df.to_csv(index=False).encode('utf-8')
-                        st.download_button(
-                            "Baixar como CSV",
-                            csv,
-                            f"produtos_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                            "text/csv",
-                            key='download-csv'
+        st.session_state["consulta_produtos"] = (fabricante, placa, items_per_page, todas_paginas)
+
+    consulta = st.session_state.get("consulta_produtos")
+    if consulta is not None:
+        decrescente = sort_order == "Decrescente"
+        try:
+            with st.spinner("Buscando produtos..."):
+                try:
+                    if consulta[3] and get_top:
+                        produtos = resultado_da_sessao(
+                            ("produtos-top",) + consulta + (sort_key, top_k, decrescente),
+                            lambda: com_prazo(lambda: buscar_top_k_produtos(*consulta[:3], sort_key, top_k, decrescente),
+                                              *consulta[:2])
                         )
                     else:
-                        st.warning("Nenhum produto encontrado")
+                        produtos = resultado_da_sessao(("produtos",) + consulta,
+                                                       lambda: com_prazo(lambda: buscar_produtos(*consulta), *consulta[:2]))
+                except Exception as erro:
+                    # API fora do ar ou lenta: o retrato local responde (sem guardar na sessão)
+                    produtos = produtos_do_retrato(*consulta[:2])
+                    if produtos is None:
+                        raise
+                    st.warning(f"Consulta à API falhou ({erro}); exibindo o catálogo local, que pode estar desatualizado.")
+
+            if produtos:
+                st.success(f"Encontrados {len(produtos)} produtos")
+
+                # Top K seleciona direto pelo heap, sem ordenar a lista inteira antes
+                if get_top:
+                    produtos_ordenados = get_top_k_items(produtos, key=sort_key, k=top_k, largest=decrescente)
                 else:
-                    st.error("Estrutura de dados inválida retornada pela API")
-            except Exception as e:
-                st.error(f"Erro ao buscar produtos: {str(e)}")
+                    produtos_ordenados = merge_sort(produtos, key=sort_key, ascending=not decrescente)
+
+                # DataFrame montado coluna a coluna, sem um dict por linha
+                df = products_to_dataframe(produtos_ordenados)
+                st.dataframe(df)
 
-    # Autocomplete com BST
+                csv = df.to_csv(index=False).encode('utf-8')
+                st.download_button(
+                    "Baixar como CSV",
+                    csv,
+                    f"produtos_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+                    "text/csv",
+                    key='download-csv'
+                )
+            else:
+                st.warning("Nenhum produto encontrado")
+        except Exception as e:
+            st.error(f"Erro ao buscar produtos: {str(e)}")
+
+    # Exportação de todas as páginas, sem montar o resultado inteiro em memória
+    with st.expander("Exportar todas as páginas"):
+        formato_produtos = st.selectbox("Formato", list(formatos_exportacao()), key="w-formato-produtos")
+        if st.button("Gerar arquivo", key="export-products"):
+            from export import export_products
+            with st.spinner("Exportando produtos..."):
+                try:
+                    exportar_todas_paginas(
+                        lambda caminho, fmt: export_products(fabricante, placa, caminho, fmt, itens=100),
+                        "produtos", formato_produtos, "download-export-products"
+                    )
+                except Exception as e:
+                    st.error(f"Erro ao exportar produtos: {str(e)}")
+
+    # Autocomplete com índice de prefixos (construído uma vez por processo)
     st.subheader("Autocomplete de Fabricantes")
-    search_term = st.text_input("Digite o nome do fabricante para sugestões", "")
-    
+    search_term = st.text_input("Digite o nome do fabricante para sugestões", "", key="w-autocomplete")
+
     if search_term:
-        fabricantes = ["BOSCH", "VW", "FIAT", "FORD", "GM", "TOYOTA", "HONDA", "HYUNDAI", "VOLVO", "BMW"]
-        bst = BinarySearchTree()
-        for fab in fabricantes:
-            bst.insert(fab, {"fabricante": fab})
-        
-        suggestions = bst.search_prefix(search_term.upper())
-        
+        suggestions = carregar_indice_fabricantes().complete(search_term, limit=5)
+
         if suggestions:
             st.write("Sugestões de fabricantes:")
-            for sug in suggestions[:5]:
-                st.write(f"- {sug['fabricante']}")
+            for sug in suggestions:
+                st.write(f"- {sug}")
         else:
             st.write("Nenhuma sugestão encontrada")
 
-with tab2:
+    secao_catalogo_local()
+    secao_equivalentes()
+
+def secao_catalogo_local():
+    """Busca textual no retrato local do catálogo, sem rede."""
+    import time
+
+    st.subheader("Busca no Catálogo Local")
+    indice = carregar_indice_catalogo()
+    if indice is None or not len(indice):
+        st.caption("Catálogo local vazio; preencha com `python -m catalog_search varrer -i consultas.txt`.")
+        return
+
+    texto = st.text_input("Buscar por nome, código, marca ou família", "", key="w-catalogo-texto")
+    marca_col, familia_col, placa_col = st.columns(3)
+    with marca_col:
+        marca = st.selectbox("Marca", [""] + indice.facets("marca"), key="w-catalogo-marca")
+    with familia_col:
+        familia = st.selectbox("Família", [""] + indice.facets("familia"), key="w-catalogo-familia")
+    with placa_col:
+        placa = st.text_input("Placa", "", key="w-catalogo-placa")
+
+    if texto or marca or familia or placa:
+        from products import products_to_dataframe
+        inicio = time.perf_counter()
+        hits = indice.search(texto, limit=100, marca=marca or None, familia=familia or None, placa=placa or None)
+        st.caption(f"{len(hits)} resultados em {(time.perf_counter() - inicio) * 1000:.1f} ms "
+                   f"({len(indice)} produtos no catálogo local)")
+        if hits:
+            st.dataframe(products_to_dataframe([hit.product for hit in hits]), hide_index=True)
+
+def secao_equivalentes():
+    """Peças intercambiáveis a partir do índice de similares, sem chamar a API."""
+    from crossref import get_crossref_index
+
+    st.subheader("Peças Equivalentes")
+    codigo_col, marca_col = st.columns(2)
+    with codigo_col:
+        codigo = st.text_input("Código da peça", "", key="w-equivalente-codigo")
+    with marca_col:
+        marca = st.text_input("Marca (opcional)", "", key="w-equivalente-marca")
+
+    if codigo:
+        indice = get_crossref_index()
+        pecas = indice.equivalents(codigo, marca or None)
+        if pecas:
+            import pandas as pd
+            marcas = indice.brands(codigo, marca or None)
+            st.caption("Marcas: " + ", ".join(f"{m} ({n})" for m, n in marcas.items()))
+            st.dataframe(pd.DataFrame(pecas, columns=["Marca", "Código"]), hide_index=True)
+        else:
+            st.write("Código ainda não visto nas consultas; busque produtos que o incluam para alimentar o índice.")
+
+def secao_montadoras(items_per_page, todas_paginas):
     st.header("Lista de Montadoras de Veículos")
-    
+
     if st.button("Buscar Montadoras", key="search_manufacturers"):
-        with st.spinner("Buscando montadoras..."):
-            try:
-                response = get_manufacturers(0, items_per_page)
-                
-                if isinstance(response, dict) and "data" in response:
-                    montadoras = response["data"]
-                    count = len(montadoras)
-                    
-                    if montadoras:
-                        st.success(f"Encontradas {count} montadoras")
-                        
-                        df = pd.DataFrame(montadoras)
-                        st.dataframe(df)
-                        
-                        csv = df.to_csv(index=False).encode('utf-8')
-                        st.download_button(
-                            "Baixar como CSV",
-                            csv,
-                            f"montadoras_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                            "text/csv",
-                            key='download-manufacturers'
-                        )
-                    else:
-                        st.warning("Nenhuma montadora encontrada")
-                else:
-                    st.error("Estrutura de dados inválida retornada pela API")
-            except Exception as e:
-                st.error(f"Erro ao buscar montadoras: {str(e)}")
+        st.session_state["consulta_montadoras"] = (items_per_page, todas_paginas)
 
-with tab3:
-    st.header("🚚 Sistema de Rotas e Lojas Próximas")
-    
-    # Dados simulados de lojas
-    lojas_simuladas = {
-        "Loja Centro": {"endereco": "Rua XV de Novembro, 1000, Centro, Curitiba", "lat": -25.4284, "lon": -49.2673},
-        "Loja Batel": {"endereco": "Avenida do Batel, 1500, Batel, Curitiba", "lat": -25.4352, "lon": -49.2945},
-        "Loja Portão": {"endereco": "Avenida República Argentina, 3000, Portão, Curitiba", "lat": -25.4658, "lon": -49.2901},
-        "Loja Santa Felicidade": {"endereco": "Avenida Manoel Ribas, 5000, Santa Felicidade, Curitiba", "lat": -25.4190, "lon": -49.3056},
-        "Loja Boqueirão": {"endereco": "Rua da Cidadania Boqueirão, Boqueirão, Curitiba", "lat": -25.4820, "lon": -49.2897}
-    }
-    
-    def calcular_distancia(coord1, coord2):
-        return geodesic(coord1, coord2).km
-    
-    def criar_grafo_lojas(endereco_comprador, lojas):
-        geolocator = Nominatim(user_agent="ancora_route_planner")
+    consulta = st.session_state.get("consulta_montadoras")
+    if consulta is not None:
         try:
-            location = geolocator.geocode(endereco_comprador)
-            if not location:
-                return None, None
-            
-            comprador_coords = (location.latitude, location.longitude)
-            G = nx.Graph()
-            G.add_node("Comprador", pos=comprador_coords, endereco=endereco_comprador)
-            
-            for nome, info in lojas.items():
-                loja_coords = (info["lat"], info["lon"])
-                distancia = calcular_distancia(comprador_coords, loja_coords)
-                G.add_node(nome, pos=loja_coords, endereco=info["endereco"])
-                G.add_edge("Comprador", nome, weight=distancia)
-            
-            return G, comprador_coords
+            with st.spinner("Buscando montadoras..."):
+                montadoras = resultado_da_sessao(("montadoras",) + consulta, lambda: buscar_montadoras(*consulta))
+
+            if montadoras:
+                import pandas as pd
+                st.success(f"Encontradas {len(montadoras)} montadoras")
+
+                df = pd.DataFrame(montadoras)
+                st.dataframe(df)
+
+                csv = df.to_csv(index=False).encode('utf-8')
+                st.download_button(
+                    "Baixar como CSV",
+                    csv,
+                    f"montadoras_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+                    "text/csv",
+                    key='download-manufacturers'
+                )
+            else:
+                st.warning("Nenhuma montadora encontrada")
         except Exception as e:
-            st.error(f"Erro na geocodificação: {str(e)}")
-            return None, None
-    
-    def calcular_rota_otimizada(grafo, ponto_partida, pontos_entrega):
+            st.error(f"Erro ao buscar montadoras: {str(e)}")
+
+    with st.expander("Exportar todas as páginas"):
+        formato_montadoras = st.selectbox("Formato", list(formatos_exportacao()), key="w-formato-montadoras")
+        if st.button("Gerar arquivo", key="export-manufacturers"):
+            from export import export_manufacturers
+            with st.spinner("Exportando montadoras..."):
+                try:
+                    exportar_todas_paginas(
+                        lambda caminho, fmt: export_manufacturers(caminho, fmt, itens=100),
+                        "montadoras", formato_montadoras, "download-export-manufacturers"
+                    )
+                except Exception as e:
+                    st.error(f"Erro ao exportar montadoras: {str(e)}")
+
+def secao_lojas():
+    import pandas as pd
+    from route_planner import calcular_rota_otimizada, criar_grafo_lojas
+
+    st.header("🚚 Sistema de Rotas e Lojas Próximas")
+
+    catalogo_lojas = carregar_catalogo_lojas()
+    indice_lojas = catalogo_lojas.index()
+    lojas = carregar_lojas()
+
+    def geocodificar(endereco):
         try:
-            nodes = list(grafo.nodes())
-            for i in range(len(nodes)):
-                for j in range(i+1, len(nodes)):
-                    if nodes[i] != "Comprador" and nodes[j] != "Comprador":
-                        coord1 = grafo.nodes[nodes[i]]["pos"]
-                        coord2 = grafo.nodes[nodes[j]]["pos"]
-                        distancia = calcular_distancia(coord1, coord2)
-                        grafo.add_edge(nodes[i], nodes[j], weight=distancia)
-            
-            for ponto in pontos_entrega:
-                if ponto not in grafo:
-                    return None, f"Ponto de entrega não encontrado: {ponto}"
-            
-            caminho = [ponto_partida]
-            pontos_restantes = set(pontos_entrega)
-            
-            while pontos_restantes:
-                ultimo_ponto = caminho[-1]
-                menor_distancia = math.inf
-                proximo_ponto = None
-                
-                for ponto in pontos_restantes:
-                    try:
-                        distancia = nx.shortest_path_length(grafo, ultimo_ponto, ponto, weight='weight')
-                        if distancia < menor_distancia:
-                            menor_distancia = distancia
-                            proximo_ponto = ponto
-                    except nx.NetworkXNoPath:
-                        continue
-                
-                if proximo_ponto is None:
-                    return None, "Não foi possível encontrar um caminho para todos os pontos"
-                
-                caminho.append(proximo_ponto)
-                pontos_restantes.remove(proximo_ponto)
-            
-            rota_detalhada = []
-            distancia_total = 0
-            
-            for i in range(len(caminho)-1):
-                origem = caminho[i]
-                destino = caminho[i+1]
-                trecho = nx.shortest_path(grafo, origem, destino, weight='weight')
-                
-                for j in range(len(trecho)-1):
-                    de = trecho[j]
-                    para = trecho[j+1]
-                    distancia = grafo.edges[de, para]['weight']
-                    distancia_total += distancia
-                    rota_detalhada.append({
-                        "De": de,
-                        "Para": para,
-                        "Distância (km)": round(distancia, 2),
-                        "Endereço Origem": grafo.nodes[de]["endereco"],
-                        "Endereço Destino": grafo.nodes[para]["endereco"]
-                    })
-            
-            return pd.DataFrame(rota_detalhada), round(distancia_total, 2)
+            return carregar_geocodificador().geocode(endereco)
         except Exception as e:
-            return None, str(e)
-    
+            st.error(f"Erro na geocodificação: {str(e)}")
+            return None
+
     # Seção 1: Lojas mais próximas
     st.subheader("1. Encontrar Lojas Próximas")
-    endereco_comprador = st.text_input("Digite seu endereço completo:", "Rua Marechal Deodoro, 500, Centro, Curitiba")
-    
+    endereco_comprador = st.text_input("Digite seu endereço completo:", "Rua Marechal Deodoro, 500, Centro, Curitiba",
+                                       key="w-endereco")
+
+    quantidade_lojas = st.number_input("Quantidade de lojas", min_value=1, max_value=100, value=10, key="w-quantidade-lojas")
+
     if st.button("Buscar Lojas Próximas"):
         with st.spinner("Calculando distâncias..."):
-            grafo_lojas, comprador_coords = criar_grafo_lojas(endereco_comprador, lojas_simuladas)
-            
-            if grafo_lojas is None:
+            comprador_coords = geocodificar(endereco_comprador)
+
+            if comprador_coords is None:
                 st.error("Não foi possível geocodificar o endereço. Por favor, tente um endereço mais completo.")
             else:
+                # Consulta ao índice espacial: só as K mais próximas, sem medir todas as lojas
+                proximas = indice_lojas.nearest(*comprador_coords, k=int(quantidade_lojas))
                 distancias = []
-                for loja in lojas_simuladas:
-                    distancia = grafo_lojas.edges["Comprador", loja]["weight"]
+                for loja, distancia in proximas:
                     distancias.append({
                         "Loja": loja,
                         "Distância (km)": round(distancia, 2),
-                        "Endereço": lojas_simuladas[loja]["endereco"]
+                        "Endereço": lojas[loja]["endereco"]
                     })
-                
-                df_distancias = pd.DataFrame(distancias).sort_values("Distância (km)")
+
+                df_distancias = pd.DataFrame(distancias)
                 st.dataframe(df_distancias)
-                
+
                 st.subheader("Mapa de Lojas Próximas")
                 mapa_data = {
-                    "latitude": [comprador_coords[0]] + [lojas_simuladas[loja]["lat"] for loja in lojas_simuladas],
-                    "longitude": [comprador_coords[1]] + [lojas_simuladas[loja]["lon"] for loja in lojas_simuladas],
-                    "tipo": ["Comprador"] + ["Loja"] * len(lojas_simuladas),
-                    "nome": ["Você"] + list(lojas_simuladas.keys())
+                    "latitude": [comprador_coords[0]] + [lojas[loja]["lat"] for loja, _ in proximas],
+                    "longitude": [comprador_coords[1]] + [lojas[loja]["lon"] for loja, _ in proximas],
+                    "tipo": ["Comprador"] + ["Loja"] * len(proximas),
+                    "nome": ["Você"] + [loja for loja, _ in proximas]
                 }
                 st.map(pd.DataFrame(mapa_data), zoom=12)
-    
+
     # Seção 2: Rota de entregas
     st.subheader("2. Planejamento de Rota de Entregas")
-    ponto_partida = st.selectbox("Ponto de partida:", ["Comprador"] + list(lojas_simuladas.keys()))
-    pontos_entrega = st.multiselect("Pontos de entrega:", list(lojas_simuladas.keys()))
-    
+    ponto_partida = st.selectbox("Ponto de partida:", ["Comprador"] + list(lojas.keys()), key="w-partida")
+    pontos_entrega = st.multiselect("Pontos de entrega:", list(lojas.keys()), key="w-entregas")
+    rota_col, veiculos_col = st.columns(2)
+    with rota_col:
+        retornar = st.checkbox("Retornar ao ponto de partida", value=False, key="w-retornar")
+    with veiculos_col:
+        veiculos = st.number_input("Veículos", min_value=1, max_value=10, value=1, key="w-veiculos")
+
     if st.button("Calcular Rota Otimizada") and pontos_entrega:
         with st.spinner("Calculando melhor rota..."):
-            grafo_lojas, _ = criar_grafo_lojas(endereco_comprador, lojas_simuladas)
-            rota_df, distancia_total = calcular_rota_otimizada(grafo_lojas, ponto_partida, pontos_entrega)
-            
+            try:
+                grafo_lojas, _ = criar_grafo_lojas(endereco_comprador, catalogo_lojas, geocodificar)
+            except Exception as e:
+                st.error(f"Erro na geocodificação: {str(e)}")
+                grafo_lojas = None
+            if grafo_lojas is None:
+                rota_df, distancia_total = None, "endereço do comprador não encontrado"
+            else:
+                rota_df, distancia_total = calcular_rota_otimizada(
+                    grafo_lojas, catalogo_lojas, ponto_partida, pontos_entrega, retornar, int(veiculos)
+                )
+
             if rota_df is not None:
                 st.success(f"Rota calculada com sucesso! Distância total: {distancia_total} km")
                 st.dataframe(rota_df)
-                
+
                 pontos_rota = []
                 for _, row in rota_df.iterrows():
                     pontos_rota.append({
@@ -339,19 +522,88 @@ with tab3:
                         "longitude": grafo_lojas.nodes[row["De"]]["pos"][1],
                         "ponto": row["De"]
                     })
-                
+
                 ultimo_ponto = rota_df.iloc[-1]["Para"]
                 pontos_rota.append({
                     "latitude": grafo_lojas.nodes[ultimo_ponto]["pos"][0],
                     "longitude": grafo_lojas.nodes[ultimo_ponto]["pos"][1],
                     "ponto": ultimo_ponto
                 })
-                
+
                 st.subheader("Mapa da Rota")
                 st.map(pd.DataFrame(pontos_rota), zoom=12)
             else:
                 st.error(f"Erro ao calcular rota: {distancia_total}")
 
+def painel_diagnostico():
+    """Tempos por operação, contadores dos caches e perfis de chamadas lentas.
+
+    Fica no fim do script para já incluir as chamadas feitas nesta interação.
+    """
+    with st.sidebar.expander("Diagnóstico"):
+        if not metrics.enabled():
+            st.caption("Instrumentação desligada (METRICS_ENABLED=false).")
+            return
+        linhas = metrics.snapshot()
+        if linhas:
+            import pandas as pd
+            df = pd.DataFrame(linhas).rename(columns={
+                "op": "Operação", "labels": "Rótulos", "calls": "Chamadas", "errors": "Erros",
+                "total_ms": "Total (ms)", "mean_ms": "Média", "p50_ms": "p50", "p95_ms": "p95",
+                "p99_ms": "p99", "max_ms": "Máx.",
+            })
+            st.dataframe(df.round(2), hide_index=True)
+        else:
+            st.caption("Nenhuma operação medida ainda.")
+        st.caption("Caches")
+        from api.auth import get_token_stats
+        from endpoints.cache import response_cache
+        from endpoints.singleflight import single_flight
+        st.json({"token": get_token_stats(), "respostas": response_cache.stats(),
+                 "requisições agrupadas": single_flight.stats()}, expanded=False)
+        lentas = metrics.slow_calls()
+        if lentas:
+            st.caption(f"Chamadas lentas ({len(lentas)})")
+            for chamada in lentas:
+                # Cinco pilhas mais frequentes, mostrando só os três quadros mais internos
+                pilhas = "\n".join(f"{n:>5}  " + " < ".join(reversed(pilha.split(";")[-3:]))
+                                   for pilha, n in chamada["stacks"][:5])
+                st.text(f"{chamada['op']} {chamada['elapsed_ms']:.0f} ms, {chamada['samples']} amostras\n{pilhas}")
+        st.download_button("Métricas (Prometheus)", metrics.render_prometheus(), "metrics.prom", "text/plain")
+        if st.button("Zerar métricas"):
+            metrics.reset()
+
+# Configuração da página
+st.set_page_config(page_title="Consulta de Veículos e Produtos", layout="wide")
+
+# Título do aplicativo
+st.title("🚗 Sistema de Consulta de Veículos e Produtos")
+
+# Sidebar para configurações
+with st.sidebar:
+    st.header("Configurações")
+    items_per_page = st.number_input("Itens por página", min_value=1, max_value=100, value=10)
+    todas_paginas = st.checkbox("Buscar todas as páginas", value=False,
+                                help="Percorre todas as páginas da consulta em paralelo, em vez de apenas a primeira")
+
+# Widgets de uma seção que não é executada perdem o estado; reatribuí-los mantém
+# os valores digitados quando o usuário volta para a seção (chaves "w-")
+for chave in [c for c in st.session_state if isinstance(c, str) and c.startswith("w-")]:
+    st.session_state[chave] = st.session_state[chave]
+
+# Seções do app: ao contrário de st.tabs, só a seção escolhida é executada a cada interação
+secao = st.radio("Seção", SECOES, horizontal=True, label_visibility="collapsed", key="secao")
+
+if secao == SECOES[0]:
+    secao_produtos(items_per_page, todas_paginas)
+elif secao == SECOES[1]:
+    secao_montadoras(items_per_page, todas_paginas)
+else:
+    secao_lojas()
+
+painel_diagnostico()
+preaquecer_imports()
+
 # Rodapé
 st.divider()
-st.caption(f"© {datetime.now().year} - Sistema de Consulta de Veículos e Produtos")
\ No newline at end of file
+st.caption(f"© {datetime.now().year} - Sistema de Consulta de Veículos e Produtos")
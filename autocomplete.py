@@ -0,0 +1,127 @@
+import bisect
+import heapq
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Prefixos curtos casam com boa parte do catálogo; seus resultados são memorizados
+MEMO_PREFIX_LEN = 2
+MEMO_SIZE = 4096
+
+
+def normalize(text: str) -> str:
+    """Remove acentos e diferenças de maiúsculas: "Peças" e "PECAS" viram "pecas"."""
+    text = str(text)
+    if text.isascii():
+        return text.casefold().strip()
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).casefold().strip()
+
+
+class PrefixIndex:
+    """Índice de prefixos sobre um array ordenado, consultado com bisect.
+
+    Cada nome vira uma entrada ordenada pela forma normalizada; com
+    ``index_words=True`` cada palavra do nome também vira uma entrada, para
+    que "bras" encontre "Volkswagen do Brasil". Uma consulta localiza a faixa
+    de entradas com o prefixo em O(log n) e devolve as ``limit`` melhores,
+    ordenadas por pontuação (maior primeiro) e depois alfabeticamente.
+    """
+
+    def __init__(self, index_words: bool = True):
+        self.index_words = index_words
+        self._keys: List[str] = []       # chaves normalizadas, ordenadas
+        self._refs: List[int] = []       # posição do item em _items, paralela a _keys
+        self._items: List[Tuple[float, str, str, Any]] = []  # (-pontuação, nome normalizado, nome, dados)
+        self._ids: Dict[str, int] = {}   # nome normalizado -> posição em _items
+        self._memo = OrderedDict()
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    @classmethod
+    def build(cls, names: Iterable, index_words: bool = True) -> "PrefixIndex":
+        """Constrói o índice de uma vez a partir de nomes, (nome, dados) ou (nome, dados, pontuação)."""
+        index = cls(index_words)
+        pairs = []
+        for entry in names:
+            name, data, score = index._unpack(entry)
+            ref = index._add_item(name, data, score)
+            if ref is not None:
+                pairs.extend((key, ref) for key in index._entry_keys(name))
+        pairs.sort()
+        index._keys = [key for key, _ in pairs]
+        index._refs = [ref for _, ref in pairs]
+        return index
+
+    def insert(self, name: str, data: Any = None, score: float = 0.0):
+        """Insere um nome incrementalmente; nomes repetidos só atualizam dados e pontuação."""
+        with self._lock:
+            ref = self._add_item(name, data, score)
+            if ref is not None:
+                for key in self._entry_keys(name):
+                    pos = bisect.bisect_right(self._keys, key)
+                    self._keys.insert(pos, key)
+                    self._refs.insert(pos, ref)
+            self._memo.clear()
+
+    def complete(self, prefix: str, limit: Optional[int] = 10) -> List[Any]:
+        """Retorna os dados das melhores ``limit`` sugestões para ``prefix``."""
+        return [data for _, data, _ in self.complete_items(prefix, limit)]
+
+    def complete_items(self, prefix: str, limit: Optional[int] = 10) -> List[Tuple[str, Any, float]]:
+        """Como ``complete``, mas devolve tuplas (nome, dados, pontuação)."""
+        key = normalize(prefix)
+        memo_key = (key, limit)
+        with self._lock:
+            if len(key) <= MEMO_PREFIX_LEN and memo_key in self._memo:
+                self._memo.move_to_end(memo_key)
+                return self._memo[memo_key]
+
+            lo = bisect.bisect_left(self._keys, key)
+            hi = bisect.bisect_left(self._keys, key + "\U0010ffff", lo)
+            refs = dict.fromkeys(self._refs[lo:hi])  # sem repetir o item de várias palavras
+            items = [self._items[ref] for ref in refs]
+            # As tuplas já comparam por pontuação e depois pelo nome normalizado
+            ranked = sorted(items) if limit is None else heapq.nsmallest(limit, items)
+            result = [(name, data, -neg_score) for neg_score, _, name, data in ranked]
+
+            if len(key) <= MEMO_PREFIX_LEN:
+                self._memo[memo_key] = result
+                if len(self._memo) > MEMO_SIZE:
+                    self._memo.popitem(last=False)
+            return result
+
+    def _unpack(self, entry) -> Tuple[str, Any, float]:
+        if isinstance(entry, str):
+            return entry, entry, 0.0
+        name, data = entry[0], entry[1]
+        score = entry[2] if len(entry) > 2 else 0.0
+        return name, data, score
+
+    def _add_item(self, name: str, data: Any, score: float) -> Optional[int]:
+        """Registra o item; retorna sua posição, ou None se o nome já existia."""
+        norm = normalize(name)
+        if data is None:
+            data = name
+        item = (-score, norm, name, data)
+        if norm in self._ids:
+            self._items[self._ids[norm]] = item
+            return None
+        self._ids[norm] = len(self._items)
+        self._items.append(item)
+        return self._ids[norm]
+
+    def _entry_keys(self, name: str) -> List[str]:
+        return entry_keys(normalize(name), self.index_words)
+
+
+def entry_keys(norm: str, index_words: bool = True) -> List[str]:
+    """Chaves de um nome normalizado: o nome completo e, com ``index_words``,
+    o restante do nome a partir de cada palavra."""
+    if not index_words:
+        return [norm]
+    words = norm.split()
+    return list(dict.fromkeys([norm] + [" ".join(words[i:]) for i in range(1, len(words))]))
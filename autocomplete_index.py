@@ -0,0 +1,254 @@
+"""Índice de autocomplete persistido em disco e lido via mmap.
+
+O arquivo é gerado offline (``python -m autocomplete_index build``) e aberto
+pelo app sem carregar o conteúdo em objetos Python: as consultas fazem busca
+binária direto nas páginas mapeadas, que o sistema operacional compartilha
+entre todos os processos que abrem o mesmo arquivo.
+
+Formato (inteiros little-endian):
+
+    cabeçalho   MAGIC, versão e a posição/tamanho de cada seção
+    chaves      tabela de strings ordenada (nomes normalizados e sufixos por palavra)
+    refs        uint32 por chave: item a que a chave pertence
+    itens       tabela de strings com os nomes de exibição, já na ordem de
+                ranking (pontuação decrescente, depois alfabética), então um
+                id menor é sempre uma sugestão melhor
+    curtos      tabela de strings com os prefixos de até SHORT_PREFIX_LEN letras
+    top         para cada prefixo curto, os ids das TOP_N melhores sugestões
+
+Uma tabela de strings é um array de offsets uint64 (n + 1) seguido dos bytes UTF-8.
+"""
+import argparse
+import heapq
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from bisect import bisect_left
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from autocomplete import entry_keys, normalize
+from config import AUTOCOMPLETE_INDEX_PATH
+
+MAGIC = b"ACIX"
+VERSION = 1
+SHORT_PREFIX_LEN = 2
+TOP_N = 50
+
+_HEADER = struct.Struct("<4sI10Q")
+_OFFSET = struct.Struct("<Q")
+_REF = struct.Struct("<I")
+
+
+def _write_string_table(out, strings: List[bytes]) -> Tuple[int, int]:
+    """Grava offsets + bytes; retorna (posição, quantidade)."""
+    pos = out.tell()
+    offset = 0
+    offsets = bytearray()
+    for s in strings:
+        offsets += _OFFSET.pack(offset)
+        offset += len(s)
+    offsets += _OFFSET.pack(offset)
+    out.write(offsets)
+    for s in strings:
+        out.write(s)
+    return pos, len(strings)
+
+
+def _write_refs(out, refs: Iterable[int]) -> int:
+    pos = out.tell()
+    out.write(b"".join(_REF.pack(ref) for ref in refs))
+    return pos
+
+
+def build_index_file(names: Iterable, path: str = AUTOCOMPLETE_INDEX_PATH, index_words: bool = True) -> int:
+    """Gera o arquivo de índice a partir de nomes ou pares (nome, pontuação).
+
+    A escrita é feita em um arquivo temporário renomeado ao final, para que
+    processos com o índice antigo aberto não vejam um arquivo pela metade.
+    Retorna o número de nomes distintos gravados.
+    """
+    best = {}
+    for entry in names:
+        name, score = (entry, 0.0) if isinstance(entry, str) else (entry[0], float(entry[1]))
+        if not name:
+            continue
+        norm = normalize(name)
+        if norm not in best or score > best[norm][0]:
+            best[norm] = (score, name)
+
+    ranked = sorted(best.items(), key=lambda kv: (-kv[1][0], kv[0]))
+    items = [name.encode("utf-8") for _, (_, name) in ranked]
+
+    pairs = []
+    for item_id, (norm, _) in enumerate(ranked):
+        pairs.extend((key.encode("utf-8"), item_id) for key in entry_keys(norm, index_words))
+    pairs.sort()
+
+    # Top N pré-calculado para prefixos curtos, que casariam com boa parte do índice
+    short = {}
+    for key, item_id in pairs:
+        text = key.decode("utf-8")
+        for size in range(0, min(SHORT_PREFIX_LEN, len(text)) + 1):
+            short.setdefault(text[:size].encode("utf-8"), set()).add(item_id)
+    short_keys = sorted(short)
+    tops = [heapq.nsmallest(TOP_N, short[k]) for k in short_keys]
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            out.write(b"\0" * _HEADER.size)
+            keys_pos, n_keys = _write_string_table(out, [key for key, _ in pairs])
+            refs_pos = _write_refs(out, (ref for _, ref in pairs))
+            items_pos, n_items = _write_string_table(out, items)
+            short_pos, n_short = _write_string_table(out, short_keys)
+            top_offsets = [0]
+            for top in tops:
+                top_offsets.append(top_offsets[-1] + len(top))
+            top_offsets_pos = out.tell()
+            out.write(b"".join(_OFFSET.pack(o) for o in top_offsets))
+            top_pos = _write_refs(out, (item_id for top in tops for item_id in top))
+            out.seek(0)
+            out.write(_HEADER.pack(MAGIC, VERSION, n_keys, keys_pos, refs_pos, n_items, items_pos,
+                                   n_short, short_pos, top_offsets_pos, top_pos, 0))
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return len(items)
+
+
+class _StringTable:
+    """Acesso a uma tabela de strings dentro do mmap, sem copiá-la."""
+
+    def __init__(self, buf, pos: int, count: int):
+        self._buf = buf
+        self._offsets = pos
+        self._data = pos + (count + 1) * _OFFSET.size
+        self.count = count
+
+    def __getitem__(self, i: int) -> bytes:
+        start = _OFFSET.unpack_from(self._buf, self._offsets + i * _OFFSET.size)[0]
+        end = _OFFSET.unpack_from(self._buf, self._offsets + (i + 1) * _OFFSET.size)[0]
+        return self._buf[self._data + start:self._data + end]
+
+    def __len__(self) -> int:
+        return self.count
+
+
+class MappedPrefixIndex:
+    """Consulta de prefixos sobre o arquivo gerado por ``build_index_file``.
+
+    O custo de abertura não depende do tamanho do catálogo: só o cabeçalho é
+    lido, e cada consulta toca O(log n) páginas do arquivo.
+    """
+
+    def __init__(self, path: str = AUTOCOMPLETE_INDEX_PATH):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, n_keys, keys_pos, refs_pos, n_items, items_pos,
+         n_short, short_pos, top_offsets_pos, top_pos, _) = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            self._mm.close()
+            raise ValueError(f"Arquivo de índice inválido: {path}")
+        self._keys = _StringTable(self._mm, keys_pos, n_keys)
+        self._refs = refs_pos
+        self._items = _StringTable(self._mm, items_pos, n_items)
+        self._short = _StringTable(self._mm, short_pos, n_short)
+        self._top_offsets = top_offsets_pos
+        self._top = top_pos
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def close(self):
+        self._mm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _ref(self, pos: int, i: int) -> int:
+        return _REF.unpack_from(self._mm, pos + i * _REF.size)[0]
+
+    def _top_ids(self, prefix: bytes) -> Optional[List[int]]:
+        i = bisect_left(self._short, prefix)
+        if i == len(self._short) or self._short[i] != prefix:
+            return None
+        start = _OFFSET.unpack_from(self._mm, self._top_offsets + i * _OFFSET.size)[0]
+        end = _OFFSET.unpack_from(self._mm, self._top_offsets + (i + 1) * _OFFSET.size)[0]
+        return [self._ref(self._top, j) for j in range(start, end)]
+
+    def complete(self, prefix: str, limit: Optional[int] = 10) -> List[str]:
+        """Retorna até ``limit`` nomes que começam com ``prefix`` (ou com uma de suas palavras); todos com None."""
+        key = normalize(prefix).encode("utf-8")
+        if len(key.decode("utf-8")) <= SHORT_PREFIX_LEN and limit is not None and limit <= TOP_N:
+            ids = self._top_ids(key)
+            if ids is None:
+                return []
+        else:
+            lo = bisect_left(self._keys, key)
+            # 0xFF nunca aparece em UTF-8: é um limite superior para o prefixo
+            hi = bisect_left(self._keys, key + b"\xff", lo)
+            refs = set(self._ref(self._refs, i) for i in range(lo, hi))
+            ids = sorted(refs) if limit is None else heapq.nsmallest(limit, refs)
+        return [self._items[i].decode("utf-8") for i in ids[:limit]]
+
+
+def catalog_names(placas: Iterable[str] = (), fabricantes: Iterable[str] = (),
+                  max_items: Optional[int] = None) -> Iterator[Tuple[str, float]]:
+    """Coleta nomes de montadoras e de produtos pelas funções de endpoint.
+
+    A pontuação de cada nome é o número de vezes que ele aparece, para que
+    marcas frequentes apareçam primeiro nas sugestões.
+    """
+    from endpoints.manufacturers import manufacturer_name
+    from endpoints.pagination import iter_manufacturers, iter_products
+
+    counts = {}
+    for montadora in iter_manufacturers(max_items=max_items):
+        name = manufacturer_name(montadora)
+        counts[name] = counts.get(name, 0) + 1
+    for placa in placas:
+        for fabricante in fabricantes:
+            for produto in iter_products(fabricante, placa, max_items=max_items):
+                for name in (produto.get("nomeProduto"), produto.get("marca")):
+                    if name:
+                        counts[name] = counts.get(name, 0) + 1
+    return iter(counts.items())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera ou consulta o índice de autocomplete.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="busca nomes na API e grava o índice")
+    build.add_argument("--out", default=AUTOCOMPLETE_INDEX_PATH)
+    build.add_argument("--placas", help="arquivo com uma placa por linha", default=None)
+    build.add_argument("--fabricantes", nargs="*", default=[])
+    build.add_argument("--max-items", type=int, default=None)
+    query = sub.add_parser("query", help="consulta um prefixo no índice gravado")
+    query.add_argument("prefix")
+    query.add_argument("--index", default=AUTOCOMPLETE_INDEX_PATH)
+    query.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        placas = []
+        if args.placas:
+            with open(args.placas, encoding="utf-8") as f:
+                placas = [line.strip() for line in f if line.strip()]
+        total = build_index_file(catalog_names(placas, args.fabricantes, args.max_items), args.out)
+        print(f"{total} nomes gravados em {args.out}")
+    else:
+        with MappedPrefixIndex(args.index) as index:
+            for name in index.complete(args.prefix, args.limit):
+                print(name)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
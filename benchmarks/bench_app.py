@@ -0,0 +1,124 @@
+"""Mede a partida a frio e a latência de cada interação do app Streamlit.
+
+Cada medição roda em um processo novo (imports e ``st.cache_resource``
+vazios), com ``streamlit.testing.v1.AppTest`` contra o servidor simulado:
+partida, rerun sem mudanças, busca de produtos, troca da ordenação e busca
+de montadoras. Também conta as requisições ao upstream em cada passo, para
+confirmar que reordenar não refaz a consulta.
+
+Uso: python -m benchmarks.bench_app [--app app.py] [--repeat 3] [--latency-ms 50] [--think-ms 1000]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STEPS = ("partida", "rerun", "buscar_produtos", "reordenar", "buscar_montadoras")
+
+
+def _select_section(at, label: str):
+    """Vai para a seção ``label``: rádio de seções do app atual ou abas (tudo já roda) no app antigo."""
+    for radio in at.radio:
+        if label in radio.options:
+            radio.set_value(label)
+            return True
+    return False
+
+
+def _product_rows(at) -> int:
+    """Linhas da tabela de produtos na tela (0 se ela sumiu)."""
+    for df in at.dataframe:
+        if "Código" in df.value.columns:
+            return len(df.value)
+    return 0
+
+
+def run_once(app_path: str, latency_ms: float, think_ms: float) -> dict:
+    from benchmarks.mock_server import MockConfig, MockServer
+
+    server = MockServer(MockConfig(latency_ms=latency_ms, total_products=1000)).start()
+    os.environ.update({
+        "BASE_URL": server.base_url, "AUTH_URL": server.auth_url,
+        "CLIENT_ID": "benchmark", "CLIENT_SECRET": "benchmark", "CACHE_DB_PATH": "", "CROSSREF_DB_PATH": "",
+        "CATALOG_SNAPSHOT_PATH": "",
+    })
+    from streamlit.testing.v1 import AppTest
+
+    timings, upstream = {}, {}
+
+    def step(name, action):
+        time.sleep(think_ms / 1000)  # tempo do usuário entre interações; não entra na medição
+        before = sum(server.requests.values())
+        start = time.perf_counter()
+        action()
+        timings[name] = (time.perf_counter() - start) * 1000
+        upstream[name] = sum(server.requests.values()) - before
+        if at.exception:
+            raise RuntimeError(f"{name}: {at.exception[0].message}")
+
+    at = AppTest.from_file(app_path, default_timeout=120)
+    step("partida", at.run)
+    step("rerun", at.run)
+
+    def buscar_produtos():
+        at.sidebar.number_input[0].set_value(100)
+        at.button(key="search_products").click().run()
+    step("buscar_produtos", buscar_produtos)
+    linhas_busca = _product_rows(at)
+
+    def reordenar():
+        next(s for s in at.selectbox if s.label == "Ordem").set_value("Decrescente").run()
+    step("reordenar", reordenar)
+    linhas_reordenado = _product_rows(at)
+
+    def buscar_montadoras():
+        if _select_section(at, "Lista de Montadoras"):
+            at.run()
+        at.button(key="search_manufacturers").click().run()
+    step("buscar_montadoras", buscar_montadoras)
+
+    server.stop()
+    return {"ms": timings, "upstream": upstream,
+            "linhas": {"buscar_produtos": linhas_busca, "reordenar": linhas_reordenado}}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--app", default=os.path.join(ROOT, "app.py"))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--think-ms", type=float, default=1000.0, help="pausa entre as interações")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        print(json.dumps(run_once(os.path.abspath(args.app), args.latency_ms, args.think_ms)))
+        return
+
+    runs = []
+    for _ in range(args.repeat):
+        out = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_app", "--worker", "--app", args.app,
+             "--latency-ms", str(args.latency_ms), "--think-ms", str(args.think_ms)],
+            cwd=ROOT, capture_output=True, text=True,
+        )
+        if out.returncode:
+            sys.exit(f"medição falhou:\n{out.stderr}")
+        runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+
+    print(f"{os.path.relpath(args.app, ROOT)}: mediana de {args.repeat} processos, "
+          f"servidor simulado com {args.latency_ms:.0f} ms de latência, {args.think_ms:.0f} ms entre interações")
+    print(f"{'passo':<20} {'ms':>9} {'requisições':>12} {'linhas':>8}")
+    for name in STEPS:
+        ms = statistics.median(r["ms"][name] for r in runs)
+        reqs = statistics.median(r["upstream"][name] for r in runs)
+        linhas = runs[0]["linhas"].get(name, "")
+        print(f"{name:<20} {ms:>9.1f} {reqs:>12.0f} {linhas:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Compara a decodificação das páginas de produtos: r.json() + extração, caminho rápido e incremental.
+
+Uso: python -m benchmarks.bench_json [--sizes 100 1000] [--repeat 20]
+"""
+import argparse
+import json
+import random
+import string
+import time
+
+from api.decoding import BACKEND, iter_json_array
+from endpoints.schemas import decode_products_page, decode_summary_page, products_page, summary_page
+from benchmarks.bench_products import make_raw_products
+
+CHUNK_SIZE = 64 * 1024
+
+
+def make_body(n: int, seed: int = 42) -> bytes:
+    """Corpo de resposta sintético, com os campos extras que a API devolve e o app descarta."""
+    rng = random.Random(seed)
+    produtos = make_raw_products(n, seed)
+    for produto in produtos:
+        dados = produto["data"]
+        dados["informacoesComplementares"] = " ".join(
+            "".join(rng.choices(string.ascii_lowercase, k=8)) for _ in range(20))
+        dados["aplicacoes"] = [{"modelo": "MODELO " + str(rng.randint(1, 500)), "anoInicial": 2000,
+                                "anoFinal": 2020, "motor": "1.6 8V"} for _ in range(rng.randint(5, 15))]
+        produto["score"] = rng.random()
+    page = {"pageResult": {"count": n, "vehicle": {"modelo": "GOL", "motor": "1.6"}, "data": produtos}}
+    return json.dumps(page, ensure_ascii=False).encode("utf-8")
+
+
+def summary_body(body: bytes) -> bytes:
+    page = json.loads(body)
+    for produto in page["pageResult"]["data"]:
+        produto.update(produto.pop("data"))
+    return json.dumps(page, ensure_ascii=False).encode("utf-8")
+
+
+def timeit(func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(sizes, repeat):
+    print(f"decodificador: {BACKEND}")
+    print(f"{'n':>6} {'corpo (KB)':>10} {'caso':<22} {'json (ms)':>10} {'rápido (ms)':>12} {'ganho':>7}")
+    for n in sizes:
+        body = make_body(n)
+        body_summary = summary_body(body)
+        chunks = [body[i:i + CHUNK_SIZE] for i in range(0, len(body), CHUNK_SIZE)]
+        t_json = timeit(lambda: products_page(json.loads(body.decode("utf-8"))), repeat)
+        t_fast = timeit(lambda: decode_products_page(body), repeat)
+        t_stream = timeit(lambda: list(iter_json_array(chunks)), repeat)
+        t_summary_json = timeit(lambda: summary_page(json.loads(body_summary.decode("utf-8"))), repeat)
+        t_summary_fast = timeit(lambda: decode_summary_page(body_summary), repeat)
+        kb = len(body) / 1024
+        for name, legacy, new in (("search_products", t_json, t_fast),
+                                  ("incremental", t_json, t_stream),
+                                  ("search_summary", t_summary_json, t_summary_fast)):
+            print(f"{n:>6} {kb:>10.0f} {name:<22} {legacy * 1000:>10.2f} {new * 1000:>12.2f} {legacy / new:>6.1f}x")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args(argv)
+    run(args.sizes, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Compara o pipeline de produtos em dicionários com o de ``Product``: tempo e memória.
+
+Uso: python -m benchmarks.bench_products [--sizes 10000 50000] [--repeat 3]
+"""
+import argparse
+import gc
+import random
+import string
+import time
+import tracemalloc
+from typing import Dict, List
+
+import pandas as pd
+
+from products import parse_products, products_to_dataframe
+
+MARCAS = ["BOSCH", "NGK", "COFAP", "MONROE", "NAKATA", "VALEO", "MAHLE", "TRW", "SKF", "FRAS-LE"]
+FAMILIAS = ["FREIOS", "SUSPENSAO", "IGNICAO", "ARREFECIMENTO", "FILTROS", "EMBREAGEM"]
+
+
+def make_raw_products(n: int, seed: int = 42) -> List[Dict]:
+    """Gera produtos sintéticos no formato aninhado da API (cada string é um objeto novo, como no JSON)."""
+    rng = random.Random(seed)
+    produtos = []
+    for i in range(n):
+        familia = rng.choice(FAMILIAS)
+        produtos.append({"data": {
+            "id": i,
+            "codigoReferencia": rng.choice(string.ascii_uppercase) + str(rng.randint(1, 99999)),
+            "nomeProduto": "PRODUTO " + "".join(rng.choices(string.ascii_uppercase, k=8)),
+            "marca": "".join(rng.choice(MARCAS)),
+            "csa": str(rng.randint(1, 10 ** 6)),
+            "cna": str(rng.randint(1, 10 ** 6)),
+            "familia": {"descricao": "".join(familia),
+                        "subFamilia": {"descricao": "".join(familia + " " + rng.choice("ABC"))}},
+            "similares": [{"marca": "".join(rng.choice(MARCAS)), "codigoReferencia": str(rng.randint(1, 99999))}
+                          for _ in range(rng.randint(0, 3))],
+        }})
+    return produtos
+
+
+def legacy_pipeline(raw: List[Dict]):
+    """Pipeline original do app: desembrulha, guarda os dicts e monta um dict por linha."""
+    produtos = [item["data"] if isinstance(item, dict) and "data" in item else item for item in raw]
+    df_data = []
+    for produto in produtos:
+        row = {
+            "Código": produto.get("codigoReferencia", ""),
+            "Nome": produto.get("nomeProduto", ""),
+            "Marca": produto.get("marca", ""),
+            "CSA": produto.get("csa", ""),
+            "CNA": produto.get("cna", ""),
+            "Família": produto.get("familia", {}).get("descricao", ""),
+            "Subfamília": produto.get("familia", {}).get("subFamilia", {}).get("descricao", ""),
+        }
+        similares = produto.get("similares", [])
+        if similares:
+            row["Similares"] = ", ".join([f"{s['marca']} {s['codigoReferencia']}" for s in similares])
+        df_data.append(row)
+    return produtos, pd.DataFrame(df_data)
+
+
+def new_pipeline(raw: List[Dict]):
+    produtos = parse_products(raw)
+    return produtos, products_to_dataframe(produtos)
+
+
+def timeit(func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def retained_mb(func) -> float:
+    """Memória que continua alocada enquanto o resultado de ``func`` está vivo."""
+    gc.collect()
+    tracemalloc.start()
+    result = func()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return current / 2 ** 20
+
+
+def run(sizes, repeat):
+    print(f"{'n':>8} {'etapa':<14} {'dicts':>10} {'Product':>10} {'ganho':>7}")
+    for n in sizes:
+        raw = make_raw_products(n)
+        t_legacy = timeit(lambda: legacy_pipeline(raw), repeat)
+        t_new = timeit(lambda: new_pipeline(raw), repeat)
+        del raw
+        print(f"{n:>8} {'tempo (s)':<14} {t_legacy:>10.4f} {t_new:>10.4f} {t_legacy / t_new:>6.1f}x")
+
+        # A resposta bruta é descartada depois do parse; os dicts antigos a mantinham viva
+        m_legacy = retained_mb(lambda: legacy_pipeline(make_raw_products(n))[0])
+        m_new = retained_mb(lambda: new_pipeline(make_raw_products(n))[0])
+        print(f"{n:>8} {'registros (MB)':<14} {m_legacy:>10.1f} {m_new:>10.1f} {m_legacy / m_new:>6.1f}x")
+
+        m_legacy = retained_mb(lambda: legacy_pipeline(make_raw_products(n)))
+        m_new = retained_mb(lambda: new_pipeline(make_raw_products(n)))
+        print(f"{n:>8} {'com df (MB)':<14} {m_legacy:>10.1f} {m_new:>10.1f} {m_legacy / m_new:>6.1f}x")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 50000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+    run(args.sizes, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
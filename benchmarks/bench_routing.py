@@ -0,0 +1,73 @@
+"""Compara o planejador de rotas original (vizinho mais próximo + Dijkstra) com routing.py.
+
+Uso: python -m benchmarks.bench_routing [--sizes 5 8 10 20 50 100] [--budget 1.0]
+"""
+import argparse
+import math
+import random
+import time
+
+import networkx as nx
+
+from distances import haversine_matrix
+from routing import route_length, solve_route
+
+
+def legacy_route(matrix, start, stops):
+    """Lógica original de calcular_rota_otimizada: grafo completo e shortest_path_length a cada passo."""
+    n = len(matrix)
+    grafo = nx.Graph()
+    for i in range(n):
+        for j in range(i + 1, n):
+            grafo.add_edge(i, j, weight=float(matrix[i][j]))
+    caminho = [start]
+    restantes = set(stops)
+    while restantes:
+        menor, proximo = math.inf, None
+        for ponto in restantes:
+            distancia = nx.shortest_path_length(grafo, caminho[-1], ponto, weight="weight")
+            if distancia < menor:
+                menor, proximo = distancia, ponto
+        caminho.append(proximo)
+        restantes.remove(proximo)
+    return caminho
+
+
+def make_points(n, seed=7):
+    """Pontos aleatórios na região metropolitana de Curitiba."""
+    rng = random.Random(seed)
+    return [(rng.uniform(-25.60, -25.35), rng.uniform(-49.40, -49.15)) for _ in range(n)]
+
+
+def run(sizes, budget, seeds):
+    print(f"{'paradas':>8} {'original (km)':>14} {'novo (km)':>10} {'redução':>8} "
+          f"{'original (s)':>13} {'novo (s)':>9}")
+    for n in sizes:
+        totals = [0.0, 0.0, 0.0, 0.0]
+        for seed in range(seeds):
+            matrix = haversine_matrix(make_points(n + 1, seed))
+            stops = list(range(1, n + 1))
+            start = time.perf_counter()
+            legacy = legacy_route(matrix, 0, stops)
+            totals[2] += time.perf_counter() - start
+            start = time.perf_counter()
+            route = solve_route(matrix, 0, stops, time_budget=budget)
+            totals[3] += time.perf_counter() - start
+            totals[0] += route_length(matrix, legacy)
+            totals[1] += route.length
+        old_km, new_km, old_s, new_s = (t / seeds for t in totals)
+        print(f"{n:>8} {old_km:>14.2f} {new_km:>10.2f} {(1 - new_km / old_km) * 100:>7.1f}% "
+              f"{old_s:>13.4f} {new_s:>9.4f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5, 8, 10, 20, 50, 100])
+    parser.add_argument("--budget", type=float, default=1.0)
+    parser.add_argument("--seeds", type=int, default=3)
+    args = parser.parse_args(argv)
+    run(args.sizes, args.budget, args.seeds)
+
+
+if __name__ == "__main__":
+    main()
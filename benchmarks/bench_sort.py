@@ -0,0 +1,97 @@
+"""Compara o merge_sort recursivo original com o novo motor de ordenação.
+
+Uso: python -m benchmarks.bench_sort [--sizes 1000 100000 1000000] [--repeat 3]
+"""
+import argparse
+import random
+import string
+import sys
+import time
+from typing import Dict, List
+
+from algorithms import merge_sort
+
+MARCAS = ["BOSCH", "NGK", "COFAP", "MONROE", "NAKATA", "VALEO", "MAHLE", "TRW", "SKF", "FRAS-LE"]
+
+
+def legacy_merge_sort(data: List[Dict], key: str, ascending: bool = True) -> List[Dict]:
+    """Implementação original (recursiva, com fatiamento de listas), mantida como referência."""
+    if len(data) <= 1:
+        return data
+    mid = len(data) // 2
+    left = legacy_merge_sort(data[:mid], key, ascending)
+    right = legacy_merge_sort(data[mid:], key, ascending)
+    result = []
+    i = j = 0
+    while i < len(left) and j < len(right):
+        if ascending:
+            condition = left[i][key] <= right[j][key]
+        else:
+            condition = left[i][key] >= right[j][key]
+        if condition:
+            result.append(left[i])
+            i += 1
+        else:
+            result.append(right[j])
+            j += 1
+    result.extend(left[i:])
+    result.extend(right[j:])
+    return result
+
+
+def make_products(n: int, seed: int = 42) -> List[Dict]:
+    """Gera produtos sintéticos com o formato de search_products."""
+    rng = random.Random(seed)
+    produtos = []
+    for i in range(n):
+        produtos.append({
+            "id": i,
+            "codigoReferencia": rng.choice(string.ascii_uppercase) + str(rng.randint(1, 99999)),
+            "nomeProduto": "PRODUTO " + "".join(rng.choices(string.ascii_uppercase, k=8)),
+            "marca": rng.choice(MARCAS),
+            "csa": str(rng.randint(1, 10 ** 6)),
+        })
+    return produtos
+
+
+def timeit(func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(sizes, repeat):
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 10000))
+    print(f"{'n':>9} {'caso':<32} {'original (s)':>13} {'novo (s)':>10} {'ganho':>7}")
+    for n in sizes:
+        data = make_products(n)
+        cases = [
+            ("codigoReferencia", lambda: legacy_merge_sort(data, "codigoReferencia"),
+             lambda: merge_sort(data, "codigoReferencia")),
+            ("marca desc", lambda: legacy_merge_sort(data, "marca", False),
+             lambda: merge_sort(data, "marca", False)),
+        ]
+        for name, legacy, new in cases:
+            t_legacy = timeit(legacy, repeat)
+            t_new = timeit(new, repeat)
+            print(f"{n:>9} {name:<32} {t_legacy:>13.4f} {t_new:>10.4f} {t_legacy / t_new:>6.1f}x")
+        # Casos sem equivalente no original
+        t_multi = timeit(lambda: merge_sort(data, ["marca", "codigoReferencia"]), repeat)
+        print(f"{n:>9} {'marca + codigoReferencia':<32} {'-':>13} {t_multi:>10.4f} {'-':>7}")
+        t_nat = timeit(lambda: merge_sort(data, "codigoReferencia", natural=True), repeat)
+        print(f"{n:>9} {'codigoReferencia (natural)':<32} {'-':>13} {t_nat:>10.4f} {'-':>7}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 100000, 1000000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+    run(args.sizes, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
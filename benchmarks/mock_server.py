@@ -0,0 +1,207 @@
+"""Servidor HTTP local que imita o superbusca e o servidor OAuth, para benchmarks.
+
+Responde às mesmas rotas usadas por ``endpoints`` e ``api.auth`` com dados
+sintéticos e determinísticos (o mesmo pedido gera sempre a mesma página),
+com latência, tamanho do catálogo e taxa de erros configuráveis.
+
+Uso: python -m benchmarks.mock_server [--port 8765] [--latency-ms 50] [--error-rate 0.01]
+Depois: BASE_URL=http://127.0.0.1:8765 AUTH_URL=http://127.0.0.1:8765/oauth/token streamlit run app.py
+"""
+import argparse
+import json
+import random
+import re
+import string
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+TOKEN_PATH = "/oauth/token"
+PRODUCTS_PATH = "/superbusca/api/integracao/catalogo/produtos/query"
+SUMMARY_PATH = "/superbusca/api/integracao/catalogo/v2/produtos/query/sumario"
+MANUFACTURERS_PATH = "/superbusca/api/integracao/veiculo/montadoras/query"
+
+MARCAS = ["BOSCH", "NGK", "COFAP", "MONROE", "NAKATA", "VALEO", "MAHLE", "TRW", "SKF", "FRAS-LE"]
+FAMILIAS = ["FREIOS", "SUSPENSAO", "IGNICAO", "ARREFECIMENTO", "FILTROS", "EMBREAGEM"]
+MONTADORAS = ["VW", "FIAT", "FORD", "GM", "TOYOTA", "HONDA", "HYUNDAI", "VOLVO", "BMW", "RENAULT",
+              "NISSAN", "PEUGEOT", "CITROEN", "JEEP", "KIA", "MITSUBISHI", "MERCEDES-BENZ", "AUDI"]
+
+
+class MockConfig:
+    """Parâmetros do servidor simulado."""
+
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0, total_products: int = 1000,
+                 total_manufacturers: int = len(MONTADORAS), error_rate: float = 0.0,
+                 token_ttl: int = 300, seed: int = 42):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.total_products = total_products
+        self.total_manufacturers = total_manufacturers
+        self.error_rate = error_rate
+        self.token_ttl = token_ttl
+        self.seed = seed
+
+
+def _rng(config: MockConfig, *parts) -> random.Random:
+    return random.Random(zlib.crc32(repr((config.seed,) + parts).encode()))
+
+
+def make_product(config: MockConfig, consulta: str, i: int) -> Dict:
+    rng = _rng(config, consulta, i)
+    familia = rng.choice(FAMILIAS)
+    return {
+        "id": i,
+        "codigoReferencia": rng.choice(string.ascii_uppercase) + str(rng.randint(1, 99999)),
+        "nomeProduto": "PRODUTO " + "".join(rng.choices(string.ascii_uppercase, k=8)),
+        "marca": rng.choice(MARCAS),
+        "csa": str(rng.randint(1, 10 ** 6)),
+        "cna": str(rng.randint(1, 10 ** 6)),
+        "informacoesComplementares": "APLICACAO " + "".join(rng.choices(string.ascii_uppercase, k=24)),
+        "imagemReal": f"https://imagens.example/{i}.jpg",
+        "familia": {"descricao": familia, "subFamilia": {"descricao": f"{familia} {rng.choice('ABC')}"}},
+        "similares": [{"marca": rng.choice(MARCAS), "codigoReferencia": str(rng.randint(1, 99999))}
+                      for _ in range(rng.randint(0, 4))],
+    }
+
+
+def _page_range(config_total: int, payload: Dict):
+    pagina = int(payload.get("pagina", 0))
+    itens = int(payload.get("itensPorPagina", 100))
+    start = pagina * itens
+    return range(start, min(start + itens, config_total))
+
+
+def products_response(config: MockConfig, payload: Dict) -> Dict:
+    consulta = json.dumps([payload.get("produtoFiltro"), payload.get("veiculoFiltro")], sort_keys=True)
+    data = [{"data": make_product(config, consulta, i), "score": 1.0}
+            for i in _page_range(config.total_products, payload)]
+    return {"pageResult": {"count": config.total_products, "data": data}}
+
+
+def summary_response(config: MockConfig, payload: Dict) -> Dict:
+    consulta = json.dumps([payload.get("veiculoFiltro"), payload.get("superbusca")], sort_keys=True)
+    placa = (payload.get("veiculoFiltro") or {}).get("veiculoPlaca", "")
+    rng = _rng(config, "veiculo", placa)
+    vehicle = {"montadora": rng.choice(MONTADORAS), "modelo": "MODELO " + str(rng.randint(1, 300)),
+               "motor": rng.choice(["1.0", "1.4", "1.6", "2.0"]), "anoFabricacao": rng.randint(2000, 2024)}
+    data = [make_product(config, consulta, i) for i in _page_range(config.total_products, payload)]
+    return {"pageResult": {"count": config.total_products, "vehicle": vehicle, "data": data}}
+
+
+def manufacturers_response(config: MockConfig, payload: Dict) -> Dict:
+    data = [{"id": i, "nome": MONTADORAS[i % len(MONTADORAS)] + ("" if i < len(MONTADORAS) else f" {i}")}
+            for i in _page_range(config.total_manufacturers, payload)]
+    return {"count": config.total_manufacturers, "data": data}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, como o servidor real
+    disable_nagle_algorithm = True  # cabeçalho e corpo saem em escritas separadas
+    server: "MockServer"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        config = self.server.config
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        path = re.sub(r"/{2,}", "/", self.path.split("?", 1)[0])
+        self.server.count(path)
+
+        delay = config.latency_ms + (random.uniform(0, config.jitter_ms) if config.jitter_ms else 0.0)
+        if delay:
+            time.sleep(delay / 1000)
+        if config.error_rate and random.random() < config.error_rate:
+            return self._send(503, {"error": "indisponivel (simulado)"})
+
+        if path == TOKEN_PATH:
+            token = "mock-" + "".join(random.choices(string.ascii_letters, k=16))
+            return self._send(200, {"access_token": token, "token_type": "bearer", "expires_in": config.token_ttl})
+        try:
+            payload = json.loads(body) if body else {}
+        except ValueError:
+            return self._send(400, {"error": "JSON inválido"})
+        if path == PRODUCTS_PATH:
+            return self._send(200, products_response(config, payload))
+        if path == SUMMARY_PATH:
+            return self._send(200, summary_response(config, payload))
+        if path == MANUFACTURERS_PATH:
+            return self._send(200, manufacturers_response(config, payload))
+        return self._send(404, {"error": f"rota desconhecida: {path}"})
+
+    def _send(self, status: int, body: Dict):
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class MockServer(ThreadingHTTPServer):
+    """Servidor simulado em uma thread de fundo; use como context manager."""
+
+    daemon_threads = True
+
+    def __init__(self, config: Optional[MockConfig] = None, host: str = "127.0.0.1", port: int = 0):
+        super().__init__((host, port), _Handler)
+        self.config = config or MockConfig()
+        self.requests: Dict[str, int] = {}
+        self._count_lock = threading.Lock()
+        self._thread = None
+
+    def count(self, path: str):
+        with self._count_lock:
+            self.requests[path] = self.requests.get(path, 0) + 1
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def auth_url(self) -> str:
+        return self.base_url + TOKEN_PATH
+
+    def start(self) -> "MockServer":
+        self._thread = threading.Thread(target=self.serve_forever, name="mock-superbusca", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--products", type=int, default=1000, help="total de produtos por consulta")
+    parser.add_argument("--manufacturers", type=int, default=len(MONTADORAS))
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fração de respostas 503")
+    args = parser.parse_args(argv)
+    config = MockConfig(args.latency_ms, args.jitter_ms, args.products, args.manufacturers, args.error_rate)
+    server = MockServer(config, args.host, args.port)
+    print(f"superbusca simulado em {server.base_url} (token em {server.auth_url})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,305 @@
+"""Suíte de benchmarks: micro-benchmarks dos algoritmos e chamadas HTTP contra o servidor simulado.
+
+Para cada caso mede vazão, latência (p50/p95/p99) e pico de memória
+(tracemalloc, numa execução separada para não distorcer os tempos). Os
+resultados podem ser gravados como baseline e comparados em execuções
+seguintes; a comparação termina com código 1 se algum caso piorar além da
+tolerância. Grave o baseline na mesma máquina em que a comparação vai rodar.
+
+Uso:
+    python -m benchmarks.suite --save-baseline
+    python -m benchmarks.suite --compare
+    python -m benchmarks.suite --suite http --latency-ms 20 --error-rate 0.01
+"""
+import argparse
+import json
+import os
+import random
+import string
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+METRICS = (  # (métrica, maior é melhor)
+    ("throughput", True),
+    ("p50_ms", False),
+    ("p95_ms", False),
+    ("peak_kb", False),
+)
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+
+def _summary(name: str, latencies: List[float], wall: float, ops: int, errors: int, peak: int) -> Dict:
+    return {
+        "name": name,
+        "calls": len(latencies),
+        "errors": errors,
+        "throughput": ops / wall if wall else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "peak_kb": peak / 1024,
+    }
+
+
+def _peak_memory(func: Callable) -> int:
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def measure(name: str, func: Callable, duration: float = 1.0, min_calls: int = 5, max_calls: int = 10000,
+            ops_per_call: int = 1) -> Dict:
+    """Chama ``func`` em sequência por ``duration`` segundos (respeitando min/max de chamadas)."""
+    func()  # aquecimento
+    latencies = []
+    errors = 0
+    start = time.perf_counter()
+    while len(latencies) < max_calls and (len(latencies) < min_calls or time.perf_counter() - start < duration):
+        t0 = time.perf_counter()
+        try:
+            func()
+        except Exception:
+            errors += 1
+        latencies.append(time.perf_counter() - t0)
+    wall = time.perf_counter() - start
+    return _summary(name, latencies, wall, ops_per_call * (len(latencies) - errors), errors, _peak_memory(func))
+
+
+def measure_concurrent(name: str, func: Callable, calls: int, workers: int, ops_per_call: int = 1) -> Dict:
+    """Dispara ``calls`` chamadas de ``func`` com ``workers`` threads; vazão pelo tempo total."""
+    func()
+
+    def timed(_):
+        t0 = time.perf_counter()
+        try:
+            func()
+            ok = True
+        except Exception:
+            ok = False
+        return time.perf_counter() - t0, ok
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(timed, range(calls)))
+    wall = time.perf_counter() - start
+    latencies = [t for t, _ in results]
+    errors = sum(1 for _, ok in results if not ok)
+    return _summary(name, latencies, wall, ops_per_call * (calls - errors), errors, _peak_memory(func))
+
+
+# --- Micro-benchmarks -------------------------------------------------------------
+
+def _products(n: int, seed: int = 42) -> List[Dict]:
+    rng = random.Random(seed)
+    marcas = ["BOSCH", "NGK", "COFAP", "MONROE", "NAKATA", "VALEO", "MAHLE", "TRW"]
+    return [{
+        "id": i,
+        "codigoReferencia": rng.choice(string.ascii_uppercase) + str(rng.randint(1, 99999)),
+        "nomeProduto": "PRODUTO " + "".join(rng.choices(string.ascii_uppercase, k=8)),
+        "marca": rng.choice(marcas),
+    } for i in range(n)]
+
+
+def micro_cases(duration: float) -> List[Dict]:
+    from algorithms import BinarySearchTree, get_top_k_items, merge_sort
+    from distances import haversine_matrix
+    from routing import solve_route, solve_routes
+
+    results = []
+    data = _products(100000)
+    results.append(measure("merge_sort 100k", lambda: merge_sort(data, "codigoReferencia"), duration,
+                           ops_per_call=len(data)))
+    results.append(measure("merge_sort 100k multi-chave",
+                           lambda: merge_sort(data, ["marca", "codigoReferencia"]), duration, ops_per_call=len(data)))
+    results.append(measure("get_top_k_items 100k k=10",
+                           lambda: get_top_k_items(data, "codigoReferencia", 10), duration, ops_per_call=len(data)))
+
+    names = sorted({p["nomeProduto"] for p in data[:20000]})
+    rng = random.Random(1)
+    prefixes = [name[:rng.randint(9, 11)] for name in rng.sample(names, 1000)]
+
+    def build_tree():
+        tree = BinarySearchTree()
+        for name in names:
+            tree.insert(name, {"nome": name})
+        return tree
+
+    tree = build_tree()
+    results.append(measure("BinarySearchTree insert 20k", build_tree, duration, ops_per_call=len(names)))
+    results.append(measure("BinarySearchTree 1000 prefixos",
+                           lambda: [tree.search_prefix(p) for p in prefixes], duration, ops_per_call=len(prefixes)))
+
+    rng = random.Random(7)
+    points = [(rng.uniform(-25.60, -25.35), rng.uniform(-49.40, -49.15)) for _ in range(61)]
+    matrix = haversine_matrix(points)
+    results.append(measure("solve_route 10 paradas (exato)",
+                           lambda: solve_route(matrix, 0, range(1, 11)), duration))
+    results.append(measure("solve_route 60 paradas",
+                           lambda: solve_route(matrix, 0, range(1, 61), time_budget=0.2), duration))
+    results.append(measure("solve_routes 60 paradas, 3 veículos",
+                           lambda: solve_routes(matrix, 0, range(1, 61), vehicles=3, time_budget=0.2), duration))
+    return results
+
+
+# --- HTTP contra o servidor simulado ----------------------------------------------
+
+def _point_to(server):
+    """Aponta o cliente para o servidor simulado, qualquer que seja a ordem dos imports.
+
+    config.py lê o ambiente na importação e os endpoints copiam BASE_URL ao serem
+    importados; se os micro-benchmarks já importaram o projeto, o ambiente sozinho
+    não basta, então as URLs são gravadas também nos módulos.
+    """
+    import config
+    import endpoints.manufacturers
+    import endpoints.search
+    import endpoints.search_summary
+
+    os.environ.update({
+        "BASE_URL": server.base_url, "AUTH_URL": server.auth_url,
+        "CLIENT_ID": "benchmark", "CLIENT_SECRET": "benchmark",
+    })
+    for module in (config, endpoints.manufacturers, endpoints.search, endpoints.search_summary):
+        module.BASE_URL = server.base_url
+    config.AUTH_URL = server.auth_url
+
+
+def http_cases(duration: float, latency_ms: float, error_rate: float, workers: int) -> List[Dict]:
+    from benchmarks.mock_server import MockConfig, MockServer
+
+    config = MockConfig(latency_ms=latency_ms, error_rate=error_rate, total_products=1000)
+    with MockServer(config) as server:
+        _point_to(server)
+        from api import auth
+        from endpoints.manufacturers import get_manufacturers
+        from endpoints.pagination import iter_pages
+        from endpoints.search import search_products
+        from endpoints.search_summary import search_summary
+
+        results = [
+            measure("token OAuth", auth._fetch_token, duration),
+            measure("search_products 100 itens", lambda: search_products.uncached("BOSCH", "ABC1234", 0, 100),
+                    duration, ops_per_call=100),
+            measure_concurrent(f"search_products 100 itens x{workers}",
+                               lambda: search_products.uncached("BOSCH", "ABC1234", 0, 100),
+                               calls=workers * 8, workers=workers, ops_per_call=100),
+            measure("search_products em cache", lambda: search_products("BOSCH", "ABC1234", 0, 100),
+                    duration, ops_per_call=100),
+            measure("search_summary 100 itens", lambda: search_summary.uncached("ABC1234", "AMORTECEDOR", 0, 100),
+                    duration, ops_per_call=100),
+            measure("get_manufacturers", lambda: get_manufacturers.uncached(0, 100), duration),
+            measure("iter_pages 1000 itens (10 páginas)",
+                    lambda: sum(len(page["data"]) for page in iter_pages(
+                        lambda pagina, n: search_products.uncached("NGK", "ABC1234", pagina, n), 100)),
+                    duration, min_calls=2, ops_per_call=config.total_products),
+        ]
+    return results
+
+
+# --- Relatório e baseline ---------------------------------------------------------
+
+def print_table(results: List[Dict], baseline: Optional[Dict] = None, out=sys.stdout):
+    header = f"{'caso':<40} {'vazão/s':>12} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'mem KB':>9} {'erros':>6}"
+    print(header, file=out)
+    print("-" * len(header), file=out)
+    for r in results:
+        line = (f"{r['name']:<40} {r['throughput']:>12.1f} {r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} "
+                f"{r['p99_ms']:>9.2f} {r['peak_kb']:>9.0f} {r['errors']:>6}")
+        if baseline and r["name"] in baseline:
+            base = baseline[r["name"]]
+            line += f"   vazão {_change(r['throughput'], base['throughput']):>7}"
+        print(line, file=out)
+
+
+def _change(value: float, base: float) -> str:
+    return f"{(value / base - 1) * 100:+.0f}%" if base else "-"
+
+
+def find_regressions(results: List[Dict], baseline: Dict, tolerance: float) -> List[str]:
+    """Casos que pioraram mais que ``tolerance`` (fração) em alguma métrica."""
+    problems = []
+    for r in results:
+        base = baseline.get(r["name"])
+        if not base:
+            continue
+        for metric, higher_is_better in METRICS:
+            old, new = base.get(metric), r[metric]
+            if not old:
+                continue
+            worse = new < old * (1 - tolerance) if higher_is_better else new > old * (1 + tolerance)
+            if worse:
+                problems.append(f"{r['name']}: {metric} {old:.2f} -> {new:.2f} ({_change(new, old)})")
+    return problems
+
+
+def load_baseline(path: str) -> Dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)["cases"]
+
+
+def save_baseline(path: str, results: List[Dict]):
+    cases = {r["name"]: {metric: round(r[metric], 4) for metric, _ in METRICS} for r in results}
+    document = {"python": sys.version.split()[0], "created": time.strftime("%Y-%m-%d %H:%M:%S"), "cases": cases}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(document, f, indent=2, ensure_ascii=False)
+        f.write("\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--suite", choices=("micro", "http", "all"), default="all")
+    parser.add_argument("--duration", type=float, default=1.0, help="segundos por caso")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="latência do servidor simulado")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fração de respostas 503 do servidor simulado")
+    parser.add_argument("--workers", type=int, default=8, help="threads no caso concorrente")
+    parser.add_argument("--save-baseline", nargs="?", const=DEFAULT_BASELINE, metavar="ARQUIVO")
+    parser.add_argument("--compare", nargs="?", const=DEFAULT_BASELINE, metavar="ARQUIVO")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="piora aceita na comparação (fração)")
+    parser.add_argument("--json", metavar="ARQUIVO", help="grava os resultados completos em JSON")
+    parser.add_argument("--crossref-db", default="", metavar="ARQUIVO",
+                        help="índice de similares alimentado pelas buscas (padrão: desligado)")
+    args = parser.parse_args(argv)
+
+    # Antes de qualquer import do projeto: config.py lê o ambiente uma vez só
+    os.environ.update({"CACHE_DB_PATH": "", "CROSSREF_DB_PATH": args.crossref_db})
+
+    results = []
+    if args.suite in ("micro", "all"):
+        results += micro_cases(args.duration)
+    if args.suite in ("http", "all"):
+        results += http_cases(args.duration, args.latency_ms, args.error_rate, args.workers)
+
+    baseline = load_baseline(args.compare) if args.compare else None
+    print_table(results, baseline)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+    if args.save_baseline:
+        save_baseline(args.save_baseline, results)
+        print(f"\nbaseline gravado em {args.save_baseline}")
+    if baseline is not None:
+        problems = find_regressions(results, baseline, args.tolerance)
+        if problems:
+            print("\nRegressões acima de {:.0%}:".format(args.tolerance))
+            for problem in problems:
+                print("  " + problem)
+            return 1
+        print("\nSem regressões em relação ao baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,280 @@
+"""Consultas em massa com concorrência, limite de taxa e retomada.
+
+Cada linha da entrada vira uma consulta (placa + termo, fabricante + placa).
+Os resultados são gravados em JSONL, um registro por consulta, e um arquivo
+de checkpoint registra as consultas concluídas junto com o tamanho do JSONL
+naquele momento: ao retomar, o JSONL é cortado no último ponto confirmado e
+só as consultas pendentes (ou que falharam) são refeitas.
+"""
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Set, TextIO, Tuple
+
+from api.auth import get_access_token
+from api.decoding import dumps
+
+_SEPARATORS = re.compile(r"[,;\t]")
+
+
+class Query(NamedTuple):
+    """Uma consulta da entrada: a chave de retomada e os argumentos do endpoint."""
+    key: str
+    args: Tuple
+
+
+class InvalidLine(NamedTuple):
+    """Linha da entrada que não virou consulta (ex.: número errado de campos)."""
+    number: int
+    line: str
+    reason: str
+
+
+class Outcome(NamedTuple):
+    query: Query
+    result: object
+    error: Optional[str]
+    elapsed: float
+
+
+# --- Consultas --------------------------------------------------------------------
+
+def _summary(args, all_pages: bool, itens: int):
+    from endpoints.pagination import iter_summary
+    from endpoints.search_summary import search_summary
+    placa, termo = args
+    if all_pages:
+        return list(iter_summary(placa, termo, itens=itens, concurrency=1, cached=False))
+    return search_summary.uncached(placa, termo, 0, itens)
+
+
+def _products(args, all_pages: bool, itens: int):
+    from endpoints.pagination import iter_products
+    from endpoints.search import search_products
+    fabricante, placa = args
+    if all_pages:
+        return list(iter_products(fabricante, placa, itens=itens, concurrency=1, cached=False))
+    return search_products.uncached(fabricante, placa, 0, itens)
+
+
+def _manufacturers(args, all_pages: bool, itens: int):
+    from endpoints.pagination import iter_manufacturers
+    from endpoints.manufacturers import get_manufacturers
+    if all_pages:
+        return list(iter_manufacturers(itens=itens, concurrency=1, cached=False))
+    return get_manufacturers.uncached(0, itens)
+
+
+# comando -> (função, campos esperados em cada linha)
+COMMANDS: Dict[str, Tuple[Callable, Sequence[str]]] = {
+    "sumario": (_summary, ("placa", "superbusca")),
+    "produtos": (_products, ("fabricante", "placa")),
+    "montadoras": (_manufacturers, ()),
+}
+
+
+def read_queries(command: str, lines: Iterable[str], skip_invalid: bool = False) -> Iterator[Query]:
+    """Lê as consultas de um arquivo de texto: um item por linha, campos separados por , ; ou tab.
+
+    Linhas vazias e comentários (#) são ignorados; consultas repetidas saem uma vez só.
+    Uma linha malformada gera ValueError ou, com ``skip_invalid``, sai como
+    ``InvalidLine`` para quem consome registrar e seguir adiante.
+    """
+    _, fields = COMMANDS[command]
+    if not fields:
+        yield Query(command, ())
+        return
+    seen = set()
+    for number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        args = tuple(part.strip() for part in _SEPARATORS.split(line))
+        if len(args) != len(fields):
+            reason = f"esperado {', '.join(fields)}; recebido {line!r}"
+            if not skip_invalid:
+                raise ValueError(f"Linha {number}: {reason}")
+            yield InvalidLine(number, line, reason)
+            continue
+        key = command + ":" + "|".join(arg.upper() for arg in args)
+        if key not in seen:
+            seen.add(key)
+            yield Query(key, args)
+
+
+# --- Limite de taxa e checkpoint --------------------------------------------------
+
+class RateLimiter:
+    """Espaça o início das chamadas para no máximo ``rate`` por segundo, entre todas as threads."""
+
+    def __init__(self, rate: Optional[float]):
+        self._interval = 1.0 / rate if rate else 0.0
+        self._lock = threading.Lock()
+        self._next = time.monotonic()
+
+    def wait(self):
+        if not self._interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self._interval
+        if start > now:
+            time.sleep(start - now)
+
+
+class Checkpoint:
+    """Registro das consultas gravadas: linhas "chave<TAB>tamanho do JSONL após gravá-la<TAB>ok|erro".
+
+    Só as consultas com "ok" contam como concluídas; as com erro são refeitas.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.done: Set[str] = set()
+        self.offset = 0
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if not line.endswith("\n"):
+                        break  # última linha incompleta: a gravação foi interrompida
+                    key, offset, status = line[:-1].rsplit("\t", 2)
+                    if status == "ok":
+                        self.done.add(key)
+                    else:
+                        self.done.discard(key)
+                    self.offset = int(offset)
+        self._file = open(path, "a", encoding="utf-8")
+
+    def mark(self, key: str, offset: int, ok: bool):
+        self._file.write(f"{key}\t{offset}\t{'ok' if ok else 'erro'}\n")
+        self._file.flush()
+        if ok:
+            self.done.add(key)
+        self.offset = offset
+
+    def close(self):
+        self._file.close()
+
+
+def _open_output(path: str, checkpoint: Checkpoint):
+    """Abre o JSONL para acrescentar, descartando o que foi gravado depois do último checkpoint."""
+    output = open(path, "ab")
+    if output.tell() < checkpoint.offset:
+        output.close()
+        raise ValueError(f"{path} é menor que o registrado em {checkpoint.path}; "
+                         "apague o checkpoint para recomeçar do zero")
+    if output.tell() > checkpoint.offset:
+        output.truncate(checkpoint.offset)
+        output.seek(checkpoint.offset)
+    return output
+
+
+# --- Execução ---------------------------------------------------------------------
+
+def _percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+
+class Stats:
+    def __init__(self):
+        self.ok = 0
+        self.errors = 0
+        self.skipped = 0
+        self.invalid = 0
+        self.latencies: List[float] = []
+        self.started = time.monotonic()
+
+    def report(self) -> str:
+        elapsed = time.monotonic() - self.started
+        done = self.ok + self.errors
+        lines = [
+            f"consultas: {done} ({self.ok} ok, {self.errors} com erro), {self.skipped} já concluídas antes"
+            + (f", {self.invalid} linhas inválidas ignoradas" if self.invalid else ""),
+            f"tempo: {elapsed:.1f} s, vazão: {done / elapsed if elapsed else 0:.2f} consultas/s",
+        ]
+        if self.latencies:
+            lines.append("latência (ms): p50 {:.0f}, p95 {:.0f}, p99 {:.0f}, máx {:.0f}".format(
+                *(_percentile(self.latencies, q) * 1000 for q in (50, 95, 99, 100))))
+        return "\n".join(lines)
+
+
+def run_bulk(command: str, queries: Iterable, output_path: str, checkpoint_path: Optional[str] = None,
+             workers: int = 4, rate: Optional[float] = None, all_pages: bool = False, itens: int = 100,
+             progress: Optional[TextIO] = sys.stderr, progress_every: int = 100) -> Stats:
+    """Executa as consultas e grava um registro JSONL por consulta.
+
+    Cada registro tem ``key``, ``args``, ``ok``, ``elapsed_ms`` e ``result``
+    ou ``error``. Consultas com erro ficam registradas no JSONL, mas são
+    refeitas na próxima execução. Itens ``InvalidLine`` em ``queries`` são
+    contados em ``Stats.invalid``, relatados em ``progress`` e pulados.
+    """
+    if workers < 1:
+        raise ValueError("workers deve ser maior que zero")
+    func, fields = COMMANDS[command]
+    checkpoint = Checkpoint(checkpoint_path or output_path + ".ckpt")
+    output = _open_output(output_path, checkpoint)
+    limiter = RateLimiter(rate)
+    stats = Stats()
+
+    def execute(query: Query) -> Outcome:
+        limiter.wait()
+        start = time.perf_counter()
+        try:
+            return Outcome(query, func(query.args, all_pages, itens), None, time.perf_counter() - start)
+        except Exception as e:
+            return Outcome(query, None, f"{type(e).__name__}: {e}", time.perf_counter() - start)
+
+    def record(outcome: Outcome):
+        entry = {
+            "key": outcome.query.key,
+            "args": dict(zip(fields, outcome.query.args)),
+            "ok": outcome.error is None,
+            "elapsed_ms": round(outcome.elapsed * 1000, 1),
+        }
+        if outcome.error is None:
+            entry["result"] = outcome.result
+            stats.ok += 1
+        else:
+            entry["error"] = outcome.error
+            stats.errors += 1
+        stats.latencies.append(outcome.elapsed)
+        output.write(dumps(entry) + b"\n")
+        output.flush()
+        checkpoint.mark(outcome.query.key, output.tell(), outcome.error is None)
+        done = stats.ok + stats.errors
+        if progress is not None and progress_every and done % progress_every == 0:
+            print(f"{done} consultas ({stats.errors} com erro)", file=progress, flush=True)
+
+    try:
+        get_access_token()  # um token só para todo o lote
+        pending_queries = iter(queries)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            in_flight = set()
+            # Mantém no máximo 2x workers consultas submetidas: a entrada é lida sob demanda
+            for query in pending_queries:
+                if isinstance(query, InvalidLine):
+                    stats.invalid += 1
+                    if progress is not None:
+                        print(f"linha {query.number} ignorada: {query.reason}", file=progress, flush=True)
+                    continue
+                if query.key in checkpoint.done:
+                    stats.skipped += 1
+                    continue
+                in_flight.add(executor.submit(execute, query))
+                if len(in_flight) >= workers * 2:
+                    finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        record(future.result())
+            for future in in_flight:
+                record(future.result())
+    finally:
+        output.close()
+        checkpoint.close()
+    return stats
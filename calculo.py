@@ -1,20 +1,49 @@
-def calcular_media_necessaria(md1, meta_anual=70):
+"""Notas necessárias no 2º semestre para atingir a média anual.
+
+As funções de uma conta só (``calcular_media_necessaria``,
+``calcular_necessario_cp_gs``, ``calcular_cp_minimo``) são aritmética pura e
+valem tanto para números quanto para colunas NumPy/pandas. ``calcular_lote``
+aplica as três a uma turma inteira de uma vez, coluna a coluna, e
+``processar_arquivo`` faz o mesmo em fluxo sobre CSV ou Parquet de qualquer
+tamanho, bloco a bloco.
+
+Colunas de entrada: ``md1`` e ``challenge`` (obrigatórias), ``cp1``, ``cp2``,
+``cp3`` e as metas ``meta_anual``/``meta_semestre`` (opcionais; sem elas
+valem as metas passadas à função).
+
+Uso:
+    python -m calculo --md1 75 --challenge 60
+    python -m calculo -i turma.csv -o notas.parquet [--meta-anual 70] [--chunk-size 250000]
+"""
+import argparse
+import gzip
+import io
+import sys
+from typing import Iterator
+
+META_PADRAO = 70
+DEFAULT_CHUNK_SIZE = 250000
+CP_COLUMNS = ("cp1", "cp2", "cp3")
+NUMERIC_COLUMNS = ("md1", "challenge") + CP_COLUMNS + ("meta_anual", "meta_semestre")
+
+
+def calcular_media_necessaria(md1, meta_anual=META_PADRAO):
     """
     Calcula a nota necessária no 2º semestre para alcançar a média anual desejada.
     """
     md2_necessaria = 2 * meta_anual - md1  # Fórmula para calcular a média necessária do 2º semestre
     return md2_necessaria
 
-def calcular_necessario_cp_gs(md2_necessaria, challenge, meta_semestre=70):
+def calcular_necessario_cp_gs(md2_necessaria, challenge, meta_semestre=META_PADRAO):
     """
     Calcula a média necessária para CP1, CP2, CP3 e Challenge no 2º semestre.
     """
     # Calcular a média do 2º semestre baseada nos 40% de CP e Challenge e 60% de GS
     cp_challenge_necessario = (md2_necessaria - 0.6 * challenge) / 0.4
-    
+
     # Nota necessária para GS (60% do semestre)
     gs_necessario = (md2_necessaria - 0.4 * cp_challenge_necessario) / 0.6
-    
+
     return cp_challenge_necessario, gs_necessario
 
 def calcular_cp_minimo(cp_challenge_necessario):
@@ -23,25 +52,181 @@ def calcular_cp_minimo(cp_challenge_necessario):
     """
     return cp_challenge_necessario / 2  # Como são 3 CPs, a soma das duas maiores deve alcançar o valor.
 
-# Exemplo de média do 1º semestre (MD1)
-md1 = 75  # Média do 1º semestre
 
-# Calcular a média necessária do 2º semestre (MD2)
-md2_necessaria = calcular_media_necessaria(md1)
+def calcular_lote(df, meta_anual=META_PADRAO, meta_semestre=META_PADRAO):
+    """Notas necessárias de cada aluno de ``df``, em colunas novas de um DataFrame com o mesmo índice.
+
+    Cada conta é uma operação sobre a coluna inteira (float64), sem laço por
+    aluno. Com as colunas de CP, também sai a média das duas maiores notas de
+    CP já obtidas (CPs em branco são ignorados) e se ela já alcança ``cp_minimo``.
+    """
+    import numpy as np
+    import pandas as pd
+
+    faltando = [c for c in ("md1", "challenge") if c not in df.columns]
+    if faltando:
+        raise ValueError(f"Colunas obrigatórias ausentes: {', '.join(faltando)}")
+
+    def coluna(nome, padrao=None):
+        if nome in df.columns:
+            return pd.to_numeric(df[nome], errors="coerce").to_numpy(dtype=np.float64)
+        return np.full(len(df), padrao, dtype=np.float64)
+
+    md1, challenge = coluna("md1"), coluna("challenge")
+    md2_necessaria = calcular_media_necessaria(md1, coluna("meta_anual", meta_anual))
+    cp_challenge_necessario, gs_necessario = calcular_necessario_cp_gs(
+        md2_necessaria, challenge, coluna("meta_semestre", meta_semestre))
+    cp_minimo = calcular_cp_minimo(cp_challenge_necessario)
+    resultado = {
+        "md2_necessaria": md2_necessaria,
+        "cp_challenge_necessario": cp_challenge_necessario,
+        "gs_necessario": gs_necessario,
+        "cp_minimo": cp_minimo,
+    }
+
+    presentes = [c for c in CP_COLUMNS if c in df.columns]
+    if len(presentes) >= 2:
+        cps = np.column_stack([coluna(c) for c in presentes])
+        # Em branco vira -inf para ficar no fim da ordenação decrescente das duas maiores
+        cps = np.where(np.isnan(cps), -np.inf, cps)
+        duas_maiores = -np.partition(-cps, 1, axis=1)[:, :2]
+        media = duas_maiores.mean(axis=1)
+        media[~np.isfinite(media)] = np.nan
+        resultado["cp_duas_maiores"] = media
+        resultado["cp_atingido"] = media >= cp_minimo
+
+    return pd.DataFrame(resultado, index=df.index)
+
+
+def _read_chunks(path: str, chunk_size: int) -> Iterator:
+    """Blocos de ``chunk_size`` linhas de um CSV (também .gz) ou Parquet, como DataFrames."""
+    from export import guess_format
+
+    if guess_format(path) == "parquet":
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Ler Parquet requer o pacote pyarrow") from None
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        import pandas as pd
+        # Tudo como texto: o tipo inferido em cada bloco mudaria de um bloco para outro
+        # (ids "1, 2, Ana", observações vazias no início); as notas viram float64 depois
+        yield from pd.read_csv(path, chunksize=chunk_size, dtype="string")
+
+
+class _ChunkWriter:
+    """Grava DataFrames em sequência num único CSV (gzip pela extensão) ou Parquet.
+
+    Com pyarrow instalado, o CSV também sai pelo escritor do Arrow, que formata
+    números muito mais rápido que ``DataFrame.to_csv``.
+    """
+
+    def __init__(self, path: str):
+        from export import guess_format, parquet_available
+
+        self._path = path
+        self._fmt = guess_format(path)
+        self._arrow = parquet_available()
+        if self._fmt == "parquet" and not self._arrow:
+            raise ImportError("Gravar Parquet requer o pacote pyarrow")
+        self._file = None
+        self._writer = None
+        self._schema = None
+        if self._fmt != "parquet":
+            # gzip nível 1: a compressão no nível padrão (9) levaria mais tempo que o cálculo
+            self._file = gzip.open(path, "wb", compresslevel=1) if self._fmt == "csv.gz" else open(path, "wb")
+
+    def write(self, df):
+        if not self._arrow:
+            text = io.TextIOWrapper(self._file, encoding="utf-8", newline="")
+            df.to_csv(text, header=self._schema is None, index=False)
+            text.detach()  # o arquivo continua aberto para o próximo bloco
+            self._schema = list(df.columns)
+            return
+        import pyarrow
+
+        table = pyarrow.Table.from_pandas(df, preserve_index=False)
+        if self._writer is None:
+            self._schema = table.schema
+            if self._fmt == "parquet":
+                import pyarrow.parquet as pq
+                self._writer = pq.ParquetWriter(self._path, self._schema)
+            else:
+                import pyarrow.csv as pcsv
+                self._writer = pcsv.CSVWriter(self._file, self._schema)
+        # Um row group por bloco; os blocos seguintes são convertidos aos tipos do primeiro
+        self._writer.write_table(table.cast(self._schema))
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+        if self._file is not None:
+            self._file.close()
+
+
+def processar_arquivo(entrada: str, saida: str, meta_anual=META_PADRAO, meta_semestre=META_PADRAO,
+                      chunk_size: int = DEFAULT_CHUNK_SIZE, manter_colunas: bool = True) -> int:
+    """Lê a turma de ``entrada`` em blocos, calcula as notas e grava em ``saida``; retorna as linhas gravadas.
+
+    A memória fica limitada a um bloco, qualquer que seja o tamanho do arquivo.
+    Com ``manter_colunas``, as colunas de entrada são repetidas na saída antes das calculadas.
+    """
+    import pandas as pd
+
+    writer = _ChunkWriter(saida)
+    total = 0
+    try:
+        for bloco in _read_chunks(entrada, chunk_size):
+            # O esquema do arquivo de saída não pode depender do primeiro bloco: notas sempre
+            # em float64 e as demais colunas de texto sempre como string (mesmo vazias)
+            bloco = bloco.assign(**{c: pd.to_numeric(bloco[c], errors="coerce").astype("float64")
+                                    for c in NUMERIC_COLUMNS if c in bloco.columns})
+            texto = [c for c in bloco.columns if c not in NUMERIC_COLUMNS and bloco[c].dtype == object]
+            bloco = bloco.astype({c: "string" for c in texto})
+            notas = calcular_lote(bloco, meta_anual, meta_semestre)
+            writer.write(pd.concat([bloco, notas], axis=1) if manter_colunas else notas)
+            total += len(bloco)
+    finally:
+        writer.close()
+    return total
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Notas necessárias no 2º semestre para a média anual.")
+    parser.add_argument("-i", "--input", help="CSV ou Parquet da turma (colunas md1, challenge, cp1..cp3)")
+    parser.add_argument("-o", "--output", help="arquivo de saída; o formato vem da extensão")
+    parser.add_argument("--md1", type=float, help="média do 1º semestre de um aluno")
+    parser.add_argument("--challenge", type=float, help="nota da Challenge de um aluno")
+    parser.add_argument("--meta-anual", type=float, default=META_PADRAO)
+    parser.add_argument("--meta-semestre", type=float, default=META_PADRAO)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--somente-resultados", action="store_true", help="não repete as colunas de entrada")
+    args = parser.parse_args(argv)
 
-# Exemplo de nota da Challenge (Challenge)
-challenge = 60  # Nota da Challenge
+    if args.input:
+        if not args.output:
+            parser.error("--output é obrigatório com --input")
+        total = processar_arquivo(args.input, args.output, args.meta_anual, args.meta_semestre,
+                                  args.chunk_size, not args.somente_resultados)
+        print(f"{total} alunos gravados em {args.output}", file=sys.stderr)
+        return 0
 
-# Calcular as notas mínimas necessárias para CPs e GS
-cp_challenge_necessario, gs_necessario = calcular_necessario_cp_gs(md2_necessaria, challenge)
+    if args.md1 is None or args.challenge is None:
+        parser.error("informe --input ou --md1 e --challenge")
+    md2_necessaria = calcular_media_necessaria(args.md1, args.meta_anual)
+    cp_challenge_necessario, gs_necessario = calcular_necessario_cp_gs(md2_necessaria, args.challenge,
+                                                                       args.meta_semestre)
+    cp_minimo = calcular_cp_minimo(cp_challenge_necessario)
 
-# Calcular o mínimo necessário para CP1, CP2, e CP3
-cp_minimo = calcular_cp_minimo(cp_challenge_necessario)
+    print(f"\n🎯 Para alcançar uma média anual de {args.meta_anual:g}%, você precisa de:")
+    print(f"1. Média necessária no 2º semestre: {md2_necessaria:.2f}")
+    print(f"2. Para os CPs e Challenge, a soma das duas maiores notas deve ser: {cp_challenge_necessario:.2f}")
+    print(f"3. Se dividir igualmente entre CP1 e CP2, cada um deve ter pelo menos: {cp_minimo:.2f}")
+    print(f"4. Nota mínima na Global Solution (GS): {gs_necessario:.2f}")
+    return 0
 
-# Exibir os resultados
-print(f"\n🎯 Para alcançar uma média anual de 70%, você precisa de:")
 
-print(f"1. Média necessária no 2º semestre: {md2_necessaria:.2f}")
-print(f"2. Para os CPs e Challenge, a soma das duas maiores notas deve ser: {cp_challenge_necessario:.2f}")
-print(f"3. Se dividir igualmente entre CP1 e CP2, cada um deve ter pelo menos: {cp_minimo:.2f}")
-print(f"4. Nota mínima na Global Solution (GS): {gs_necessario:.2f}")
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,437 @@
+"""Busca textual offline sobre um retrato local do catálogo.
+
+O retrato (SQLite) é preenchido por varreduras paginadas com as funções de
+endpoint existentes: cada par fabricante/placa é percorrido com
+``iter_product_records`` e os produtos são gravados junto com as consultas
+(fabricante, placa) em que apareceram. Sobre o retrato, ``SearchIndex`` monta em memória um índice
+invertido de nome, marca, código, família/subfamília e informações
+complementares, com:
+
+- tokens sem acento e sem diferença de maiúsculas, plural reduzido ao
+  singular ("pastilhas" acha "PASTILHA") e códigos também indexados sem
+  espaços ou pontuação;
+- ranking BM25, com pesos por campo (o código pesa mais que a descrição);
+- prefixo no último termo (busca enquanto digita) e tolerância a um erro de
+  digitação por termo (troca, falta, sobra ou inversão de uma letra);
+- filtros por marca, família, subfamília e pela consulta de origem
+  (fabricante e/ou placa), usados pelo app quando a API não responde.
+
+Uso:
+    python -m catalog_search varrer -i consultas.txt   # linhas "fabricante,placa"
+    python -m catalog_search buscar "pastilha freio" --marca BOSCH
+"""
+import argparse
+import heapq
+import json
+import math
+import re
+import sqlite3
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+from autocomplete import normalize
+from config import CATALOG_SNAPSHOT_PATH
+from crossref import normalize_code, part_key
+from products import Product, iter_parsed
+
+# Peso de cada campo na frequência do termo (BM25F simplificado)
+FIELD_WEIGHTS = (
+    ("codigoReferencia", 3.0),
+    ("marca", 2.0),
+    ("nomeProduto", 1.5),
+    ("familia", 1.0),
+    ("subFamilia", 1.0),
+    ("informacoesComplementares", 0.5),
+)
+FILTER_FIELDS = ("marca", "familia", "subFamilia")
+Consulta = Tuple[str, str]  # (fabricante, placa), normalizados
+K1 = 1.2
+B = 0.75
+PREFIX_FACTOR = 0.8  # termo que só casa pelo prefixo vale um pouco menos que o exato
+TYPO_FACTOR = 0.6
+MAX_EXPANSIONS = 30  # termos do vocabulário considerados por prefixo ou erro de digitação
+MIN_TYPO_LENGTH = 4
+
+_TOKEN = re.compile(r"[0-9a-z]+")
+_STOPWORDS = frozenset("a o e de da do das dos para com sem em no na nos nas p c".split())
+_PLURALS = (("oes", "ao"), ("aes", "ao"), ("ais", "al"), ("eis", "el"), ("ois", "ol"),
+            ("res", "r"), ("zes", "z"), ("ns", "m"), ("s", ""))
+
+
+def _singular(token: str) -> str:
+    if len(token) <= 3 or not token.isalpha():
+        return token
+    for suffix, replacement in _PLURALS:
+        if token.endswith(suffix):
+            return token[:-len(suffix)] + replacement
+    return token
+
+
+def tokenize(text) -> List[str]:
+    """Tokens de busca: sem acentos, minúsculos, no singular e sem palavras vazias."""
+    return [_singular(t) for t in _TOKEN.findall(normalize(text or "")) if t not in _STOPWORDS]
+
+
+def _code_tokens(codigo) -> List[str]:
+    """Código quebrado nas partes e também inteiro, sem separadores ("0 986-494" -> 0, 986, 494, 0986494)."""
+    tokens = _TOKEN.findall(normalize(codigo or ""))
+    joined = normalize_code(codigo).lower()
+    if joined and joined not in tokens:
+        tokens.append(joined)
+    return tokens
+
+
+def _within_one_edit(a: str, b: str) -> bool:
+    """Distância de edição (com inversão de vizinhas) no máximo 1."""
+    if a == b:
+        return True
+    la, lb = len(a), len(b)
+    if abs(la - lb) > 1:
+        return False
+    i = 0
+    while i < min(la, lb) and a[i] == b[i]:
+        i += 1
+    if la == lb:
+        return a[i + 1:] == b[i + 1:] or (a[i + 1:i + 2] == b[i:i + 1] and a[i:i + 1] == b[i + 1:i + 2]
+                                          and a[i + 2:] == b[i + 2:])
+    if la > lb:
+        return a[i + 1:] == b[i:]
+    return a[i:] == b[i + 1:]
+
+
+def _deletes(term: str) -> Set[str]:
+    return {term[:i] + term[i + 1:] for i in range(len(term))}
+
+
+class Hit(NamedTuple):
+    product: Product
+    score: float
+
+
+def _consulta(fabricante, placa) -> Consulta:
+    return normalize(fabricante or "").strip(), normalize(placa or "").strip()
+
+
+# --- Retrato do catálogo ----------------------------------------------------------
+
+def _product_key(produto: Product) -> str:
+    key = part_key(produto.marca, produto.codigoReferencia)
+    return "\t".join(key) if key else f"id:{produto.id}"
+
+
+def _dump(produto: Product) -> str:
+    return json.dumps({f: getattr(produto, f) for f in Product.__slots__}, ensure_ascii=False)
+
+
+def _load(dados: str) -> Product:
+    fields = json.loads(dados)
+    fields["similares"] = tuple(tuple(s) for s in fields.get("similares") or ())
+    return Product(**fields)
+
+
+class CatalogSnapshot:
+    """Produtos já vistos, um por marca + código, com as consultas em que apareceram."""
+
+    def __init__(self, path: str = CATALOG_SNAPSHOT_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS produtos ("
+                " chave TEXT PRIMARY KEY, dados TEXT NOT NULL, consultas TEXT NOT NULL, atualizado REAL NOT NULL)"
+            )
+
+    def add(self, records: Iterable, fabricante: Optional[str] = None, placa: Optional[str] = None) -> int:
+        """Grava (ou atualiza) produtos de uma consulta, somada às consultas já conhecidas de cada um."""
+        rows = {}
+        for produto in iter_parsed(records):
+            rows[_product_key(produto)] = produto
+        if not rows:
+            return 0
+        consulta = list(_consulta(fabricante, placa)) if fabricante or placa else None
+        now = time.time()
+        with self._lock, self._conn:
+            known = {}
+            keys = list(rows)
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                marks = ",".join("?" * len(chunk))
+                known.update(self._conn.execute(
+                    f"SELECT chave, consultas FROM produtos WHERE chave IN ({marks})", chunk))
+            batch = []
+            for key, produto in rows.items():
+                consultas = json.loads(known.get(key, "[]"))
+                if consulta and consulta not in consultas:
+                    consultas.append(consulta)
+                batch.append((key, _dump(produto), json.dumps(consultas), now))
+            self._conn.executemany("INSERT OR REPLACE INTO produtos VALUES (?, ?, ?, ?)", batch)
+        return len(batch)
+
+    def __iter__(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT dados, consultas FROM produtos ORDER BY rowid").fetchall()
+        for dados, consultas in rows:
+            yield _load(dados), [tuple(c) for c in json.loads(consultas)]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM produtos").fetchone()[0]
+
+    def close(self):
+        self._conn.close()
+
+
+def crawl(queries: Iterable[Tuple[str, str]], snapshot: CatalogSnapshot, itens: int = 100,
+          concurrency: int = 4, progress=None) -> int:
+    """Percorre todas as páginas de cada (fabricante, placa) e grava no retrato; retorna os produtos gravados."""
+    from endpoints.pagination import iter_product_records
+
+    total = 0
+    for fabricante, placa in queries:
+        produtos = list(iter_product_records(fabricante, placa, itens=itens, concurrency=concurrency))
+        total += snapshot.add(produtos, fabricante, placa)
+        if progress is not None:
+            print(f"{fabricante} / {placa}: {len(produtos)} produtos", file=progress, flush=True)
+    return total
+
+
+# --- Índice invertido -------------------------------------------------------------
+
+class SearchIndex:
+    """Índice invertido em memória com ranking BM25, prefixo, erro de digitação e filtros."""
+
+    def __init__(self, entries: Iterable[Tuple[Product, Sequence[Consulta]]] = ()):
+        self.products: List[Product] = []
+        self._lengths: List[float] = []
+        self._postings: Dict[str, Dict[int, float]] = defaultdict(dict)
+        self._filters: Dict[str, Dict[str, Set[int]]] = {f: defaultdict(set) for f in FILTER_FIELDS}
+        self._consultas: Dict[Consulta, Set[int]] = defaultdict(set)
+        for produto, consultas in entries:
+            self._add(produto, consultas)
+        self._finish()
+
+    @classmethod
+    def from_snapshot(cls, snapshot: CatalogSnapshot) -> "SearchIndex":
+        return cls(snapshot)
+
+    @classmethod
+    def from_products(cls, records: Iterable, fabricante: Optional[str] = None,
+                      placa: Optional[str] = None) -> "SearchIndex":
+        consultas = [_consulta(fabricante, placa)] if fabricante or placa else []
+        return cls((produto, consultas) for produto in iter_parsed(records))
+
+    def _add(self, produto: Product, consultas: Sequence[Consulta]):
+        doc = len(self.products)
+        self.products.append(produto)
+        length = 0.0
+        for field, weight in FIELD_WEIGHTS:
+            value = getattr(produto, field)
+            tokens = _code_tokens(value) if field == "codigoReferencia" else tokenize(value)
+            for token in tokens:
+                postings = self._postings[token]
+                postings[doc] = postings.get(doc, 0.0) + weight
+            length += weight * len(tokens)
+        self._lengths.append(length)
+        for field in FILTER_FIELDS:
+            self._filters[field][normalize(getattr(produto, field) or "")].add(doc)
+        for fabricante, placa in consultas:
+            for key in ((fabricante, placa), (fabricante, ""), ("", placa)):
+                self._consultas[key].add(doc)
+
+    def _finish(self):
+        self._postings = dict(self._postings)
+        self._vocabulary = sorted(self._postings)
+        self._avg_length = (sum(self._lengths) / len(self._lengths)) if self._lengths else 0.0
+        n = len(self.products)
+        self._idf = {t: math.log(1 + (n - len(p) + 0.5) / (len(p) + 0.5)) for t, p in self._postings.items()}
+        self._typos: Optional[Dict[str, List[str]]] = None
+        self._typo_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.products)
+
+    # --- Expansão dos termos da consulta ----------------------------------------
+
+    def _prefixed(self, prefix: str) -> List[str]:
+        start = bisect_left(self._vocabulary, prefix)
+        matches = []
+        for term in self._vocabulary[start:]:
+            if not term.startswith(prefix):
+                break
+            matches.append(term)
+        # Entre muitos candidatos, os mais frequentes
+        if len(matches) > MAX_EXPANSIONS:
+            matches = sorted(matches, key=lambda t: -len(self._postings[t]))[:MAX_EXPANSIONS]
+        return matches
+
+    def _typo_table(self) -> Dict[str, List[str]]:
+        # Tabela de deleções (SymSpell, distância 1), montada só na primeira busca com erro
+        with self._typo_lock:
+            if self._typos is None:
+                table = defaultdict(list)
+                for term in self._vocabulary:
+                    if len(term) >= MIN_TYPO_LENGTH and term.isalpha():
+                        table[term].append(term)
+                        for variant in _deletes(term):
+                            table[variant].append(term)
+                self._typos = dict(table)
+            return self._typos
+
+    def _misspelled(self, token: str) -> List[str]:
+        if len(token) < MIN_TYPO_LENGTH or not token.isalpha():
+            return []
+        table = self._typo_table()
+        candidates = set(table.get(token, ()))
+        for variant in _deletes(token):
+            candidates.update(table.get(variant, ()))
+        matches = [t for t in candidates if t != token and _within_one_edit(token, t)]
+        return sorted(matches, key=lambda t: -len(self._postings[t]))[:MAX_EXPANSIONS]
+
+    def _expand(self, token: str, last: bool) -> List[Tuple[str, float]]:
+        expansions = [(token, 1.0)] if token in self._postings else []
+        if last or not expansions:
+            expansions += [(t, PREFIX_FACTOR) for t in self._prefixed(token) if t != token]
+        if not expansions:
+            expansions = [(t, TYPO_FACTOR) for t in self._misspelled(token)]
+        return expansions
+
+    # --- Consulta -----------------------------------------------------------------
+
+    def _allowed(self, filters: Dict[str, Optional[str]], fabricante, placa) -> Optional[Set[int]]:
+        allowed = self._consultas.get(_consulta(fabricante, placa), set()) if fabricante or placa else None
+        for field, value in filters.items():
+            if not value:
+                continue
+            if field not in self._filters:
+                raise ValueError(f"Filtro desconhecido: {field}")
+            docs = self._filters[field].get(normalize(value), set())
+            allowed = docs if allowed is None else allowed & docs
+        return allowed
+
+    def _term_scores(self, expansions: List[Tuple[str, float]], allowed: Optional[Set[int]]) -> Dict[int, float]:
+        scores: Dict[int, float] = {}
+        for term, factor in expansions:
+            idf = self._idf[term] * factor
+            for doc, tf in self._postings[term].items():
+                if allowed is not None and doc not in allowed:
+                    continue
+                norm = tf + K1 * (1 - B + B * self._lengths[doc] / self._avg_length)
+                score = idf * tf * (K1 + 1) / norm
+                if score > scores.get(doc, 0.0):
+                    scores[doc] = score
+        return scores
+
+    def _all_terms(self, tokens: List[str], allowed: Optional[Set[int]]) -> Dict[int, float]:
+        total: Dict[int, float] = {}
+        for i, token in enumerate(tokens):
+            scores = self._term_scores(self._expand(token, last=i == len(tokens) - 1), allowed)
+            # Todos os termos precisam casar: só os documentos presentes nas duas listas seguem
+            total = scores if i == 0 else {doc: s + scores[doc] for doc, s in total.items() if doc in scores}
+            if not total:
+                break
+        return total
+
+    def search(self, query: str = "", limit: Optional[int] = 50, marca: Optional[str] = None,
+               familia: Optional[str] = None, subFamilia: Optional[str] = None,
+               fabricante: Optional[str] = None, placa: Optional[str] = None) -> List[Hit]:
+        """Produtos que contêm todos os termos de ``query`` (ou algo próximo), do mais relevante ao menos.
+
+        ``fabricante`` e ``placa`` restringem aos produtos vistos nessa consulta à API.
+        Sem termos, devolve todos os produtos que passam nos filtros, na ordem do retrato.
+        """
+        allowed = self._allowed({"marca": marca, "familia": familia, "subFamilia": subFamilia}, fabricante, placa)
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            docs = range(len(self.products)) if allowed is None else sorted(allowed)
+            docs = list(docs)[:limit] if limit is not None else docs
+            return [Hit(self.products[d], 0.0) for d in docs]
+
+        total = self._all_terms(tokens, allowed)
+        joined = normalize_code(query).lower()
+        if len(tokens) > 1 and joined not in tokens:
+            # "GP-32960" também vale como o código inteiro, sem separadores, como foi indexado
+            for doc, s in self._term_scores(self._expand(joined, last=True), allowed).items():
+                if s > total.get(doc, 0.0):
+                    total[doc] = s
+        if not total:
+            return []
+        order = lambda item: (-item[1], item[0])
+        ranked = sorted(total.items(), key=order) if limit is None else heapq.nsmallest(limit, total.items(), key=order)
+        return [Hit(self.products[d], s) for d, s in ranked]
+
+    def facets(self, field: str) -> List[str]:
+        """Valores distintos de um campo de filtro (marca, familia, subFamilia), para os seletores."""
+        values = {getattr(self.products[next(iter(docs))], field) for docs in self._filters[field].values() if docs}
+        return sorted(v for v in values if v)
+
+
+_index: Optional[SearchIndex] = None
+_index_lock = threading.Lock()
+
+
+def load_index(path: str = CATALOG_SNAPSHOT_PATH, reload: bool = False) -> SearchIndex:
+    """Índice do retrato em ``path``, montado uma vez por processo (ou de novo com ``reload``)."""
+    global _index
+    with _index_lock:
+        if _index is None or reload:
+            snapshot = CatalogSnapshot(path)
+            try:
+                _index = SearchIndex.from_snapshot(snapshot)
+            finally:
+                snapshot.close()
+        return _index
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Retrato local do catálogo e busca textual offline.")
+    parser.add_argument("--db", default=CATALOG_SNAPSHOT_PATH, help="arquivo SQLite do retrato")
+    sub = parser.add_subparsers(dest="comando", required=True)
+    varrer = sub.add_parser("varrer", help="percorre consultas fabricante,placa e grava os produtos")
+    varrer.add_argument("-i", "--input", default="-", help="arquivo com uma consulta por linha (- para stdin)")
+    varrer.add_argument("--itens", type=int, default=100)
+    varrer.add_argument("--concurrency", type=int, default=4)
+    buscar = sub.add_parser("buscar", help="busca no retrato, sem rede")
+    buscar.add_argument("texto", nargs="?", default="")
+    buscar.add_argument("--marca")
+    buscar.add_argument("--familia")
+    buscar.add_argument("--subfamilia")
+    buscar.add_argument("--fabricante", help="só produtos vistos em consultas deste fabricante")
+    buscar.add_argument("--placa", help="só produtos vistos em consultas desta placa")
+    buscar.add_argument("--limite", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    if args.comando == "varrer":
+        from bulk import read_queries
+        lines = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+        snapshot = CatalogSnapshot(args.db)
+        try:
+            queries = [query.args for query in read_queries("produtos", lines)]
+            total = crawl(queries, snapshot, args.itens, args.concurrency, progress=sys.stderr)
+            print(f"{total} produtos gravados; {len(snapshot)} no retrato", file=sys.stderr)
+        finally:
+            snapshot.close()
+            if lines is not sys.stdin:
+                lines.close()
+        return 0
+
+    start = time.perf_counter()
+    index = load_index(args.db)
+    loaded = time.perf_counter()
+    hits = index.search(args.texto, args.limite, marca=args.marca, familia=args.familia,
+                        subFamilia=args.subfamilia, fabricante=args.fabricante, placa=args.placa)
+    done = time.perf_counter()
+    for hit in hits:
+        p = hit.product
+        print(f"{hit.score:6.2f}  {p.marca:<12} {p.codigoReferencia:<14} {p.nomeProduto}")
+    print(f"{len(hits)} resultados em {(done - loaded) * 1000:.1f} ms "
+          f"(índice de {len(index)} produtos carregado em {(loaded - start) * 1000:.0f} ms)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
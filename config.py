@@ -7,3 +7,55 @@ CLIENT_ID = os.getenv("CLIENT_ID")
 CLIENT_SECRET = os.getenv("CLIENT_SECRET")
 AUTH_URL = os.getenv("AUTH_URL")
 BASE_URL = os.getenv("BASE_URL")
+
+# Cliente HTTP compartilhado (api/client.py)
+HTTP_POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", "4"))  # hosts distintos mantidos no pool
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "16"))  # conexões simultâneas por host
+HTTP_POOL_BLOCK = os.getenv("HTTP_POOL_BLOCK", "false").lower() == "true"  # aguarda conexão livre em vez de abrir extra
+HTTP_KEEP_ALIVE = os.getenv("HTTP_KEEP_ALIVE", "true").lower() == "true"
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "30"))
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "3"))
+HTTP_BACKOFF_FACTOR = float(os.getenv("HTTP_BACKOFF_FACTOR", "0.5"))
+
+# Cache de respostas do catálogo (endpoints/cache.py)
+CACHE_ENABLED = os.getenv("CACHE_ENABLED", "true").lower() == "true"
+CACHE_TTL_PRODUCTS = float(os.getenv("CACHE_TTL_PRODUCTS", "300"))  # consultas por placa: minutos
+CACHE_TTL_SUMMARY = float(os.getenv("CACHE_TTL_SUMMARY", "300"))
+CACHE_TTL_MANUFACTURERS = float(os.getenv("CACHE_TTL_MANUFACTURERS", "21600"))  # montadoras: horas
+CACHE_STALE_TTL = float(os.getenv("CACHE_STALE_TTL", "600"))  # janela em que a resposta vencida ainda é servida
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "2048"))
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+CACHE_DB_PATH = os.getenv("CACHE_DB_PATH")  # arquivo SQLite opcional que sobrevive a reinícios
+
+# Índice de autocomplete pré-construído (autocomplete_index.py)
+AUTOCOMPLETE_INDEX_PATH = os.getenv("AUTOCOMPLETE_INDEX_PATH", "autocomplete.idx")
+
+# Geocodificação (geocoding.py)
+GEOCODER_BACKEND = os.getenv("GEOCODER_BACKEND", "nominatim")  # "nominatim", "cep" ou "cep+nominatim"
+GEOCODER_USER_AGENT = os.getenv("GEOCODER_USER_AGENT", "ancora_route_planner")
+GEOCODER_MIN_DELAY = float(os.getenv("GEOCODER_MIN_DELAY", "1.0"))  # política do Nominatim: 1 req/s
+GEOCODE_CACHE_PATH = os.getenv("GEOCODE_CACHE_PATH", "geocode_cache.sqlite")
+GEOCODE_TTL = float(os.getenv("GEOCODE_TTL", str(30 * 24 * 3600)))
+GEOCODE_NEGATIVE_TTL = float(os.getenv("GEOCODE_NEGATIVE_TTL", str(24 * 3600)))  # endereços não encontrados
+CEP_TABLE_PATH = os.getenv("CEP_TABLE_PATH")  # CSV com colunas cep, lat, lon
+
+# Cadastro de lojas (stores.py)
+STORES_SOURCE_PATH = os.getenv("STORES_SOURCE_PATH", "lojas_ancora.xlsx")
+STORES_CACHE_PATH = os.getenv("STORES_CACHE_PATH", "lojas_ancora.npz")
+STORES_DISTANCE_METHOD = os.getenv("STORES_DISTANCE_METHOD", "vincenty")
+STORES_MATRIX_MAX = int(os.getenv("STORES_MATRIX_MAX", "3000"))  # acima disso a matriz não é pré-calculada
+
+# Instrumentação (metrics.py)
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+METRICS_PROFILE_SLOW_MS = float(os.getenv("METRICS_PROFILE_SLOW_MS", "0"))  # > 0 amostra chamadas mais lentas que isso
+METRICS_PROFILE_INTERVAL_MS = float(os.getenv("METRICS_PROFILE_INTERVAL_MS", "5"))
+METRICS_PROFILE_KEEP = int(os.getenv("METRICS_PROFILE_KEEP", "20"))  # perfis de chamadas lentas guardados
+
+# Índice de peças equivalentes (crossref.py)
+CROSSREF_ENABLED = os.getenv("CROSSREF_ENABLED", "true").lower() == "true"  # alimentado por cada resposta buscada
+CROSSREF_DB_PATH = os.getenv("CROSSREF_DB_PATH", "similares.sqlite")
+
+# Retrato local do catálogo e busca offline (catalog_search.py)
+CATALOG_SNAPSHOT_PATH = os.getenv("CATALOG_SNAPSHOT_PATH", "catalogo.sqlite")
+CATALOG_FALLBACK_TIMEOUT = float(os.getenv("CATALOG_FALLBACK_TIMEOUT", "8"))  # segundos até o app usar o retrato
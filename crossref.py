@@ -0,0 +1,418 @@
+"""Índice de equivalência entre peças, montado a partir dos ``similares`` das respostas.
+
+Cada produto do catálogo traz a lista de similares (marca, código). Toda
+resposta buscada alimenta aqui uma estrutura union-find: o produto e seus
+similares passam a pertencer à mesma classe de equivalência, e classes que
+compartilham uma peça se fundem. As consultas ("peças intercambiáveis com o
+código X", "marcas que cobrem esta classe") saem da memória, sem chamar a API.
+
+A união é feita com reetiquetagem da classe menor: cada peça guarda direto o
+representante da sua classe, então achar a classe é uma consulta ao
+dicionário, e cada peça muda de classe no máximo log2(n) vezes. O índice é
+gravado em SQLite, uma linha por peça (marca, código, classe), e só as peças
+novas ou reetiquetadas são regravadas a cada lote.
+
+Vários processos podem gravar no mesmo arquivo (app, main.py, varreduras):
+os ids vêm do SQLite e cada lote é gravado numa transação exclusiva que
+antes relê as linhas alteradas pelos outros desde a última sincronização e
+as funde na memória, de modo que nenhuma união se perde.
+
+Uso:
+    python -m crossref importar resultados.jsonl   # saída do main.py (produtos ou sumario)
+    python -m crossref buscar 0986494035 [--marca BOSCH]
+    python -m crossref stats
+"""
+import argparse
+import atexit
+import itertools
+import json
+import queue
+import re
+import sqlite3
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from autocomplete import normalize
+from config import CROSSREF_DB_PATH, CROSSREF_ENABLED
+from metrics import count
+from products import iter_parsed
+
+Part = Tuple[str, str]  # (marca, código), já normalizados
+
+PENDING_MAX = 1000  # respostas aguardando gravação
+PENDING_BATCH = 50  # respostas gravadas por transação
+
+_NOT_ALNUM = re.compile(r"[^0-9A-Z]")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_code(codigo) -> str:
+    """Código sem espaços, pontos ou hífens: "0 986.494-035" vira "0986494035"."""
+    return _NOT_ALNUM.sub("", normalize(codigo or "").upper())
+
+
+def normalize_brand(marca) -> str:
+    """Marca sem acentos, em maiúsculas e com espaços simples: "Fras-le " vira "FRAS-LE"."""
+    return _SPACES.sub(" ", normalize(marca or "").upper())
+
+
+def part_key(marca, codigo) -> Optional[Part]:
+    """Chave normalizada da peça, ou None se faltar o código."""
+    codigo = normalize_code(codigo)
+    return (normalize_brand(marca), codigo) if codigo else None
+
+
+class CrossReferenceIndex:
+    """Classes de equivalência de peças, com persistência incremental opcional em SQLite."""
+
+    def __init__(self, path: Optional[str] = CROSSREF_DB_PATH):
+        self._lock = threading.Lock()
+        self._ids: Dict[Part, int] = {}
+        self._parts: List[Part] = []
+        self._root: List[int] = []  # representante da classe de cada peça
+        self._members: Dict[int, List[int]] = {}
+        self._brands: Dict[int, Counter] = {}
+        self._by_code: Dict[str, List[int]] = {}
+        self._dirty: Set[int] = set()
+        self._db_ids: List[Optional[int]] = []  # id da peça no SQLite (None enquanto não gravada)
+        self._local: Dict[int, int] = {}  # id no SQLite -> id na memória
+        self._version = 0  # última versão do arquivo já fundida na memória
+        self._conn = None
+        if path:
+            # Transações controladas à mão: BEGIN IMMEDIATE serializa os gravadores
+            self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30, isolation_level=None)
+            self._create_schema()
+            self._sync()
+
+    def _create_schema(self):
+        conn = self._conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(parts)")]
+            if columns and "versao" not in columns:
+                # Formato antigo: ids atribuídos pelo processo, sem versão
+                conn.execute("ALTER TABLE parts RENAME TO parts_antigo")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS parts ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT, marca TEXT NOT NULL, codigo TEXT NOT NULL,"
+                " classe INTEGER NOT NULL, versao INTEGER NOT NULL, UNIQUE (marca, codigo))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS parts_versao ON parts (versao)")
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (chave TEXT PRIMARY KEY, valor INTEGER NOT NULL)")
+            conn.execute("INSERT OR IGNORE INTO meta VALUES ('versao', 1)")
+            if columns and "versao" not in columns:
+                conn.execute("INSERT INTO parts SELECT id, marca, codigo, classe, 1 FROM parts_antigo")
+                conn.execute("DROP TABLE parts_antigo")
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _sync(self):
+        """Funde na memória as linhas gravadas (por qualquer processo) desde a última sincronização."""
+        conn = self._conn
+        version = conn.execute("SELECT valor FROM meta WHERE chave = 'versao'").fetchone()[0]
+        rows = conn.execute(
+            "SELECT id, marca, codigo, classe FROM parts WHERE versao > ? ORDER BY id", (self._version,)
+        ).fetchall()
+        for db_id, marca, codigo, _ in rows:
+            self._from_db(db_id, (marca, codigo))
+        for db_id, _, _, classe in rows:
+            if classe not in self._local:
+                marca, codigo = conn.execute("SELECT marca, codigo FROM parts WHERE id = ?", (classe,)).fetchone()
+                self._from_db(classe, (marca, codigo))
+            # Classe primeiro: no empate de tamanho o representante gravado continua sendo o da classe
+            self._union(self._local[classe], self._local[db_id])
+        # Linhas lidas que já batem com a memória não precisam ser regravadas
+        for db_id, _, _, classe in rows:
+            pid = self._local[db_id]
+            if self._db_ids[self._root[pid]] == classe:
+                self._dirty.discard(pid)
+            else:
+                self._dirty.add(pid)
+        self._version = version
+
+    def _from_db(self, db_id: int, part: Part):
+        pid = self._ids.get(part)
+        if pid is None:
+            pid = self._append(part, len(self._parts))
+        self._db_ids[pid] = db_id
+        self._local[db_id] = pid
+
+    def _append(self, part: Part, root: int) -> int:
+        pid = len(self._parts)
+        self._ids[part] = pid
+        self._parts.append(part)
+        self._db_ids.append(None)
+        self._root.append(root)
+        self._members.setdefault(root, []).append(pid)
+        self._brands.setdefault(root, Counter())[part[0]] += 1
+        self._by_code.setdefault(part[1], []).append(pid)
+        return pid
+
+    def _id(self, part: Part) -> int:
+        pid = self._ids.get(part)
+        if pid is None:
+            pid = self._append(part, len(self._parts))
+            self._dirty.add(pid)
+        return pid
+
+    def _union(self, a: int, b: int) -> bool:
+        ra, rb = self._root[a], self._root[b]
+        if ra == rb:
+            return False
+        if len(self._members[ra]) < len(self._members[rb]):
+            ra, rb = rb, ra
+        # A classe menor é reetiquetada e anexada à maior
+        moved = self._members.pop(rb)
+        for pid in moved:
+            self._root[pid] = ra
+        self._members[ra].extend(moved)
+        self._brands[ra].update(self._brands.pop(rb))
+        self._dirty.update(moved)
+        return True
+
+    # --- Atualização --------------------------------------------------------------
+
+    def add(self, marca, codigo, similares: Iterable[Tuple[str, str]] = ()) -> int:
+        """Registra a peça e seus similares; retorna quantas classes foram fundidas."""
+        with self._lock:
+            merged = self._add(marca, codigo, similares)
+            self._flush()
+        return merged
+
+    def _add(self, marca, codigo, similares) -> int:
+        key = part_key(marca, codigo)
+        if key is None:
+            return 0
+        pid = self._id(key)
+        merged = 0
+        for similar in similares:
+            if isinstance(similar, dict):
+                similar = (similar.get("marca"), similar.get("codigoReferencia"))
+            other = part_key(*similar)
+            if other is not None:
+                merged += self._union(pid, self._id(other))
+        return merged
+
+    def add_products(self, records: Iterable) -> int:
+        """Registra produtos (dicts da API, páginas ou ``Product``); grava no disco uma vez por lote."""
+        with self._lock:
+            merged = 0
+            for produto in iter_parsed(records):
+                merged += self._add(produto.marca, produto.codigoReferencia, produto.similares)
+            self._flush()
+        return merged
+
+    def _flush(self):
+        if self._conn is None or not self._dirty:
+            self._dirty.clear()
+            return
+        conn = self._conn
+        inserted = []
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Com o arquivo travado: primeiro o que os outros gravaram, depois o nosso lote
+            self._sync()
+            version = self._version + 1
+            for pid in sorted(self._dirty):
+                if self._db_ids[pid] is None:
+                    marca, codigo = self._parts[pid]
+                    cursor = conn.execute("INSERT INTO parts (marca, codigo, classe, versao) VALUES (?, ?, 0, ?)",
+                                          (marca, codigo, version))
+                    self._db_ids[pid] = cursor.lastrowid
+                    self._local[cursor.lastrowid] = pid
+                    inserted.append(pid)
+            conn.executemany("UPDATE parts SET classe = ?, versao = ? WHERE id = ?",
+                             [(self._db_ids[self._root[pid]], version, self._db_ids[pid]) for pid in self._dirty])
+            conn.execute("UPDATE meta SET valor = ? WHERE chave = 'versao'", (version,))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            # Os ids atribuídos nesta transação foram desfeitos junto com ela
+            for pid in inserted:
+                del self._local[self._db_ids[pid]]
+                self._db_ids[pid] = None
+            raise
+        self._version = version
+        self._dirty.clear()
+
+    def refresh(self):
+        """Funde na memória o que outros processos gravaram desde a última leitura ou gravação."""
+        with self._lock:
+            if self._conn is not None:
+                self._sync()
+
+    # --- Consultas ----------------------------------------------------------------
+
+    def _roots(self, codigo, marca=None) -> List[int]:
+        if marca is not None:
+            key = part_key(marca, codigo)
+            pid = self._ids.get(key) if key else None
+            return [] if pid is None else [self._root[pid]]
+        # Sem marca: o mesmo código pode existir em marcas diferentes (e em classes diferentes)
+        return list(dict.fromkeys(self._root[pid] for pid in self._by_code.get(normalize_code(codigo), ())))
+
+    def equivalents(self, codigo, marca=None) -> List[Part]:
+        """Peças intercambiáveis com ``codigo`` (inclusive ela mesma), ordenadas por marca e código."""
+        with self._lock:
+            return sorted(self._parts[pid] for root in self._roots(codigo, marca) for pid in self._members[root])
+
+    def brands(self, codigo, marca=None) -> Dict[str, int]:
+        """Marcas que cobrem a classe de ``codigo`` e quantas peças cada uma tem nela."""
+        with self._lock:
+            total = Counter()
+            for root in self._roots(codigo, marca):
+                total.update(self._brands[root])
+            return dict(total.most_common())
+
+    def equivalent(self, a: Tuple[str, str], b: Tuple[str, str]) -> bool:
+        """Se as peças (marca, código) ``a`` e ``b`` estão na mesma classe."""
+        with self._lock:
+            ka, kb = part_key(*a), part_key(*b)
+            ia, ib = self._ids.get(ka), self._ids.get(kb)
+            return ia is not None and ib is not None and self._root[ia] == self._root[ib]
+
+    def __contains__(self, part: Tuple[str, str]) -> bool:
+        return part_key(*part) in self._ids
+
+    def __len__(self) -> int:
+        return len(self._parts)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            sizes = [len(m) for m in self._members.values()]
+            return {"parts": len(self._parts), "classes": len(sizes), "largest_class": max(sizes, default=0)}
+
+    def close(self):
+        with self._lock:
+            self._flush()
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_crossref_index() -> CrossReferenceIndex:
+    """Índice único do processo, carregado de CROSSREF_DB_PATH na primeira chamada."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = CrossReferenceIndex()
+    return _index
+
+
+def record_products(records: Iterable):
+    """Enfileira uma resposta buscada para o índice; a gravação sai do caminho da requisição.
+
+    Uma única thread consome a fila e grava os lotes. Com a fila cheia (disco
+    lento), a resposta é descartada e contada em ``ancora_crossref_dropped_total``.
+    """
+    if not CROSSREF_ENABLED:
+        return
+    _start_writer()
+    try:
+        _pending.put_nowait(records)
+    except queue.Full:
+        count("ancora_crossref_dropped_total", help="Respostas não registradas no índice de similares (fila cheia)")
+
+
+_pending: "queue.Queue" = queue.Queue(maxsize=PENDING_MAX)
+_writer: Optional[threading.Thread] = None
+
+
+def _start_writer():
+    global _writer
+    if _writer is None:
+        with _index_lock:
+            if _writer is None:
+                _writer = threading.Thread(target=_write_pending, name="crossref-writer", daemon=True)
+                _writer.start()
+                atexit.register(flush_pending, 10.0)
+
+
+def _write_pending():
+    while True:
+        batch = [_pending.get()]
+        # O que mais tiver chegado vai no mesmo lote: uma transação para várias respostas
+        while len(batch) < PENDING_BATCH:
+            try:
+                batch.append(_pending.get_nowait())
+            except queue.Empty:
+                break
+        try:
+            get_crossref_index().add_products(itertools.chain.from_iterable(batch))
+        except Exception:
+            pass  # o índice é auxiliar: um erro de disco não pode derrubar a busca
+        finally:
+            for _ in batch:
+                _pending.task_done()
+
+
+def flush_pending(timeout: Optional[float] = None) -> bool:
+    """Espera a thread gravar as respostas enfileiradas; False se ``timeout`` acabar antes."""
+    deadline = None if timeout is None else time.monotonic() + timeout
+    with _pending.all_tasks_done:
+        while _pending.unfinished_tasks:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return False
+            _pending.all_tasks_done.wait(remaining)
+    return True
+
+
+def _result_records(result) -> Iterable:
+    """Produtos de um resultado gravado por bulk.py: uma página ou a lista de produtos de todas."""
+    if isinstance(result, dict):
+        return [result] if "count" in result else []
+    return result or []
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Índice de peças equivalentes a partir dos similares.")
+    parser.add_argument("--db", default=CROSSREF_DB_PATH, help="arquivo SQLite do índice")
+    sub = parser.add_subparsers(dest="comando", required=True)
+    importar = sub.add_parser("importar", help="funde os produtos de arquivos JSONL gerados por main.py")
+    importar.add_argument("arquivos", nargs="+")
+    buscar = sub.add_parser("buscar", help="peças equivalentes a um código")
+    buscar.add_argument("codigo")
+    buscar.add_argument("--marca")
+    sub.add_parser("stats", help="tamanho do índice")
+    args = parser.parse_args(argv)
+
+    index = CrossReferenceIndex(args.db)
+    try:
+        if args.comando == "importar":
+            merged = 0
+            for path in args.arquivos:
+                with open(path, encoding="utf-8") as f:
+                    for line in f:
+                        entry = json.loads(line)
+                        if entry.get("ok"):
+                            merged += index.add_products(_result_records(entry.get("result")))
+            print(f"{merged} classes fundidas; {index.stats()}", file=sys.stderr)
+        elif args.comando == "buscar":
+            pecas = index.equivalents(args.codigo, args.marca)
+            if not pecas:
+                print("código não encontrado no índice", file=sys.stderr)
+                return 1
+            for marca, codigo in pecas:
+                print(f"{marca}\t{codigo}")
+            print("marcas: " + ", ".join(f"{m} ({n})" for m, n in index.brands(args.codigo, args.marca).items()),
+                  file=sys.stderr)
+        else:
+            print(json.dumps(index.stats()))
+    finally:
+        index.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
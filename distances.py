@@ -0,0 +1,150 @@
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088  # raio médio (IUGG)
+
+# Elipsoide WGS-84, o mesmo usado por geopy.distance.geodesic
+WGS84_A = 6378.137
+WGS84_F = 1 / 298.257223563
+WGS84_B = WGS84_A * (1 - WGS84_F)
+
+
+def _as_coords(points) -> np.ndarray:
+    coords = np.asarray(points, dtype=np.float64)
+    if coords.ndim == 1:
+        coords = coords.reshape(1, 2)
+    return coords
+
+
+def haversine_matrix(a, b=None) -> np.ndarray:
+    """Distâncias em km entre cada ponto de ``a`` e cada ponto de ``b`` (lat, lon em graus).
+
+    Calcula a matriz inteira em uma passada vetorizada; sem ``b``, retorna a
+    matriz simétrica de ``a`` contra ``a``.
+    """
+    a = np.radians(_as_coords(a))
+    b = a if b is None else np.radians(_as_coords(b))
+    lat1, lon1 = a[:, 0:1], a[:, 1:2]
+    lat2, lon2 = b[:, 0], b[:, 1]
+    h = (np.sin((lat2 - lat1) / 2) ** 2
+         + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(h, 0.0, 1.0)))
+
+
+def vincenty_matrix(a, b=None, max_iter: int = 200, tol: float = 1e-12) -> np.ndarray:
+    """Distâncias elipsoidais (fórmula inversa de Vincenty, WGS-84), vetorizadas.
+
+    Precisão submétrica, comparável à do ``geodesic`` do geopy. Pares quase
+    antípodas, em que o método não converge, usam o valor de haversine.
+    """
+    a_deg = _as_coords(a)
+    b_deg = a_deg if b is None else _as_coords(b)
+    a_rad, b_rad = np.radians(a_deg), np.radians(b_deg)
+    f = WGS84_F
+
+    U1 = np.arctan((1 - f) * np.tan(a_rad[:, 0:1]))
+    U2 = np.arctan((1 - f) * np.tan(b_rad[:, 0]))
+    L = b_rad[:, 1] - a_rad[:, 1:2]
+    sinU1, cosU1 = np.sin(U1), np.cos(U1)
+    sinU2, cosU2 = np.sin(U2), np.cos(U2)
+
+    lam = L.copy()
+    converged = np.zeros(L.shape, dtype=bool)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        for _ in range(max_iter):
+            sin_lam, cos_lam = np.sin(lam), np.cos(lam)
+            sin_sigma = np.sqrt((cosU2 * sin_lam) ** 2 + (cosU1 * sinU2 - sinU1 * cosU2 * cos_lam) ** 2)
+            cos_sigma = sinU1 * sinU2 + cosU1 * cosU2 * cos_lam
+            sigma = np.arctan2(sin_sigma, cos_sigma)
+            sin_alpha = np.where(sin_sigma == 0, 0.0, cosU1 * cosU2 * sin_lam / sin_sigma)
+            cos2_alpha = 1 - sin_alpha ** 2
+            # Linhas sobre o equador têm cos²α = 0
+            cos_2sigma_m = np.where(cos2_alpha == 0, 0.0, cos_sigma - 2 * sinU1 * sinU2 / cos2_alpha)
+            C = f / 16 * cos2_alpha * (4 + f * (4 - 3 * cos2_alpha))
+            lam_prev = lam
+            lam = L + (1 - C) * f * sin_alpha * (
+                sigma + C * sin_sigma * (cos_2sigma_m + C * cos_sigma * (-1 + 2 * cos_2sigma_m ** 2)))
+            converged = np.abs(lam - lam_prev) < tol
+            if converged.all():
+                break
+
+        u2 = cos2_alpha * (WGS84_A ** 2 - WGS84_B ** 2) / WGS84_B ** 2
+        A = 1 + u2 / 16384 * (4096 + u2 * (-768 + u2 * (320 - 175 * u2)))
+        B = u2 / 1024 * (256 + u2 * (-128 + u2 * (74 - 47 * u2)))
+        delta_sigma = B * sin_sigma * (cos_2sigma_m + B / 4 * (
+            cos_sigma * (-1 + 2 * cos_2sigma_m ** 2)
+            - B / 6 * cos_2sigma_m * (-3 + 4 * sin_sigma ** 2) * (-3 + 4 * cos_2sigma_m ** 2)))
+        dist = WGS84_B * A * (sigma - delta_sigma)
+
+    dist = np.where(sin_sigma == 0, 0.0, dist)
+    if not converged.all() or np.isnan(dist).any():
+        fallback = haversine_matrix(a_deg, b_deg)
+        dist = np.where(converged & ~np.isnan(dist), dist, fallback)
+    return dist
+
+
+METHODS = {"haversine": haversine_matrix, "vincenty": vincenty_matrix}
+
+
+def distance_matrix(a, b=None, method: str = "haversine") -> np.ndarray:
+    """Matriz de distâncias em km; ``method`` é "haversine" ou "vincenty"."""
+    try:
+        func = METHODS[method]
+    except KeyError:
+        raise ValueError(f"Método de distância desconhecido: {method}")
+    return func(a, b)
+
+
+class StoreDistances:
+    """Distâncias entre as lojas, calculadas uma vez, mais a linha do comprador.
+
+    As lojas não mudam de lugar, então a matriz loja x loja é reaproveitada;
+    para cada endereço de comprador só é calculada uma linha nova.
+    """
+
+    def __init__(self, lojas: Dict[str, Dict], method: str = "haversine", matrix: Optional[np.ndarray] = None):
+        self.names: List[str] = list(lojas)
+        self.coords = np.array([[lojas[n]["lat"], lojas[n]["lon"]] for n in self.names], dtype=np.float64)
+        self.method = method
+        self.index = {name: i for i, name in enumerate(self.names)}
+        # Matriz pré-calculada (por exemplo, a do cache de stores.py), na ordem de ``lojas``
+        self._matrix: Optional[np.ndarray] = matrix
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """Matriz simétrica loja x loja, em km."""
+        if self._matrix is None:
+            self._matrix = distance_matrix(self.coords, method=self.method)
+        return self._matrix
+
+    def from_point(self, coords: Sequence[float]) -> np.ndarray:
+        """Distância de um ponto (lat, lon) até cada loja, na ordem de ``names``."""
+        if len(self.names) == 0:
+            return np.zeros(0)
+        return distance_matrix(coords, self.coords, method=self.method)[0]
+
+    def with_origin(self, coords: Sequence[float], origin: str = "Comprador") -> Tuple[List[str], np.ndarray]:
+        """Matriz (n+1) x (n+1) com o ponto ``coords`` na posição 0, seguido das lojas."""
+        n = len(self.names)
+        full = np.zeros((n + 1, n + 1))
+        row = self.from_point(coords)
+        full[0, 1:] = row
+        full[1:, 0] = row
+        full[1:, 1:] = self.matrix
+        return [origin] + self.names, full
+
+
+_cache: Dict[tuple, StoreDistances] = {}
+_cache_lock = threading.Lock()
+
+
+def get_store_distances(lojas: Dict[str, Dict], method: str = "haversine") -> StoreDistances:
+    """Retorna o StoreDistances do conjunto de lojas, reaproveitado entre chamadas."""
+    key = (method,) + tuple((n, lojas[n]["lat"], lojas[n]["lon"]) for n in lojas)
+    with _cache_lock:
+        distances = _cache.get(key)
+        if distances is None:
+            distances = _cache[key] = StoreDistances(lojas, method)
+    return distances
@@ -0,0 +1,93 @@
+# endpoints/batch.py
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Iterable, List, NamedTuple, Optional
+
+from api.auth import get_access_token
+from endpoints.search import search_products
+from endpoints.search_summary import search_summary
+from endpoints.manufacturers import get_manufacturers
+
+# Mantenha abaixo de HTTP_POOL_MAXSIZE para que todas as chamadas reutilizem conexões do pool
+DEFAULT_CONCURRENCY = 8
+
+
+class BatchResult(NamedTuple):
+    """Resultado de um item do lote: a entrada original e o resultado ou o erro."""
+    item: Any
+    result: Optional[Any] = None
+    error: Optional[Exception] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+# Versões assíncronas. As funções síncronas rodam em threads e compartilham o
+# mesmo token (api.auth) e o mesmo pool de conexões (api.client).
+
+async def search_products_async(fabricante="BOSCH", placa="DEM8i14", pagina=0, itens=100):
+    return await asyncio.to_thread(search_products, fabricante, placa, pagina, itens)
+
+
+async def search_summary_async(veiculo_placa, superbusca, pagina=0, itens_por_pagina=100):
+    return await asyncio.to_thread(search_summary, veiculo_placa, superbusca, pagina, itens_por_pagina)
+
+
+async def get_manufacturers_async(pagina=0, itens=100):
+    return await asyncio.to_thread(get_manufacturers, pagina, itens)
+
+
+async def _run_many(func: Callable, items: Iterable, concurrency: int) -> List[BatchResult]:
+    """Executa a função síncrona ``func`` para cada item, com no máximo
+    ``concurrency`` chamadas simultâneas em um pool de threads dedicado."""
+    items = list(items)
+    if not items:
+        return []
+    if concurrency < 1:
+        raise ValueError("concurrency deve ser maior que zero")
+
+    # Obtém o token uma vez antes de disparar o lote; sem ele, nenhum item teria como rodar
+    try:
+        await asyncio.to_thread(get_access_token)
+    except Exception as e:
+        return [BatchResult(item, error=e) for item in items]
+
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    with ThreadPoolExecutor(max_workers=min(concurrency, len(items))) as executor:
+        async def run(item):
+            async with semaphore:
+                call = partial(func, **item) if isinstance(item, dict) else partial(func, *item)
+                try:
+                    return BatchResult(item, await loop.run_in_executor(executor, call))
+                except Exception as e:
+                    return BatchResult(item, error=e)
+
+        # gather preserva a ordem de entrada
+        return await asyncio.gather(*(run(item) for item in items))
+
+
+async def search_products_many_async(items, concurrency=DEFAULT_CONCURRENCY) -> List[BatchResult]:
+    """Busca produtos para vários (fabricante, placa[, pagina, itens]) em paralelo."""
+    return await _run_many(search_products, items, concurrency)
+
+
+async def search_summary_many_async(items, concurrency=DEFAULT_CONCURRENCY) -> List[BatchResult]:
+    """Busca o sumário para vários (veiculo_placa, superbusca[, pagina, itens]) em paralelo."""
+    return await _run_many(search_summary, items, concurrency)
+
+
+def search_products_many(items, concurrency=DEFAULT_CONCURRENCY) -> List[BatchResult]:
+    """Versão síncrona de search_products_many_async.
+
+    Exemplo: ``search_products_many([("BOSCH", "DME8I14"), ("NGK", "DME8I14")], concurrency=4)``
+    """
+    return asyncio.run(search_products_many_async(items, concurrency))
+
+
+def search_summary_many(items, concurrency=DEFAULT_CONCURRENCY) -> List[BatchResult]:
+    """Versão síncrona de search_summary_many_async."""
+    return asyncio.run(search_summary_many_async(items, concurrency))
@@ -0,0 +1,218 @@
+# endpoints/cache.py
+import functools
+import inspect
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+
+from api.decoding import dumps, loads
+from config import (
+    CACHE_ENABLED, CACHE_STALE_TTL, CACHE_MAX_ENTRIES, CACHE_MAX_BYTES, CACHE_DB_PATH,
+)
+
+FRESH = "fresh"
+STALE = "stale"
+
+
+class _DiskTier:
+    """Camada opcional em SQLite para que o cache sobreviva a reinícios."""
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY, value BLOB NOT NULL,"
+                " fresh_until REAL NOT NULL, stale_until REAL NOT NULL)"
+            )
+
+    def get(self, key):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT value, fresh_until, stale_until FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+
+    def set(self, key, value, fresh_until, stale_until):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)",
+                (key, value, fresh_until, stale_until),
+            )
+
+    def delete(self, key=None):
+        with self._lock, self._conn:
+            if key is None:
+                self._conn.execute("DELETE FROM responses")
+            else:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+
+    def purge_expired(self, now):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses WHERE stale_until <= ?", (now,))
+
+
+class ResponseCache:
+    """Cache TTL + LRU de respostas, limitado por número de entradas e por bytes.
+
+    As respostas são guardadas serializadas em JSON: o tamanho é exato e cada
+    acerto devolve uma cópia nova, que o chamador pode alterar à vontade.
+    Entradas vencidas continuam disponíveis como "stale" até ``stale_until``.
+    """
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, max_bytes: int = CACHE_MAX_BYTES,
+                 db_path: Optional[str] = CACHE_DB_PATH, clock: Callable[[], float] = time.time):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (bytes, fresh_until, stale_until)
+        self._bytes = 0
+        self._disk = _DiskTier(db_path) if db_path else None
+        if self._disk is not None:
+            self._disk.purge_expired(clock())
+        self._stats = {"hits": 0, "stale_hits": 0, "misses": 0, "disk_hits": 0, "evictions": 0}
+
+    def get(self, key: str):
+        """Retorna (valor, FRESH|STALE) ou (None, None) se não houver entrada utilizável."""
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if now < entry[2]:
+                    self._entries.move_to_end(key)
+                    state = FRESH if now < entry[1] else STALE
+                    self._stats["hits" if state == FRESH else "stale_hits"] += 1
+                    return loads(entry[0]), state
+                self._remove(key)
+
+        if self._disk is not None:
+            row = self._disk.get(key)
+            if row is not None and now < row[2]:
+                with self._lock:
+                    self._store(key, bytes(row[0]), row[1], row[2])
+                    state = FRESH if now < row[1] else STALE
+                    self._stats["disk_hits"] += 1
+                    self._stats["hits" if state == FRESH else "stale_hits"] += 1
+                return loads(row[0]), state
+
+        with self._lock:
+            self._stats["misses"] += 1
+        return None, None
+
+    def set(self, key: str, value: Any, ttl: float, stale_ttl: float = 0):
+        """Guarda ``value`` como novo por ``ttl`` segundos e vencido por mais ``stale_ttl``."""
+        data = dumps(value)
+        fresh_until = self._clock() + ttl
+        stale_until = fresh_until + stale_ttl
+        with self._lock:
+            self._store(key, data, fresh_until, stale_until)
+        if self._disk is not None:
+            self._disk.set(key, data, fresh_until, stale_until)
+
+    def invalidate(self, key: Optional[str] = None):
+        """Remove uma entrada, ou todas se ``key`` for None."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+                self._bytes = 0
+            elif key in self._entries:
+                self._remove(key)
+        if self._disk is not None:
+            self._disk.delete(key)
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, entries=len(self._entries), bytes=self._bytes)
+
+    def _store(self, key, data, fresh_until, stale_until):
+        if len(data) > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (data, fresh_until, stale_until)
+        self._bytes += len(data)
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            _, (old, _, _) = self._entries.popitem(last=False)
+            self._bytes -= len(old)
+            self._stats["evictions"] += 1
+
+    def _remove(self, key):
+        data, _, _ = self._entries.pop(key)
+        self._bytes -= len(data)
+
+
+response_cache = ResponseCache()
+
+_revalidating = set()
+_revalidating_lock = threading.Lock()
+
+
+def _normalize(value):
+    """Normaliza argumentos para a chave: placas e termos não diferenciam maiúsculas."""
+    if isinstance(value, str):
+        return value.strip().upper()
+    return value
+
+
+def request_key(endpoint: str, signature: inspect.Signature, args, kwargs) -> str:
+    """Chave de uma chamada: nome do endpoint mais os argumentos normalizados."""
+    bound = signature.bind(*args, **kwargs)
+    bound.apply_defaults()
+    params = {name: _normalize(value) for name, value in bound.arguments.items()}
+    return endpoint + ":" + json.dumps(params, sort_keys=True, ensure_ascii=False)
+
+
+def cached(endpoint: str, ttl: float, stale_ttl: float = CACHE_STALE_TTL,
+           cache: Optional[ResponseCache] = None):
+    """Decorator que coloca o cache de respostas na frente de uma função de endpoint.
+
+    A chave é o nome do endpoint mais os argumentos normalizados. Respostas
+    vencidas dentro de ``stale_ttl`` são devolvidas imediatamente enquanto uma
+    nova busca é feita em segundo plano. A função original fica em ``.uncached``.
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        def make_key(args, kwargs):
+            return request_key(endpoint, signature, args, kwargs)
+
+        def revalidate(store, key, args, kwargs):
+            try:
+                store.set(key, func(*args, **kwargs), ttl, stale_ttl)
+            except Exception:
+                # Mantém a resposta vencida; a próxima chamada tenta de novo
+                pass
+            finally:
+                with _revalidating_lock:
+                    _revalidating.discard(key)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            store = cache or response_cache
+            if not CACHE_ENABLED:
+                return func(*args, **kwargs)
+            key = make_key(args, kwargs)
+            value, state = store.get(key)
+            if state == FRESH:
+                return value
+            if state == STALE:
+                with _revalidating_lock:
+                    start = key not in _revalidating
+                    _revalidating.add(key)
+                if start:
+                    threading.Thread(target=revalidate, args=(store, key, args, kwargs),
+                                     daemon=True).start()
+                return value
+            value = func(*args, **kwargs)
+            store.set(key, value, ttl, stale_ttl)
+            return value
+
+        wrapper.uncached = func
+        wrapper.cache_key = make_key
+        return wrapper
+    return decorator
@@ -1,12 +1,29 @@
-import requests
-from config import BASE_URL
+from config import BASE_URL, CACHE_TTL_MANUFACTURERS
 from api.auth import get_access_token
+from api import client
+from api.decoding import response_json
+from endpoints.cache import cached
+from endpoints.singleflight import coalesced
+from metrics import timed, timer
 
+@cached("get_manufacturers", ttl=CACHE_TTL_MANUFACTURERS)
+@coalesced("get_manufacturers")
+@timed("get_manufacturers")
 def get_manufacturers(pagina=0, itens=100):
     token = get_access_token()
     url = f"{BASE_URL}/superbusca/api/integracao/veiculo/montadoras/query"
     headers = {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
     payload = {"pagina": pagina, "itensPorPagina": itens}
-    r = requests.post(url, headers=headers, json=payload)
+    r = client.post(url, headers=headers, json=payload)
     r.raise_for_status()
-    return r.json()
+    with timer("json_decode", endpoint="get_manufacturers"):
+        return response_json(r)
+
+def manufacturer_name(montadora):
+    """Extrai o nome de um item retornado por get_manufacturers."""
+    if isinstance(montadora, str):
+        return montadora
+    for campo in ("nome", "descricao", "montadora", "nomeMontadora"):
+        if montadora.get(campo):
+            return montadora[campo]
+    return ""
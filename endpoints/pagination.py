@@ -0,0 +1,133 @@
+# endpoints/pagination.py
+import math
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterator, List, Optional
+
+from endpoints.search import search_products
+from endpoints.search_summary import search_summary
+from endpoints.manufacturers import get_manufacturers
+from products import Product, iter_parsed
+
+DEFAULT_PAGE_SIZE = 100
+DEFAULT_CONCURRENCY = 4
+
+
+def _page_count(page: Dict) -> Optional[int]:
+    """Lê o total de resultados de uma página, se a API o informar."""
+    if "count" in page:
+        return page["count"]
+    page_result = page.get("pageResult")
+    if isinstance(page_result, dict) and "count" in page_result:
+        return page_result["count"]
+    return None
+
+
+def iter_pages(fetch_page: Callable[[int, int], Dict], itens: int = DEFAULT_PAGE_SIZE,
+               concurrency: int = DEFAULT_CONCURRENCY, ordered: bool = True,
+               max_items: Optional[int] = None) -> Iterator[Dict]:
+    """Percorre todas as páginas de uma consulta.
+
+    A primeira página é buscada sozinha para ler o ``count``; as demais são
+    buscadas em paralelo, com no máximo ``concurrency`` páginas em andamento,
+    e entregues assim que chegam (ou na ordem original, se ``ordered``).
+    A memória fica limitada às páginas em andamento.
+    """
+    if concurrency < 1:
+        raise ValueError("concurrency deve ser maior que zero")
+
+    first = fetch_page(0, itens)
+    yield first
+
+    count = _page_count(first)
+    if max_items is not None:
+        count = min(count, max_items) if count is not None else max_items
+    if count is None:
+        # Sem total conhecido: segue página a página até uma página incompleta
+        pagina = 1
+        page = first
+        while len(page.get("data", [])) >= itens:
+            page = fetch_page(pagina, itens)
+            yield page
+            pagina += 1
+        return
+
+    total_pages = math.ceil(count / itens) if itens else 1
+    if total_pages <= 1:
+        return
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        pending = {}
+        next_page = 1
+
+        def submit_until_full():
+            nonlocal next_page
+            while len(pending) < concurrency and next_page < total_pages:
+                pending[next_page] = executor.submit(fetch_page, next_page, itens)
+                next_page += 1
+
+        try:
+            submit_until_full()
+            next_to_yield = 1
+            while pending:
+                if ordered:
+                    future = pending.pop(next_to_yield)
+                    next_to_yield += 1
+                    page = future.result()
+                else:
+                    done, _ = wait(pending.values(), return_when=FIRST_COMPLETED)
+                    future = done.pop()
+                    pagina = next(p for p, f in pending.items() if f is future)
+                    del pending[pagina]
+                    page = future.result()
+                submit_until_full()
+                yield page
+        finally:
+            # Consumidor interrompeu a iteração (ou houve erro): descarta o que não começou
+            for future in pending.values():
+                future.cancel()
+
+
+def _iter_items(pages: Iterator[Dict], max_items: Optional[int]) -> Iterator[Dict]:
+    produced = 0
+    for page in pages:
+        for item in page.get("data", []):
+            if max_items is not None and produced >= max_items:
+                return
+            produced += 1
+            yield item
+
+
+def iter_products(fabricante="BOSCH", placa="DEM8i14", itens=DEFAULT_PAGE_SIZE,
+                  concurrency=DEFAULT_CONCURRENCY, ordered=True, max_items=None, cached=True) -> Iterator[Dict]:
+    """Entrega todos os produtos de search_products, página a página (sem o cache, com ``cached=False``)."""
+    fetch = search_products if cached else search_products.uncached
+    pages = iter_pages(lambda pagina, n: fetch(fabricante, placa, pagina, n),
+                       itens, concurrency, ordered, max_items)
+    return _iter_items(pages, max_items)
+
+
+def iter_summary(veiculo_placa, superbusca, itens=DEFAULT_PAGE_SIZE,
+                 concurrency=DEFAULT_CONCURRENCY, ordered=True, max_items=None, cached=True) -> Iterator[Dict]:
+    """Entrega todos os produtos de search_summary, página a página (sem o cache, com ``cached=False``)."""
+    fetch = search_summary if cached else search_summary.uncached
+    pages = iter_pages(lambda pagina, n: fetch(veiculo_placa, superbusca, pagina, n),
+                       itens, concurrency, ordered, max_items)
+    return _iter_items(pages, max_items)
+
+
+def iter_manufacturers(itens=DEFAULT_PAGE_SIZE, concurrency=DEFAULT_CONCURRENCY,
+                       ordered=True, max_items=None, cached=True) -> Iterator[Dict]:
+    """Entrega todas as montadoras de get_manufacturers, página a página (sem o cache, com ``cached=False``)."""
+    pages = iter_pages(get_manufacturers if cached else get_manufacturers.uncached,
+                       itens, concurrency, ordered, max_items)
+    return _iter_items(pages, max_items)
+
+
+def iter_product_records(fabricante="BOSCH", placa="DEM8i14", **kwargs) -> Iterator[Product]:
+    """Como iter_products, mas já convertidos em ``Product``; cada página é descartada após a conversão."""
+    return iter_parsed(iter_products(fabricante, placa, **kwargs))
+
+
+def fetch_all_products(fabricante="BOSCH", placa="DEM8i14", **kwargs) -> List[Dict]:
+    """Conveniência: materializa todos os produtos em uma lista."""
+    return list(iter_products(fabricante, placa, **kwargs))
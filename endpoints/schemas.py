@@ -0,0 +1,126 @@
+# endpoints/schemas.py
+"""Decodificação das páginas de produtos direto para os campos usados.
+
+Com msgspec instalado, as respostas são decodificadas por esquemas tipados
+que ignoram, já no parser, tudo o que o app descarta. Sem ele, o corpo é
+decodificado com ``api.decoding.loads`` (orjson ou json) e os campos são
+extraídos em Python. Os dois caminhos devolvem os mesmos dicionários.
+"""
+from typing import Any, Dict, List, Optional
+
+from api.decoding import loads, msgspec
+
+VEHICLE_FIELDS = (
+    "montadora", "modelo", "versao", "chassi", "motor", "combustivel", "cambio",
+    "carroceria", "anoFabricacao", "anoModelo", "linha", "eixos", "geracao",
+)
+SUMMARY_PRODUCT_FIELDS = (
+    "id", "nomeProduto", "marca", "codigoReferencia", "informacoesComplementares", "imagemReal", "similares",
+)
+
+
+def _summary_product(produto: Dict) -> Dict:
+    return {
+        "id": produto["id"],
+        "nomeProduto": produto.get("nomeProduto", ""),
+        "marca": produto.get("marca", ""),
+        "codigoReferencia": produto.get("codigoReferencia", ""),
+        "informacoesComplementares": produto.get("informacoesComplementares", ""),
+        "imagemReal": produto.get("imagemReal", ""),
+        "similares": produto.get("similares", []),
+    }
+
+
+def products_page(response_data: Dict) -> Dict:
+    """Resultado de search_products a partir do JSON já decodificado."""
+    page_result = response_data.get("pageResult", {})
+    return {
+        "count": page_result.get("count", 0),
+        "data": [produto["data"] for produto in page_result.get("data", [])],
+    }
+
+
+def summary_page(response_data: Dict) -> Dict:
+    """Resultado de search_summary a partir do JSON já decodificado."""
+    page_result = response_data.get("pageResult", {})
+    vehicle_info = page_result.get("vehicle", {})
+    return {
+        "count": page_result.get("count", 0),
+        "vehicle": {field: vehicle_info.get(field, "") for field in VEHICLE_FIELDS},
+        "data": [_summary_product(produto) for produto in page_result.get("data", [])],
+    }
+
+
+if msgspec is not None:
+    from msgspec import Struct, field
+
+    class _Wrapped(Struct):
+        data: Any
+
+    class _ProductsPageResult(Struct):
+        count: Any = 0
+        data: List[_Wrapped] = field(default_factory=list)
+
+    class _ProductsResponse(Struct):
+        pageResult: _ProductsPageResult = field(default_factory=_ProductsPageResult)
+
+    class _Vehicle(Struct):
+        montadora: Any = ""
+        modelo: Any = ""
+        versao: Any = ""
+        chassi: Any = ""
+        motor: Any = ""
+        combustivel: Any = ""
+        cambio: Any = ""
+        carroceria: Any = ""
+        anoFabricacao: Any = ""
+        anoModelo: Any = ""
+        linha: Any = ""
+        eixos: Any = ""
+        geracao: Any = ""
+
+    class _SummaryProduct(Struct):
+        id: Any
+        nomeProduto: Any = ""
+        marca: Any = ""
+        codigoReferencia: Any = ""
+        informacoesComplementares: Any = ""
+        imagemReal: Any = ""
+        similares: Any = field(default_factory=list)
+
+    class _SummaryPageResult(Struct):
+        count: Any = 0
+        vehicle: Optional[_Vehicle] = None
+        data: List[_SummaryProduct] = field(default_factory=list)
+
+    class _SummaryResponse(Struct):
+        pageResult: _SummaryPageResult = field(default_factory=_SummaryPageResult)
+
+    _products_decoder = msgspec.json.Decoder(_ProductsResponse)
+    _summary_decoder = msgspec.json.Decoder(_SummaryResponse)
+
+    def decode_products_page(body: bytes) -> Dict:
+        """Decodifica o corpo de search_products direto para {"count", "data"}."""
+        page_result = _products_decoder.decode(body).pageResult
+        return {"count": page_result.count, "data": [produto.data for produto in page_result.data]}
+
+    def decode_summary_page(body: bytes) -> Dict:
+        """Decodifica o corpo de search_summary direto para {"count", "vehicle", "data"}."""
+        page_result = _summary_decoder.decode(body).pageResult
+        vehicle = page_result.vehicle or _Vehicle()
+        return {
+            "count": page_result.count,
+            "vehicle": {name: getattr(vehicle, name) for name in VEHICLE_FIELDS},
+            "data": [{name: getattr(produto, name) for name in SUMMARY_PRODUCT_FIELDS}
+                     for produto in page_result.data],
+        }
+
+else:
+
+    def decode_products_page(body: bytes) -> Dict:
+        """Decodifica o corpo de search_products direto para {"count", "data"}."""
+        return products_page(loads(body))
+
+    def decode_summary_page(body: bytes) -> Dict:
+        """Decodifica o corpo de search_summary direto para {"count", "vehicle", "data"}."""
+        return summary_page(loads(body))
@@ -1,9 +1,20 @@
 # endpoints/search.py
-import requests
+from typing import Dict, Iterator
+
 from api.auth import get_access_token
-from config import BASE_URL
+from api import client
+from api.decoding import iter_json_array
+from crossref import record_products
+from endpoints.cache import cached
+from endpoints.schemas import decode_products_page
+from endpoints.singleflight import coalesced
+from metrics import timed, timer
+from config import BASE_URL, CACHE_TTL_PRODUCTS
 
-def search_products(fabricante="BOSCH", placa="DEM8i14", pagina=0, itens=100):
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def _post_query(fabricante, placa, pagina, itens, **kwargs):
     token = get_access_token()  # Obtenção do token feita no backend
     url = f"{BASE_URL}/superbusca/api/integracao/catalogo/produtos/query"
     headers = {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
@@ -13,12 +24,32 @@ def search_products(fabricante="BOSCH", placa="DEM8i14", pagina=0, itens=100):
         "pagina": pagina,
         "itensPorPagina": itens
     }
-    r = requests.post(url, headers=headers, json=payload)
+    r = client.post(url, headers=headers, json=payload, **kwargs)
     r.raise_for_status()
-    response_data = r.json()  # Obtém a resposta inteira
-    # Retorna apenas os dados relevantes, como "count" e os "produtos" dentro de "pageResult"
-    page_result = response_data.get("pageResult", {})
-    return {
-        "count": page_result.get("count", 0),  # Número total de resultados
-        "data": [produto["data"] for produto in page_result.get("data", [])]  # Extraindo apenas a parte "data" dos produtos
-    }
+    return r
+
+
+@cached("search_products", ttl=CACHE_TTL_PRODUCTS)
+@coalesced("search_products")
+@timed("search_products")
+def search_products(fabricante="BOSCH", placa="DEM8i14", pagina=0, itens=100):
+    r = _post_query(fabricante, placa, pagina, itens)
+    # Decodifica direto dos bytes só o que interessa: "count" e a parte "data" de cada produto
+    with timer("json_decode", endpoint="search_products"):
+        page = decode_products_page(r.content)
+    record_products(page["data"])  # similares alimentam o índice de equivalência
+    return page
+
+
+def stream_products(fabricante="BOSCH", placa="DEM8i14", pagina=0, itens=100) -> Iterator[Dict]:
+    """Entrega os produtos de uma página enquanto a resposta ainda está chegando.
+
+    Não passa pelo cache: serve para páginas grandes, em que o primeiro
+    produto pode ser usado antes de o corpo inteiro ser baixado.
+    """
+    r = _post_query(fabricante, placa, pagina, itens, stream=True)
+    try:
+        for produto in iter_json_array(r.iter_content(STREAM_CHUNK_SIZE)):
+            yield produto["data"]
+    finally:
+        r.close()
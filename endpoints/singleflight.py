@@ -0,0 +1,89 @@
+# endpoints/singleflight.py
+import copy
+import functools
+import inspect
+import threading
+from typing import Any, Callable
+
+from endpoints.cache import request_key
+
+
+class _Call:
+    """Uma requisição em andamento e o resultado que será repassado a quem esperar."""
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Agrupa chamadas idênticas simultâneas em uma única chamada ao upstream.
+
+    A primeira chamada para uma chave executa a função; as que chegam enquanto
+    ela está em andamento esperam e recebem o mesmo resultado (ou o mesmo erro).
+    Nada é guardado depois que a chamada termina.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._stats = {"calls": 0, "coalesced": 0}
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self._stats["calls"] += 1
+            else:
+                call.waiters += 1
+                self._stats["coalesced"] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            # Cada chamador recebe sua própria cópia, como se tivesse feito a requisição
+            return copy.deepcopy(call.result)
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                shared = call.waiters > 0
+            call.done.set()
+        # Se outros receberam o resultado, o líder também fica com uma cópia própria
+        return copy.deepcopy(call.result) if shared else call.result
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats)
+
+
+single_flight = SingleFlight()
+
+
+def coalesced(endpoint: str, group: SingleFlight = None):
+    """Decorator que agrupa chamadas simultâneas com os mesmos argumentos normalizados."""
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = request_key(endpoint, signature, args, kwargs)
+            return (group or single_flight).do(key, lambda: func(*args, **kwargs))
+
+        return wrapper
+    return decorator
@@ -0,0 +1,205 @@
+"""Exportação em fluxo de consultas inteiras para CSV, CSV gzip ou Parquet.
+
+As páginas são buscadas com ``endpoints.pagination`` e cada bloco de linhas
+é achatado e gravado assim que chega; a memória fica limitada às páginas em
+andamento mais um bloco, qualquer que seja o total de linhas.
+
+Uso:
+    python -m export produtos --fabricante BOSCH --placa DEM8i14 -o produtos.csv.gz
+    python -m export montadoras -o montadoras.parquet
+"""
+import argparse
+import csv
+import gzip
+import importlib.util
+import io
+import itertools
+import json
+import sys
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from products import DISPLAY_COLUMNS, iter_parsed
+
+FORMATS = ("csv", "csv.gz", "parquet")
+DEFAULT_CHUNK_SIZE = 10000
+
+PRODUCT_COLUMNS = [label for label, _ in DISPLAY_COLUMNS] + ["Similares"]
+_PRODUCT_ATTRS = [attr for _, attr in DISPLAY_COLUMNS]
+
+
+def parquet_available() -> bool:
+    """pyarrow é opcional e só é importado ao gravar Parquet; aqui apenas se verifica se existe."""
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def guess_format(path: str) -> str:
+    """Formato pela extensão do arquivo; CSV se não for reconhecida."""
+    lower = path.lower()
+    if lower.endswith(".parquet"):
+        return "parquet"
+    if lower.endswith(".gz"):
+        return "csv.gz"
+    return "csv"
+
+
+def product_rows(records: Iterable) -> Iterator[Tuple]:
+    """Linhas de produtos (dicts da API, páginas ou ``Product``) nas colunas PRODUCT_COLUMNS."""
+    for produto in iter_parsed(records):
+        yield tuple(getattr(produto, attr) for attr in _PRODUCT_ATTRS) + (produto.similares_text(),)
+
+
+def flatten(record: Dict, prefix: str = "") -> Dict:
+    """Achata dicts aninhados em colunas "pai.filho"; listas viram texto JSON."""
+    flat = {}
+    for key, value in record.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, name + "."))
+        elif isinstance(value, list):
+            flat[name] = json.dumps(value, ensure_ascii=False)
+        else:
+            flat[name] = value
+    return flat
+
+
+def dict_rows(records: Iterable[Dict], chunk_size: int = DEFAULT_CHUNK_SIZE) -> Tuple[List[str], Iterator[Tuple]]:
+    """Colunas e linhas de registros genéricos (ex.: montadoras), achatados.
+
+    As colunas são as do primeiro bloco de ``chunk_size`` registros, na ordem
+    em que aparecem; campos que só surgirem depois são ignorados.
+    """
+    records = iter(records)
+    head = [flatten(r) for r in itertools.islice(records, chunk_size)]
+    columns = list(dict.fromkeys(key for row in head for key in row))
+
+    def rows():
+        for row in head:
+            yield tuple(row.get(c) for c in columns)
+        head.clear()
+        for record in records:
+            row = flatten(record)
+            yield tuple(row.get(c) for c in columns)
+
+    return columns, rows()
+
+
+class _CsvSink:
+    def __init__(self, destination, columns: Sequence[str], compress: bool):
+        self._owned = []
+        if isinstance(destination, str):
+            raw = open(destination, "wb")
+            self._owned.append(raw)
+        else:
+            raw = destination
+        if compress:
+            raw = gzip.GzipFile(fileobj=raw, mode="wb")
+            self._owned.insert(0, raw)
+        self._text = io.TextIOWrapper(raw, encoding="utf-8", newline="")
+        self._writer = csv.writer(self._text)
+        self._writer.writerow(columns)
+
+    def write(self, chunk: List[Tuple]):
+        self._writer.writerows(chunk)
+
+    def close(self):
+        self._text.flush()
+        self._text.detach()  # não fecha arquivos que pertencem ao chamador
+        for f in self._owned:
+            f.close()
+
+
+class _ParquetSink:
+    def __init__(self, destination, columns: Sequence[str]):
+        try:
+            import pyarrow
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Exportar em Parquet requer o pacote pyarrow") from None
+        self._pyarrow = pyarrow
+        self._columns = list(columns)
+        self._schema = pyarrow.schema([(c, pyarrow.string()) for c in self._columns])
+        self._writer = pq.ParquetWriter(destination, self._schema)
+
+    def write(self, chunk: List[Tuple]):
+        # Um row group por bloco; valores em texto para manter o esquema estável entre blocos
+        pyarrow = self._pyarrow
+        arrays = [
+            pyarrow.array([None if v is None else str(v) for v in column], type=pyarrow.string())
+            for column in zip(*chunk)
+        ]
+        self._writer.write_table(pyarrow.Table.from_arrays(arrays, schema=self._schema))
+
+    def close(self):
+        self._writer.close()
+
+
+def export_rows(rows: Iterable[Tuple], columns: Sequence[str], destination, fmt: Optional[str] = None,
+                chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """Grava ``rows`` em ``destination`` (caminho ou arquivo binário), bloco a bloco.
+
+    Retorna o número de linhas gravadas.
+    """
+    if fmt is None:
+        fmt = guess_format(destination) if isinstance(destination, str) else "csv"
+    if fmt not in FORMATS:
+        raise ValueError(f"Formato de exportação desconhecido: {fmt}")
+    sink = _ParquetSink(destination, columns) if fmt == "parquet" else _CsvSink(destination, columns, fmt == "csv.gz")
+    total = 0
+    rows = iter(rows)
+    try:
+        while True:
+            chunk = list(itertools.islice(rows, chunk_size))
+            if not chunk:
+                break
+            sink.write(chunk)
+            total += len(chunk)
+    finally:
+        sink.close()
+    return total
+
+
+def export_products(fabricante: str, placa: str, destination, fmt: Optional[str] = None,
+                    chunk_size: int = DEFAULT_CHUNK_SIZE, **pagination) -> int:
+    """Exporta todos os produtos de search_products, página a página."""
+    from endpoints.pagination import iter_products
+
+    rows = product_rows(iter_products(fabricante, placa, **pagination))
+    return export_rows(rows, PRODUCT_COLUMNS, destination, fmt, chunk_size)
+
+
+def export_manufacturers(destination, fmt: Optional[str] = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                         **pagination) -> int:
+    """Exporta todas as montadoras de get_manufacturers, página a página."""
+    from endpoints.pagination import iter_manufacturers
+
+    columns, rows = dict_rows(iter_manufacturers(**pagination), chunk_size)
+    return export_rows(rows, columns, destination, fmt, chunk_size)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Exporta consultas inteiras em CSV, CSV gzip ou Parquet.")
+    sub = parser.add_subparsers(dest="consulta", required=True)
+    produtos = sub.add_parser("produtos", help="todos os produtos de um fabricante/placa")
+    produtos.add_argument("--fabricante", default="BOSCH")
+    produtos.add_argument("--placa", default="DEM8i14")
+    sub.add_parser("montadoras", help="todas as montadoras")
+    for p in (produtos, sub.choices["montadoras"]):
+        p.add_argument("-o", "--output", required=True, help="arquivo de saída (- para a saída padrão)")
+        p.add_argument("--format", choices=FORMATS, help="padrão: pela extensão do arquivo")
+        p.add_argument("--itens", type=int, default=100, help="itens por página")
+        p.add_argument("--concurrency", type=int, default=4, help="páginas buscadas em paralelo")
+        p.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    destination = sys.stdout.buffer if args.output == "-" else args.output
+    fmt = args.format or ("csv" if args.output == "-" else None)
+    pagination = {"itens": args.itens, "concurrency": args.concurrency}
+    if args.consulta == "produtos":
+        total = export_products(args.fabricante, args.placa, destination, fmt, args.chunk_size, **pagination)
+    else:
+        total = export_manufacturers(destination, fmt, args.chunk_size, **pagination)
+    print(f"{total} linhas exportadas", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
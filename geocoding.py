@@ -0,0 +1,260 @@
+import csv
+import re
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from autocomplete import normalize
+from metrics import timed
+from config import (
+    GEOCODER_BACKEND, GEOCODER_USER_AGENT, GEOCODER_MIN_DELAY, GEOCODE_CACHE_PATH,
+    GEOCODE_TTL, GEOCODE_NEGATIVE_TTL, CEP_TABLE_PATH,
+)
+
+Coords = Tuple[float, float]
+
+_CEP = re.compile(r"\b(\d{5})-?(\d{3})\b")
+_ABBREVIATIONS = {
+    "r": "rua", "av": "avenida", "al": "alameda", "tv": "travessa", "pc": "praca",
+    "rod": "rodovia", "est": "estrada", "n": "", "no": "",
+}
+
+
+def normalize_address(endereco: str) -> str:
+    """Forma canônica de um endereço, usada como chave do cache.
+
+    Remove acentos, maiúsculas e pontuação e expande abreviações comuns, para
+    que "R. XV de Novembro, 1000" e "rua xv de novembro 1000" coincidam.
+    """
+    text = normalize(endereco)
+    text = re.sub(r"[^\w\s]", " ", text)
+    words = [_ABBREVIATIONS.get(word, word) for word in text.split()]
+    return " ".join(word for word in words if word)
+
+
+def extract_cep(endereco: str) -> Optional[str]:
+    """Retorna o CEP (8 dígitos) contido no endereço, se houver."""
+    match = _CEP.search(endereco)
+    return match.group(1) + match.group(2) if match else None
+
+
+# --- Backends -------------------------------------------------------------
+# Um backend é qualquer objeto com geocode(endereco) -> (lat, lon) ou None.
+
+class NominatimBackend:
+    """Geocodificação pelo Nominatim (OpenStreetMap), criado uma única vez."""
+
+    def __init__(self, user_agent: str = GEOCODER_USER_AGENT, timeout: float = 10):
+        from geopy.geocoders import Nominatim
+        self._geolocator = Nominatim(user_agent=user_agent, timeout=timeout)
+
+    def geocode(self, endereco: str) -> Optional[Coords]:
+        location = self._geolocator.geocode(endereco)
+        return (location.latitude, location.longitude) if location else None
+
+
+class CepTableBackend:
+    """Tabela local CEP -> coordenadas (CSV com colunas cep, lat, lon); não usa rede."""
+
+    remote = False
+
+    def __init__(self, path: str = CEP_TABLE_PATH):
+        self._table: Dict[str, Coords] = {}
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                cep = re.sub(r"\D", "", row["cep"])
+                self._table[cep] = (float(row["lat"]), float(row["lon"]))
+
+    def geocode(self, endereco: str) -> Optional[Coords]:
+        cep = extract_cep(endereco)
+        return self._table.get(cep) if cep else None
+
+
+class StaticBackend:
+    """Endereços fixos em memória, como substituto local do serviço real."""
+
+    remote = False
+
+    def __init__(self, enderecos: Dict[str, Coords]):
+        self._table = {normalize_address(k): tuple(v) for k, v in enderecos.items()}
+
+    def geocode(self, endereco: str) -> Optional[Coords]:
+        return self._table.get(normalize_address(endereco))
+
+
+class ChainBackend:
+    """Tenta cada backend em ordem e fica com o primeiro resultado."""
+
+    def __init__(self, *backends):
+        self.backends = backends
+        self.remote = any(getattr(b, "remote", True) for b in backends)
+
+    def geocode(self, endereco: str) -> Optional[Coords]:
+        for backend in self.backends:
+            coords = backend.geocode(endereco)
+            if coords is not None:
+                return coords
+        return None
+
+
+# --- Cache ------------------------------------------------------------------
+
+class GeocodeCache:
+    """Cache de coordenadas por endereço normalizado, em memória e opcionalmente em SQLite.
+
+    Endereços não encontrados também são guardados (com ``negative_ttl``) para
+    não repetir consultas que já falharam.
+    """
+
+    def __init__(self, path: Optional[str] = GEOCODE_CACHE_PATH, ttl: float = GEOCODE_TTL,
+                 negative_ttl: float = GEOCODE_NEGATIVE_TTL, clock: Callable[[], float] = time.time):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._clock = clock
+        self._memory: Dict[str, Tuple[Optional[Coords], float]] = {}
+        self._lock = threading.Lock()
+        self._conn = None
+        if path:
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            with self._conn:
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS geocode ("
+                    " endereco TEXT PRIMARY KEY, lat REAL, lon REAL, expires_at REAL NOT NULL)"
+                )
+                self._conn.execute("DELETE FROM geocode WHERE expires_at <= ?", (clock(),))
+
+    def get(self, key: str):
+        """Retorna (encontrado, coords). ``coords`` pode ser None para um endereço não encontrado."""
+        now = self._clock()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and now < entry[1]:
+                return True, entry[0]
+            if self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT lat, lon, expires_at FROM geocode WHERE endereco = ?", (key,)
+                ).fetchone()
+                if row is not None and now < row[2]:
+                    coords = (row[0], row[1]) if row[0] is not None else None
+                    self._memory[key] = (coords, row[2])
+                    return True, coords
+        return False, None
+
+    def set(self, key: str, coords: Optional[Coords]):
+        expires_at = self._clock() + (self.ttl if coords is not None else self.negative_ttl)
+        lat, lon = coords if coords is not None else (None, None)
+        with self._lock:
+            self._memory[key] = (coords, expires_at)
+            if self._conn is not None:
+                with self._conn:
+                    self._conn.execute("INSERT OR REPLACE INTO geocode VALUES (?, ?, ?, ?)",
+                                       (key, lat, lon, expires_at))
+
+
+# --- Geocodificador ------------------------------------------------------------
+
+class Geocoder:
+    """Geocodificador com cache e limite de taxa para backends remotos.
+
+    Consultas repetidas (mesmo endereço normalizado) não tocam a rede; as
+    chamadas ao backend remoto respeitam ``min_delay`` segundos entre si,
+    inclusive entre threads.
+    """
+
+    def __init__(self, backend=None, cache: Optional[GeocodeCache] = None,
+                 min_delay: float = GEOCODER_MIN_DELAY):
+        self.backend = backend if backend is not None else make_backend()
+        self.cache = cache if cache is not None else GeocodeCache()
+        self.min_delay = min_delay if getattr(self.backend, "remote", True) else 0.0
+        self._rate_lock = threading.Lock()
+        self._last_call = 0.0
+        self.stats = {"hits": 0, "misses": 0}
+
+    @timed("geocode")
+    def geocode(self, endereco: str) -> Optional[Coords]:
+        """Coordenadas (lat, lon) do endereço, ou None se não for encontrado."""
+        key = normalize_address(endereco)
+        if not key:
+            return None
+        found, coords = self.cache.get(key)
+        if found:
+            self.stats["hits"] += 1
+            return coords
+        self.stats["misses"] += 1
+        coords = self._call_backend(endereco)
+        self.cache.set(key, coords)
+        return coords
+
+    def geocode_many(self, enderecos: Iterable[str],
+                     on_progress: Optional[Callable[[int, int], None]] = None) -> List[Optional[Coords]]:
+        """Geocodifica uma lista de endereços de entrega, na ordem de entrada.
+
+        Endereços repetidos são consultados uma vez só; os já conhecidos saem
+        do cache e os demais vão ao backend respeitando o limite de taxa.
+        """
+        enderecos = list(enderecos)
+        unique = {}
+        for endereco in enderecos:
+            unique.setdefault(normalize_address(endereco), endereco)
+        resolved = {}
+        pending = []
+        for key, endereco in unique.items():
+            found, coords = self.cache.get(key) if key else (True, None)
+            if found:
+                self.stats["hits"] += 1
+                resolved[key] = coords
+            else:
+                pending.append((key, endereco))
+        for done, (key, endereco) in enumerate(pending, start=1):
+            self.stats["misses"] += 1
+            try:
+                coords = self._call_backend(endereco)
+                self.cache.set(key, coords)
+            except Exception:
+                coords = None  # falha de rede: não guarda, tenta de novo na próxima vez
+            resolved[key] = coords
+            if on_progress is not None:
+                on_progress(done, len(pending))
+        return [resolved[normalize_address(endereco)] for endereco in enderecos]
+
+    @timed("geocode_backend")
+    def _call_backend(self, endereco: str) -> Optional[Coords]:
+        with self._rate_lock:
+            wait = self._last_call + self.min_delay - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            try:
+                return self.backend.geocode(endereco)
+            finally:
+                self._last_call = time.monotonic()
+
+
+def make_backend(name: str = GEOCODER_BACKEND):
+    """Cria o backend configurado: "nominatim", "cep" ou uma cadeia como "cep+nominatim"."""
+    backends = []
+    for part in name.split("+"):
+        part = part.strip()
+        if part == "nominatim":
+            backends.append(NominatimBackend())
+        elif part == "cep":
+            if not CEP_TABLE_PATH:
+                raise ValueError("CEP_TABLE_PATH não configurado para o backend 'cep'")
+            backends.append(CepTableBackend(CEP_TABLE_PATH))
+        else:
+            raise ValueError(f"Backend de geocodificação desconhecido: {part}")
+    return backends[0] if len(backends) == 1 else ChainBackend(*backends)
+
+
+_geocoder = None
+_geocoder_lock = threading.Lock()
+
+
+def get_geocoder() -> Geocoder:
+    """Geocodificador compartilhado pelo processo."""
+    global _geocoder
+    if _geocoder is None:
+        with _geocoder_lock:
+            if _geocoder is None:
+                _geocoder = Geocoder()
+    return _geocoder
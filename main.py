@@ -1,24 +1,53 @@
-from endpoints.search import search_products
-from endpoints.manufacturers import get_manufacturers
-from endpoints.search_summary import search_summary
-import json
+"""Consultas em massa ao superbusca pela linha de comando.
 
-if __name__ == "__main__":
+Exemplos:
+    python main.py sumario -i placas.txt -o sumario.jsonl --workers 8 --rate 20
+    cat pares.csv | python main.py produtos -o produtos.jsonl --todas-paginas
+    python main.py montadoras -o montadoras.jsonl
+
+Cada linha da entrada tem os campos do comando separados por vírgula, ponto e
+vírgula ou tab: "placa,superbusca" para sumario e "fabricante,placa" para
+produtos. Interrompida, a execução pode ser repetida com os mesmos
+argumentos: consultas já concluídas não são buscadas de novo.
+"""
+import argparse
+import sys
+
+from bulk import COMMANDS, read_queries, run_bulk
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Consultas em massa ao superbusca, gravadas em JSONL.")
+    parser.add_argument("comando", choices=sorted(COMMANDS))
+    parser.add_argument("-i", "--input", default="-", help="arquivo de entrada (padrão: entrada padrão)")
+    parser.add_argument("-o", "--output", required=True, help="arquivo JSONL de saída")
+    parser.add_argument("--checkpoint", help="arquivo de checkpoint (padrão: <saída>.ckpt)")
+    parser.add_argument("--workers", type=int, default=4, help="consultas simultâneas")
+    parser.add_argument("--rate", type=float, help="máximo de consultas iniciadas por segundo")
+    parser.add_argument("--itens", type=int, default=100, help="itens por página")
+    parser.add_argument("--todas-paginas", action="store_true", help="busca todas as páginas de cada consulta")
+    args = parser.parse_args(argv)
+
+    if args.comando == "montadoras":
+        lines = []
+    elif args.input == "-":
+        lines = sys.stdin
+    else:
+        lines = open(args.input, encoding="utf-8")
     try:
+        stats = run_bulk(
+            args.comando, read_queries(args.comando, lines, skip_invalid=True), args.output, args.checkpoint,
+            workers=args.workers, rate=args.rate, all_pages=args.todas_paginas, itens=args.itens,
+        )
+    except KeyboardInterrupt:
+        print("Interrompido; execute de novo com os mesmos argumentos para continuar.", file=sys.stderr)
+        return 130
+    finally:
+        if lines is not sys.stdin and hasattr(lines, "close"):
+            lines.close()
+    print(stats.report(), file=sys.stderr)
+    return 1 if stats.errors or stats.invalid else 0
 
-        # Exemplo de chamada para obter os dados com base na placa e superbusca
-        resultado = search_summary("DME8I14", "AMORTECEDOR", pagina=0, itens_por_pagina=100)
-
-        # Exibir o resultado
-        print(resultado)
-        
-        print("Buscando produtos...")
-        resultado = search_products()
-        print(json.dumps(resultado, indent=2, ensure_ascii=False))
-
-        print("\nBuscando montadoras...")
-        montadoras = get_manufacturers()
-        print(json.dumps(montadoras, indent=2, ensure_ascii=False))
-            
-    except Exception as e:
-        print(f"Erro durante execução: {e}")
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,419 @@
+"""Instrumentação leve: contadores, histogramas de duração e amostragem de chamadas lentas.
+
+As funções do caminho quente (token, endpoints, ordenação, geocodificação,
+rotas) são decoradas com ``timed`` ou usam ``timer``; cada chamada alimenta o
+histograma ``ancora_operation_duration_seconds{op=...}`` e, se terminar com
+exceção, o contador ``ancora_operation_errors_total``. Os dados saem em
+formato texto do Prometheus (``render_prometheus``) ou como linhas para o
+painel de diagnóstico do app (``snapshot``).
+
+Com ``METRICS_ENABLED=false`` o decorator só testa uma flag antes de chamar a
+função original. Com ``METRICS_PROFILE_SLOW_MS`` maior que zero, uma thread
+amostra a pilha das chamadas em andamento e guarda o perfil das que passarem
+do limite (``slow_calls``).
+"""
+import bisect
+import functools
+import math
+import sys
+import threading
+import time
+from collections import Counter as _Tally, deque
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from config import (
+    METRICS_ENABLED, METRICS_PROFILE_SLOW_MS, METRICS_PROFILE_INTERVAL_MS, METRICS_PROFILE_KEEP,
+)
+
+# Limites em segundos: de ordenações de milissegundos a consultas lentas ao upstream
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: Sequence[Tuple[str, str]] = ()) -> str:
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    """Contador monotônico, com uma série por combinação de rótulos."""
+    kind = "counter"
+
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self._lock = threading.Lock()
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(_label_key(labels), 0)
+
+    def series(self) -> List[Tuple[LabelKey, float]]:
+        with self._lock:
+            return list(self._values.items())
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+    def render(self) -> Iterator[str]:
+        for key, value in sorted(self.series()):
+            yield f"{self.name}{_format_labels(key)} {_format_value(value)}"
+
+
+class _Series:
+    __slots__ = ("counts", "sum", "count", "max")
+
+    def __init__(self, n_buckets: int):
+        self.counts = [0] * (n_buckets + 1)  # o último é o +Inf
+        self.sum = 0.0
+        self.count = 0
+        self.max = 0.0
+
+
+class Histogram:
+    """Histograma de buckets fixos (como o do Prometheus), com uma série por combinação de rótulos."""
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._series: Dict[LabelKey, _Series] = {}
+
+    def observe(self, value: float, **labels):
+        self.observe_key(_label_key(labels), value)
+
+    def observe_key(self, key: LabelKey, value: float):
+        """``observe`` com os rótulos já normalizados por ``_label_key`` (caminho quente)."""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _Series(len(self.buckets))
+            series.counts[index] += 1
+            series.sum += value
+            series.count += 1
+            if value > series.max:
+                series.max = value
+
+    def quantile(self, q: float, **labels) -> float:
+        """Estimativa do quantil ``q`` (0–1) por interpolação linear dentro do bucket."""
+        with self._lock:
+            series = self._series.get(_label_key(labels))
+            if series is None or not series.count:
+                return 0.0
+            return self._quantile(series, q)
+
+    def _quantile(self, series: _Series, q: float) -> float:
+        rank = q * series.count
+        seen = 0
+        for i, n in enumerate(series.counts):
+            if n and seen + n >= rank:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else series.max
+                return min(lower + (upper - lower) * (rank - seen) / n, series.max)
+            seen += n
+        return series.max
+
+    def summary(self) -> List[Dict]:
+        """Uma linha por série: contagem, soma, média, p50/p95/p99 e máximo, em segundos."""
+        with self._lock:
+            return [{
+                "labels": dict(key),
+                "count": s.count,
+                "sum": s.sum,
+                "mean": s.sum / s.count if s.count else 0.0,
+                "p50": self._quantile(s, 0.50),
+                "p95": self._quantile(s, 0.95),
+                "p99": self._quantile(s, 0.99),
+                "max": s.max,
+            } for key, s in self._series.items()]
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+    def render(self) -> Iterator[str]:
+        with self._lock:
+            items = sorted((key, list(s.counts), s.sum, s.count) for key, s in self._series.items())
+        bounds = self.buckets + (math.inf,)
+        for key, counts, total, count in items:
+            cumulative = 0
+            for bound, n in zip(bounds, counts):
+                cumulative += n
+                yield f"{self.name}_bucket{_format_labels(key, [('le', _format_value(bound))])} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(key)} {_format_value(total)}"
+            yield f"{self.name}_count{_format_labels(key)} {count}"
+
+
+class Registry:
+    """Conjunto de métricas do processo; ``counter``/``histogram`` devolvem a métrica existente pelo nome."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, object] = {}
+
+    def _get_or_create(self, cls, name: str, *args):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Métrica {name} já registrada como {metric.kind}")
+            return metric
+
+    def counter(self, name: str, help: str = "") -> Counter:
+        return self._get_or_create(Counter, name, help)
+
+    def histogram(self, name: str, help: str = "", buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, help, buckets)
+
+    def metrics(self) -> List:
+        with self._lock:
+            return list(self._metrics.values())
+
+    def render_prometheus(self) -> str:
+        """Todas as métricas no formato texto de exposição do Prometheus (0.0.4)."""
+        lines = []
+        for metric in sorted(self.metrics(), key=lambda m: m.name):
+            if metric.help:
+                lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        for metric in self.metrics():
+            metric.reset()
+
+
+REGISTRY = Registry()
+DURATION = REGISTRY.histogram("ancora_operation_duration_seconds", "Duração das operações instrumentadas")
+ERRORS = REGISTRY.counter("ancora_operation_errors_total", "Operações instrumentadas que terminaram com exceção")
+
+
+# --- Amostragem de chamadas lentas ------------------------------------------------
+
+class SlowCallProfiler:
+    """Amostra periodicamente a pilha das chamadas instrumentadas em andamento.
+
+    Só a chamada mais externa de cada thread é acompanhada. Quando ela termina
+    acima de ``slow_ms``, as pilhas amostradas viram um perfil agregado
+    ("função (arquivo:linha);..." -> amostras), guardado entre as ``keep``
+    chamadas lentas mais recentes; as rápidas são descartadas.
+    """
+
+    def __init__(self, slow_ms: float, interval_ms: float = METRICS_PROFILE_INTERVAL_MS,
+                 keep: int = METRICS_PROFILE_KEEP, max_depth: int = 40):
+        self.slow = slow_ms / 1000
+        self.interval = interval_ms / 1000
+        self.max_depth = max_depth
+        self.slow_calls = deque(maxlen=keep)
+        self._lock = threading.Lock()
+        self._active: Dict[int, Tuple[str, Dict, _Tally]] = {}
+        self._thread = None
+        self._stop = threading.Event()
+
+    def enter(self, op: str, labels: Dict) -> bool:
+        """Começa a acompanhar a thread atual; False se ela já está sendo acompanhada."""
+        ident = threading.get_ident()
+        with self._lock:
+            if ident in self._active:
+                return False
+            self._active[ident] = (op, labels, _Tally())
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="metrics-profiler", daemon=True)
+                self._thread.start()
+        return True
+
+    def exit(self, elapsed: float):
+        with self._lock:
+            op, labels, stacks = self._active.pop(threading.get_ident())
+        if elapsed >= self.slow:
+            self.slow_calls.append({
+                "op": op,
+                "labels": labels,
+                "elapsed_ms": elapsed * 1000,
+                "at": time.time(),
+                "samples": sum(stacks.values()),
+                "stacks": stacks.most_common(),
+            })
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            with self._lock:
+                if not self._active:
+                    continue
+                frames = sys._current_frames()
+                for ident, (_, _, stacks) in self._active.items():
+                    frame = frames.get(ident)
+                    if frame is not None:
+                        stacks[self._collapse(frame)] += 1
+
+    def _collapse(self, frame) -> str:
+        names = []
+        while frame is not None and len(names) < self.max_depth:
+            code = frame.f_code
+            names.append(f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{frame.f_lineno})")
+            frame = frame.f_back
+        return ";".join(reversed(names))
+
+
+# --- Estado global e API de instrumentação ----------------------------------------
+
+class _State:
+    enabled = METRICS_ENABLED
+    profiler: Optional[SlowCallProfiler] = (
+        SlowCallProfiler(METRICS_PROFILE_SLOW_MS) if METRICS_ENABLED and METRICS_PROFILE_SLOW_MS > 0 else None
+    )
+
+
+def enable(enabled: bool = True):
+    _State.enabled = enabled
+
+
+def enabled() -> bool:
+    return _State.enabled
+
+
+def enable_profiler(slow_ms: Optional[float], interval_ms: float = METRICS_PROFILE_INTERVAL_MS,
+                    keep: int = METRICS_PROFILE_KEEP):
+    """Liga a amostragem de chamadas acima de ``slow_ms`` (None ou 0 desliga)."""
+    if _State.profiler is not None:
+        _State.profiler.stop()
+    _State.profiler = SlowCallProfiler(slow_ms, interval_ms, keep) if slow_ms else None
+
+
+def slow_calls() -> List[Dict]:
+    """Perfis das chamadas lentas mais recentes, da mais nova para a mais antiga."""
+    profiler = _State.profiler
+    return list(reversed(profiler.slow_calls)) if profiler is not None else []
+
+
+class _Timer:
+    __slots__ = ("op", "labels", "key", "start", "profiled")
+
+    def __init__(self, op: str, labels: Dict, key: Optional[LabelKey] = None):
+        self.op = op
+        self.labels = labels
+        self.key = key or _label_key(dict(labels, op=op))
+
+    def __enter__(self):
+        profiler = _State.profiler
+        self.profiled = profiler is not None and profiler.enter(self.op, self.labels)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.start
+        DURATION.observe_key(self.key, elapsed)
+        if exc_type is not None:
+            ERRORS.inc(op=self.op, error=exc_type.__name__, **self.labels)
+        if self.profiled:
+            _State.profiler.exit(elapsed)
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def timer(op: str, **labels):
+    """Context manager que mede o bloco como a operação ``op`` (nada faz se desligado)."""
+    if not _State.enabled:
+        return _NULL_TIMER
+    return _Timer(op, labels)
+
+
+def timed(op: Optional[str] = None, **labels) -> Callable:
+    """Decorator que mede cada chamada da função; ``op`` padrão é o nome da função."""
+    def decorator(func):
+        name = op or func.__name__
+        key = _label_key(dict(labels, op=name))
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _State.enabled:
+                return func(*args, **kwargs)
+            with _Timer(name, labels, key):
+                return func(*args, **kwargs)
+
+        return wrapper
+    return decorator
+
+
+def count(name: str, amount: float = 1, help: str = "", **labels):
+    """Incrementa o contador ``name`` (criado na primeira vez), se a instrumentação estiver ligada."""
+    if _State.enabled:
+        REGISTRY.counter(name, help).inc(amount, **labels)
+
+
+def render_prometheus() -> str:
+    return REGISTRY.render_prometheus()
+
+
+def snapshot() -> List[Dict]:
+    """Resumo das durações por operação, em milissegundos, para exibição."""
+    rows = []
+    errors = {}
+    for key, value in ERRORS.series():
+        labels = dict(key)
+        labels.pop("error")
+        errors[_label_key(labels)] = errors.get(_label_key(labels), 0) + value
+    for row in DURATION.summary():
+        labels = dict(row["labels"])
+        op = labels.pop("op")
+        rows.append({
+            "op": op,
+            "labels": ", ".join(f"{k}={v}" for k, v in sorted(labels.items())),
+            "calls": row["count"],
+            "errors": int(errors.get(_label_key(row["labels"]), 0)),
+            "total_ms": row["sum"] * 1000,
+            "mean_ms": row["mean"] * 1000,
+            "p50_ms": row["p50"] * 1000,
+            "p95_ms": row["p95"] * 1000,
+            "p99_ms": row["p99"] * 1000,
+            "max_ms": row["max"] * 1000,
+        })
+    rows.sort(key=lambda r: r["total_ms"], reverse=True)
+    return rows
+
+
+def reset():
+    REGISTRY.reset()
+    if _State.profiler is not None:
+        _State.profiler.slow_calls.clear()
@@ -0,0 +1,91 @@
+"""Grafo comprador–lojas e rota de entregas da aba "Lojas e Rotas".
+
+Ficam fora de ``app.py`` para serem definidos uma vez por processo (o
+Streamlit reexecuta o script a cada interação) e para que networkx e pandas
+só sejam importados quando a aba de lojas é aberta.
+"""
+from typing import Callable, Optional, Sequence, Tuple
+
+import networkx as nx
+import pandas as pd
+
+from metrics import timed
+from routing import solve_routes
+from stores import StoreCatalog
+
+Coords = Tuple[float, float]
+
+# Elipsoidal, com a mesma precisão do geodesic do geopy, mas calculada em matriz
+METODO_DISTANCIA = "vincenty"
+
+
+@timed("criar_grafo_lojas")
+def criar_grafo_lojas(endereco_comprador: str, catalogo: StoreCatalog,
+                      geocodificar: Callable[[str], Optional[Coords]]):
+    """Grafo com o comprador ligado a todas as lojas; (None, None) se o endereço não for encontrado."""
+    comprador_coords = geocodificar(endereco_comprador)
+    if not comprador_coords:
+        return None, None
+
+    G = nx.Graph()
+    G.add_node("Comprador", pos=comprador_coords, endereco=endereco_comprador)
+
+    # Uma passada vetorizada do comprador até todas as lojas
+    distancias = catalogo.distances(METODO_DISTANCIA).from_point(comprador_coords)
+    for nome, endereco, lat, lon, distancia in zip(catalogo.names.tolist(), catalogo.enderecos.tolist(),
+                                                   catalogo.lat.tolist(), catalogo.lon.tolist(), distancias):
+        G.add_node(nome, pos=(lat, lon), endereco=endereco)
+        G.add_edge("Comprador", nome, weight=float(distancia))
+
+    return G, comprador_coords
+
+
+@timed("calcular_rota_otimizada")
+def calcular_rota_otimizada(grafo, catalogo: StoreCatalog, ponto_partida: str, pontos_entrega: Sequence[str],
+                            retornar: bool = False, veiculos: int = 1):
+    """Rota (ou rotas, com mais de um veículo) pelos pontos de entrega.
+
+    Retorna (DataFrame com os trechos, distância total em km) ou (None, mensagem de erro).
+    """
+    try:
+        for ponto in [ponto_partida] + list(pontos_entrega):
+            if ponto not in grafo:
+                return None, f"Ponto de entrega não encontrado: {ponto}"
+
+        # Matriz loja x loja vem pronta do cadastro; só a linha do comprador é nova
+        distancias = catalogo.distances(METODO_DISTANCIA)
+        nomes, matriz = distancias.with_origin(grafo.nodes["Comprador"]["pos"])
+        indice = {nome: i for i, nome in enumerate(nomes)}
+
+        rotas = solve_routes(
+            matriz,
+            indice[ponto_partida],
+            [indice[ponto] for ponto in pontos_entrega],
+            vehicles=veiculos,
+            return_to_start=retornar
+        )
+
+        rota_detalhada = []
+        distancia_total = 0
+
+        for veiculo, rota in enumerate(rotas, start=1):
+            caminho = [nomes[i] for i in rota.path]
+            if retornar:
+                caminho.append(caminho[0])
+            for de, para in zip(caminho, caminho[1:]):
+                distancia = float(matriz[indice[de], indice[para]])
+                distancia_total += distancia
+                trecho = {
+                    "De": de,
+                    "Para": para,
+                    "Distância (km)": round(distancia, 2),
+                    "Endereço Origem": grafo.nodes[de]["endereco"],
+                    "Endereço Destino": grafo.nodes[para]["endereco"]
+                }
+                if veiculos > 1:
+                    trecho = {"Veículo": veiculo, **trecho}
+                rota_detalhada.append(trecho)
+
+        return pd.DataFrame(rota_detalhada), round(distancia_total, 2)
+    except Exception as e:
+        return None, str(e)
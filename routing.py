@@ -0,0 +1,222 @@
+import itertools
+import time
+from typing import List, NamedTuple, Optional, Sequence
+
+# Até esta quantidade de paradas a rota exata (Held-Karp) é calculada em poucos ms
+HELD_KARP_MAX_STOPS = 10
+DEFAULT_TIME_BUDGET = 1.0  # segundos para as melhorias locais em instâncias grandes
+
+
+class Route(NamedTuple):
+    """Rota de um veículo: índices na matriz (começando pelo ponto de partida) e distância total."""
+    path: List[int]
+    length: float
+
+
+def route_length(matrix, path: Sequence[int], return_to_start: bool = False) -> float:
+    """Soma as distâncias consecutivas de ``path`` (e a volta ao início, se pedida)."""
+    total = sum(matrix[a][b] for a, b in zip(path, path[1:]))
+    if return_to_start and len(path) > 1:
+        total += matrix[path[-1]][path[0]]
+    return float(total)
+
+
+def held_karp(matrix, start: int, stops: Sequence[int], return_to_start: bool = False) -> List[int]:
+    """Rota ótima por programação dinâmica sobre subconjuntos: O(2^n · n²)."""
+    stops = list(stops)
+    n = len(stops)
+    if n == 0:
+        return [start]
+    # best[(mask, j)] = (custo, anterior) de sair de start, visitar mask e terminar em stops[j]
+    best = {(1 << j, j): (matrix[start][stops[j]], -1) for j in range(n)}
+    for size in range(2, n + 1):
+        for subset in itertools.combinations(range(n), size):
+            mask = 0
+            for j in subset:
+                mask |= 1 << j
+            for j in subset:
+                prev_mask = mask & ~(1 << j)
+                to_j = stops[j]
+                best[(mask, j)] = min(
+                    (best[(prev_mask, k)][0] + matrix[stops[k]][to_j], k)
+                    for k in subset if k != j
+                )
+
+    full = (1 << n) - 1
+    closing = (lambda j: matrix[stops[j]][start]) if return_to_start else (lambda j: 0.0)
+    last = min(range(n), key=lambda j: best[(full, j)][0] + closing(j))
+
+    order = []
+    mask = full
+    while last != -1:
+        order.append(stops[last])
+        mask, last = mask & ~(1 << last), best[(mask, last)][1]
+    return [start] + order[::-1]
+
+
+def nearest_neighbor(matrix, start: int, stops: Sequence[int]) -> List[int]:
+    """Rota gulosa: sempre o ponto restante mais próximo, lido direto da matriz."""
+    path = [start]
+    remaining = set(stops)
+    while remaining:
+        row = matrix[path[-1]]
+        nxt = min(remaining, key=lambda s: row[s])
+        path.append(nxt)
+        remaining.remove(nxt)
+    return path
+
+
+def two_opt(matrix, path: List[int], return_to_start: bool = False, deadline: Optional[float] = None) -> List[int]:
+    """Inverte trechos da rota enquanto isso a encurtar. A posição 0 (partida) fica fixa."""
+    path = list(path)
+    n = len(path)
+    improved = True
+    while improved:
+        improved = False
+        for i in range(1, n - 1):
+            a, b = path[i - 1], path[i]
+            for j in range(i + 1, n):
+                c = path[j]
+                if j + 1 < n:
+                    d = path[j + 1]
+                elif return_to_start:
+                    d = path[0]
+                else:
+                    d = None
+                # Trocar as arestas (a,b) e (c,d) por (a,c) e (b,d)
+                if d is None:
+                    delta = matrix[a][c] - matrix[a][b]
+                else:
+                    delta = matrix[a][c] + matrix[b][d] - matrix[a][b] - matrix[c][d]
+                if delta < -1e-12:
+                    path[i:j + 1] = reversed(path[i:j + 1])
+                    improved = True
+                    b = path[i]
+            if deadline is not None and time.monotonic() > deadline:
+                return path
+    return path
+
+
+def or_opt(matrix, path: List[int], return_to_start: bool = False, deadline: Optional[float] = None) -> List[int]:
+    """Move trechos de 1 a 3 paradas para outra posição da rota, enquanto isso a encurtar."""
+    path = list(path)
+
+    def edge(x, y):
+        # Aresta até o "fim" da rota: volta ao início, ou nada se a rota é aberta
+        if y is None:
+            return matrix[x][path[0]] if return_to_start else 0.0
+        return matrix[x][y]
+
+    improved = True
+    while improved:
+        improved = False
+        for size in (1, 2, 3):
+            i = 1
+            while i + size <= len(path):
+                prev = path[i - 1]
+                first, last = path[i], path[i + size - 1]
+                nxt = path[i + size] if i + size < len(path) else None
+                removed = edge(prev, first) + edge(last, nxt) - edge(prev, nxt)
+                rest = path[:i] + path[i + size:]
+                best = (1e-12, None, False)
+                for j in range(1, len(rest) + 1):
+                    if j == i:
+                        continue
+                    x = rest[j - 1]
+                    y = rest[j] if j < len(rest) else None
+                    base = edge(x, y)
+                    forward = removed - (matrix[x][first] + edge(last, y) - base)
+                    backward = removed - (matrix[x][last] + edge(first, y) - base)
+                    if forward > best[0]:
+                        best = (forward, j, False)
+                    if backward > best[0]:
+                        best = (backward, j, True)
+                if best[1] is not None:
+                    segment = path[i:i + size]
+                    if best[2]:
+                        segment.reverse()
+                    j = best[1]
+                    path = rest[:j] + segment + rest[j:]
+                    improved = True
+                i += 1
+                if deadline is not None and time.monotonic() > deadline:
+                    return path
+    return path
+
+
+def solve_route(matrix, start: int, stops: Sequence[int], return_to_start: bool = False,
+                time_budget: float = DEFAULT_TIME_BUDGET) -> Route:
+    """Melhor rota a partir de ``start`` visitando todos os ``stops``.
+
+    Exata (Held-Karp) até HELD_KARP_MAX_STOPS paradas; acima disso, vizinho
+    mais próximo seguido de 2-opt e Or-opt até esgotar ``time_budget`` segundos.
+    ``matrix`` pode ser uma matriz NumPy ou uma lista de listas.
+    """
+    stops = [s for s in dict.fromkeys(stops) if s != start]
+    if len(stops) <= HELD_KARP_MAX_STOPS:
+        path = held_karp(matrix, start, stops, return_to_start)
+    else:
+        deadline = time.monotonic() + time_budget
+        path = nearest_neighbor(matrix, start, stops)
+        while True:
+            before = route_length(matrix, path, return_to_start)
+            path = two_opt(matrix, path, return_to_start, deadline)
+            path = or_opt(matrix, path, return_to_start, deadline)
+            if time.monotonic() > deadline or route_length(matrix, path, return_to_start) >= before - 1e-12:
+                break
+    return Route(path, route_length(matrix, path, return_to_start))
+
+
+def _split_tour(matrix, start: int, tour: List[int], vehicles: int, return_to_start: bool) -> List[List[int]]:
+    """Divide uma rota única em até ``vehicles`` trechos consecutivos, minimizando o maior deles."""
+    n = len(tour)
+    # prefix[k] = comprimento de tour[0] até tour[k], para custo O(1) de cada trecho
+    prefix = [0.0] * n
+    for k in range(1, n):
+        prefix[k] = prefix[k - 1] + matrix[tour[k - 1]][tour[k]]
+
+    def cost(i, j):
+        # Veículo que sai de start e atende tour[i:j]
+        total = matrix[start][tour[i]] + prefix[j - 1] - prefix[i]
+        if return_to_start:
+            total += matrix[tour[j - 1]][start]
+        return total
+
+    INF = float("inf")
+    # best[v][j] = menor "maior rota" atendendo tour[:j] com v veículos
+    best = [[INF] * (n + 1) for _ in range(vehicles + 1)]
+    cut = [[0] * (n + 1) for _ in range(vehicles + 1)]
+    best[0][0] = 0.0
+    for v in range(1, vehicles + 1):
+        best[v][0] = 0.0
+        for j in range(1, n + 1):
+            for i in range(j):
+                value = max(best[v - 1][i], cost(i, j))
+                if value < best[v][j]:
+                    best[v][j], cut[v][j] = value, i
+    v = min(range(1, vehicles + 1), key=lambda k: (best[k][n], k))
+    segments = []
+    j = n
+    while v > 0 and j > 0:
+        i = cut[v][j]
+        segments.append(tour[i:j])
+        j, v = i, v - 1
+    return segments[::-1]
+
+
+def solve_routes(matrix, start: int, stops: Sequence[int], vehicles: int = 1, return_to_start: bool = False,
+                 time_budget: float = DEFAULT_TIME_BUDGET) -> List[Route]:
+    """Rotas para ``vehicles`` veículos saindo do mesmo ponto.
+
+    Primeiro resolve uma rota única, depois a divide em trechos consecutivos
+    equilibrando a maior rota, e por fim otimiza cada trecho separadamente.
+    Veículos sem paradas não aparecem no resultado.
+    """
+    if vehicles < 1:
+        raise ValueError("vehicles deve ser maior que zero")
+    tour = solve_route(matrix, start, stops, return_to_start, time_budget)
+    if vehicles == 1 or len(tour.path) <= 2:
+        return [tour]
+    segments = _split_tour(matrix, start, tour.path[1:], vehicles, return_to_start)
+    budget = time_budget / len(segments)
+    return [solve_route(matrix, start, segment, return_to_start, budget) for segment in segments]
@@ -0,0 +1,144 @@
+import functools
+import heapq
+import re
+from numbers import Number
+from typing import Callable, Dict, Iterable, Iterator, List, Sequence, Tuple, Union
+
+# Uma chave pode ser o nome de um campo, ou (campo, crescente) para direções mistas
+SortKey = Union[str, Tuple[str, bool]]
+
+_DIGITS = re.compile(r"(\d+)")
+
+
+def natural_key(value) -> tuple:
+    """Chave de ordenação natural para códigos de peças: "F10" vem depois de "F9".
+
+    O texto é dividido em trechos de letras e de dígitos; as posições pares são
+    sempre texto e as ímpares sempre inteiros, então as tuplas são comparáveis.
+    """
+    parts = _DIGITS.split(str(value).casefold())
+    for i in range(1, len(parts), 2):
+        parts[i] = int(parts[i])
+    return tuple(parts)
+
+
+def make_key_func(field: str, ascending: bool = True, natural: bool = False) -> Callable[[Dict], tuple]:
+    """Cria a função de chave de um campo.
+
+    Valores ausentes (campo inexistente, None ou "") ficam sempre no fim,
+    independentemente da direção. Tipos mistos são comparáveis: números vêm
+    antes de textos e outros tipos são comparados como texto.
+    """
+    # Com reverse=True a ordem das marcas se inverte, então a marca troca junto
+    present = 0 if ascending else 1
+    missing = (1 - present,)
+
+    def key_func(item):
+        value = item.get(field) if type(item) is dict else getattr(item, field, None)
+        if value is None or value == "":
+            return missing
+        if natural:
+            return (present, 1, natural_key(value))
+        kind = type(value)
+        if kind is str:
+            return (present, 1, value)
+        if kind is int or kind is float or isinstance(value, Number):
+            return (present, 0, value)
+        return (present, 2, str(value))
+
+    return key_func
+
+
+def _normalize_keys(key: Union[SortKey, Sequence[SortKey]], ascending: bool) -> List[Tuple[str, bool]]:
+    if isinstance(key, str):
+        return [(key, ascending)]
+    if isinstance(key, tuple) and len(key) == 2 and isinstance(key[1], bool):
+        return [(key[0], key[1])]
+    return [(k, ascending) if isinstance(k, str) else (k[0], k[1]) for k in key]
+
+
+def sort_records(data: Iterable[Dict], key: Union[SortKey, Sequence[SortKey]],
+                 ascending: bool = True, natural: bool = False) -> List[Dict]:
+    """Ordena registros por um ou mais campos, de forma estável.
+
+    ``key`` pode ser um campo (``"marca"``), uma lista de campos
+    (``["marca", "codigoReferencia"]``) ou pares ``(campo, crescente)``
+    para direções diferentes por campo. Cada chave é calculada uma única vez
+    por registro e a lista devolvida referencia os mesmos dicionários, sem
+    cópias intermediárias.
+    """
+    keys = _normalize_keys(key, ascending)
+    result = list(data)
+    # Ordenações estáveis sucessivas, da chave menos para a mais significativa;
+    # o Timsort aproveita as sequências já ordenadas pela passada anterior
+    for field, asc in reversed(keys):
+        result.sort(key=make_key_func(field, asc, natural), reverse=not asc)
+    return result
+
+
+class _Ranked:
+    """Item no heap de top-K, comparado pela posição que teria na ordenação final.
+
+    O heap do ``heapq`` é de mínimo, então ``__lt__`` é invertido: o topo do
+    heap é o pior item mantido, o primeiro a ser descartado.
+    """
+    __slots__ = ("keys", "seq", "item", "directions")
+
+    def __init__(self, keys, seq, item, directions):
+        self.keys = keys
+        self.seq = seq
+        self.item = item
+        self.directions = directions
+
+    def precedes(self, other) -> bool:
+        """True se este item vem antes de ``other`` na ordenação final."""
+        for a, b, asc in zip(self.keys, other.keys, self.directions):
+            if a == b:
+                continue
+            # Ausentes (marca 1) ficam sempre no fim, em qualquer direção
+            if a[0] != b[0]:
+                return a[0] < b[0]
+            return a < b if asc else a > b
+        # Empate: vence quem chegou primeiro, como numa ordenação estável
+        return self.seq < other.seq
+
+    def __lt__(self, other):
+        return other.precedes(self)
+
+
+def _iter_records(data: Iterable) -> Iterator[Dict]:
+    """Aceita produtos soltos ou páginas (listas, ou dicts com "count" e "data")."""
+    for element in data:
+        if isinstance(element, list):
+            yield from element
+        elif isinstance(element, dict) and "count" in element and isinstance(element.get("data"), list):
+            yield from element["data"]
+        else:
+            yield element
+
+
+def top_k_records(data: Iterable, key: Union[SortKey, Sequence[SortKey]], k: int,
+                  largest: bool = True, natural: bool = False) -> List[Dict]:
+    """Seleciona os K primeiros registros sem ordenar a entrada inteira.
+
+    Equivale a ``sort_records(data, key, ascending=not largest)[:k]``, mas
+    consome ``data`` como um fluxo (produtos ou páginas) mantendo apenas um
+    heap de K itens: memória O(k) e tempo O(n log k). Empates são resolvidos
+    pela ordem de chegada e registros sem a chave só entram se faltarem itens.
+    """
+    if k <= 0:
+        return []
+    keys = _normalize_keys(key, not largest)
+    funcs = [make_key_func(field, True, natural) for field, _ in keys]
+    directions = tuple(asc for _, asc in keys)
+
+    heap = []
+    for seq, item in enumerate(_iter_records(data)):
+        ranked = _Ranked(tuple(f(item) for f in funcs), seq, item, directions)
+        if len(heap) < k:
+            heapq.heappush(heap, ranked)
+        elif ranked.precedes(heap[0]):
+            heapq.heapreplace(heap, ranked)
+
+    heap.sort(key=functools.cmp_to_key(lambda a, b: -1 if a.precedes(b) else 1))
+    return [ranked.item for ranked in heap]
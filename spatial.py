@@ -0,0 +1,172 @@
+import math
+import pickle
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from distances import EARTH_RADIUS_KM
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError:  # scipy é opcional; sem ele a busca é uma varredura vetorizada
+    cKDTree = None
+
+
+def to_unit_vectors(lat, lon) -> np.ndarray:
+    """Converte latitude/longitude em graus para vetores unitários 3D (n, 3)."""
+    lat = np.radians(np.asarray(lat, dtype=np.float64))
+    lon = np.radians(np.asarray(lon, dtype=np.float64))
+    cos_lat = np.cos(lat)
+    return np.stack([cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)], axis=-1)
+
+
+def chord_to_km(chord) -> np.ndarray:
+    """Distância em linha reta entre vetores unitários -> distância sobre a esfera, em km."""
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.clip(np.asarray(chord) / 2, 0.0, 1.0))
+
+
+def km_to_chord(km: float) -> float:
+    return 2 * math.sin(min(km / (2 * EARTH_RADIUS_KM), math.pi / 2))
+
+
+class StoreIndex:
+    """Índice espacial de lojas para consultas de vizinhos mais próximos e por raio.
+
+    As lojas são guardadas como vetores unitários 3D: a distância em linha reta
+    entre dois vetores cresce junto com a distância sobre a esfera, então um
+    KD-tree euclidiano (scipy) responde consultas geográficas sem distorção
+    perto dos polos ou do antimeridiano. Sem scipy, a consulta é uma única
+    operação vetorizada do NumPy sobre todas as lojas.
+
+    Inclusões e remoções são incrementais: o índice é reconstruído
+    preguiçosamente na próxima consulta. O objeto pode ser serializado com
+    ``save``/``load`` (ou pickle) para não ser refeito a cada execução.
+    """
+
+    def __init__(self, lojas: Optional[Dict[str, Dict]] = None):
+        self._names: List[str] = []
+        self._info: List[Dict] = []
+        self._coords: List[Tuple[float, float]] = []
+        self._rows: Dict[str, int] = {}
+        self._removed = 0
+        self._vectors: Optional[np.ndarray] = None
+        self._tree = None
+        self._lock = threading.RLock()
+        for name, info in (lojas or {}).items():
+            self.add(name, info["lat"], info["lon"], **{k: v for k, v in info.items() if k not in ("lat", "lon")})
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._rows
+
+    def add(self, name: str, lat: float, lon: float, **info):
+        """Inclui (ou atualiza) uma loja."""
+        with self._lock:
+            if name in self._rows:
+                self.remove(name)
+            self._rows[name] = len(self._names)
+            self._names.append(name)
+            self._coords.append((float(lat), float(lon)))
+            self._info.append(dict(info, lat=float(lat), lon=float(lon)))
+            self._vectors = self._tree = None
+
+    def remove(self, name: str):
+        """Remove uma loja; KeyError se ela não existir."""
+        with self._lock:
+            row = self._rows.pop(name)
+            self._names[row] = None
+            self._removed += 1
+            if self._removed > len(self._rows):
+                self._compact()
+            self._vectors = self._tree = None
+
+    def get(self, name: str) -> Dict:
+        return self._info[self._rows[name]]
+
+    def as_dict(self) -> Dict[str, Dict]:
+        """Lojas no formato {nome: {"endereco", "lat", "lon", ...}} usado pelo app."""
+        return {name: self._info[row] for name, row in self._rows.items()}
+
+    def nearest(self, lat: float, lon: float, k: int = 5) -> List[Tuple[str, float]]:
+        """As ``k`` lojas mais próximas de (lat, lon), como (nome, km), da mais próxima em diante."""
+        with self._lock:
+            vectors, names = self._build()
+            n = len(names)
+            if n == 0 or k <= 0:
+                return []
+            k = min(k, n)
+            point = to_unit_vectors(lat, lon)
+            if self._tree is not None:
+                chords, idx = self._tree.query(point, k=k)
+                chords, idx = np.atleast_1d(chords), np.atleast_1d(idx)
+            else:
+                chords = np.linalg.norm(vectors - point, axis=1)
+                idx = np.argpartition(chords, k - 1)[:k] if k < n else np.arange(n)
+                idx = idx[np.argsort(chords[idx], kind="stable")]
+                chords = chords[idx]
+            return [(names[i], float(d)) for i, d in zip(idx, chord_to_km(chords))]
+
+    def within(self, lat: float, lon: float, radius_km: float) -> List[Tuple[str, float]]:
+        """Lojas a até ``radius_km`` de (lat, lon), como (nome, km), da mais próxima em diante."""
+        with self._lock:
+            vectors, names = self._build()
+            if len(names) == 0:
+                return []
+            point = to_unit_vectors(lat, lon)
+            limit = km_to_chord(radius_km)
+            if self._tree is not None:
+                idx = np.array(self._tree.query_ball_point(point, limit), dtype=np.intp)
+                chords = np.linalg.norm(vectors[idx] - point, axis=1) if len(idx) else np.zeros(0)
+            else:
+                all_chords = np.linalg.norm(vectors - point, axis=1)
+                idx = np.flatnonzero(all_chords <= limit)
+                chords = all_chords[idx]
+            order = np.argsort(chords, kind="stable")
+            return [(names[idx[i]], float(d)) for i, d in zip(order, chord_to_km(chords[order]))]
+
+    def save(self, path: str):
+        with open(path, "wb") as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, path: str) -> "StoreIndex":
+        with open(path, "rb") as f:
+            index = pickle.load(f)
+        if not isinstance(index, cls):
+            raise ValueError(f"Arquivo não contém um StoreIndex: {path}")
+        return index
+
+    def __getstate__(self):
+        # A árvore e o lock não são serializáveis; os vetores são refeitos na primeira consulta
+        with self._lock:
+            self._compact()
+            return {"names": self._names, "info": self._info, "coords": self._coords}
+
+    def __setstate__(self, state):
+        self.__init__()
+        self._names = state["names"]
+        self._info = state["info"]
+        self._coords = state["coords"]
+        self._rows = {name: row for row, name in enumerate(self._names)}
+
+    def _compact(self):
+        """Descarta as linhas de lojas removidas."""
+        keep = [row for row, name in enumerate(self._names) if name is not None]
+        self._names = [self._names[row] for row in keep]
+        self._info = [self._info[row] for row in keep]
+        self._coords = [self._coords[row] for row in keep]
+        self._rows = {name: row for row, name in enumerate(self._names)}
+        self._removed = 0
+
+    def _build(self):
+        """(Re)constrói os vetores e a árvore das lojas ativas, se algo mudou."""
+        if self._vectors is None:
+            if self._removed:
+                self._compact()
+            coords = np.array(self._coords, dtype=np.float64).reshape(-1, 2)
+            self._vectors = to_unit_vectors(coords[:, 0], coords[:, 1])
+            self._tree = cKDTree(self._vectors) if cKDTree is not None and len(coords) else None
+        return self._vectors, self._names
@@ -0,0 +1,196 @@
+"""Cadastro de lojas lido da planilha uma vez e mantido em um cache colunar (.npz).
+
+A planilha ``lojas_ancora.xlsx`` só é lida quando muda (tamanho/mtime e, em
+caso de dúvida, hash SHA-256). O cache guarda ids, nomes, endereços e
+coordenadas em arrays NumPy e, para redes de até STORES_MATRIX_MAX lojas, a
+matriz de distâncias loja x loja já calculada, usada pelo roteamento e pela
+busca de lojas próximas.
+"""
+import hashlib
+import os
+import tempfile
+import threading
+from typing import Dict, Optional
+
+import numpy as np
+
+from autocomplete import normalize
+from config import STORES_SOURCE_PATH, STORES_CACHE_PATH, STORES_DISTANCE_METHOD, STORES_MATRIX_MAX
+from distances import StoreDistances, distance_matrix
+from spatial import StoreIndex
+
+FORMAT_VERSION = 1
+
+COLUMN_ALIASES = {
+    "id": ("id", "codigo", "codigo loja", "cod loja", "cnpj"),
+    "nome": ("nome", "loja", "nome da loja", "nome_loja", "filial"),
+    "endereco": ("endereco", "endereco completo", "logradouro"),
+    "lat": ("lat", "latitude"),
+    "lon": ("lon", "lng", "long", "longitude"),
+}
+
+
+def match_columns(columns) -> Dict[str, str]:
+    """Mapeia as colunas da planilha para id/nome/endereco/lat/lon, sem diferenciar maiúsculas ou acentos."""
+    normalized = {normalize(str(c)): c for c in columns}
+    found = {}
+    for field, aliases in COLUMN_ALIASES.items():
+        for alias in aliases:
+            if alias in normalized:
+                found[field] = normalized[alias]
+                break
+    missing = {"nome", "lat", "lon"} - set(found)
+    if missing:
+        raise ValueError(f"Colunas obrigatórias ausentes na planilha de lojas: {', '.join(sorted(missing))}")
+    return found
+
+
+class StoreCatalog:
+    """Lojas em formato colunar: um array por campo, na mesma ordem."""
+
+    def __init__(self, ids, names, enderecos, lat, lon, matrix: Optional[np.ndarray] = None,
+                 method: str = STORES_DISTANCE_METHOD):
+        self.ids = np.asarray(ids, dtype=str)
+        self.names = np.asarray(names, dtype=str)
+        self.enderecos = np.asarray(enderecos, dtype=str)
+        self.lat = np.asarray(lat, dtype=np.float64)
+        self.lon = np.asarray(lon, dtype=np.float64)
+        self.matrix = matrix
+        self.method = method
+        self._index: Optional[StoreIndex] = None
+        self._distances: Dict[str, StoreDistances] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @classmethod
+    def from_dataframe(cls, df, method: str = STORES_DISTANCE_METHOD) -> "StoreCatalog":
+        """Cria o catálogo a partir da planilha; linhas sem nome ou coordenadas são descartadas."""
+        if df.empty:
+            return cls([], [], [], [], [], method=method)
+        columns = match_columns(df.columns)
+        df = df.dropna(subset=[columns["nome"], columns["lat"], columns["lon"]])
+        df = df.drop_duplicates(subset=[columns["nome"]], keep="last")
+        n = len(df)
+        ids = df[columns["id"]].astype(str) if "id" in columns else [str(i) for i in range(n)]
+        enderecos = df[columns["endereco"]].fillna("").astype(str) if "endereco" in columns else [""] * n
+        return cls(ids, df[columns["nome"]].astype(str), enderecos,
+                   df[columns["lat"]].astype(float), df[columns["lon"]].astype(float), method=method)
+
+    @classmethod
+    def from_dict(cls, lojas: Dict[str, Dict], method: str = STORES_DISTANCE_METHOD) -> "StoreCatalog":
+        """Cria o catálogo a partir do formato {nome: {"endereco", "lat", "lon"}}."""
+        names = list(lojas)
+        return cls([lojas[n].get("id", str(i)) for i, n in enumerate(names)], names,
+                   [lojas[n].get("endereco", "") for n in names],
+                   [lojas[n]["lat"] for n in names], [lojas[n]["lon"] for n in names], method=method)
+
+    def as_dict(self) -> Dict[str, Dict]:
+        """Lojas no formato {nome: {"id", "endereco", "lat", "lon"}} usado pelo app."""
+        return {
+            name: {"id": i, "endereco": endereco, "lat": lat, "lon": lon}
+            for i, name, endereco, lat, lon in zip(self.ids.tolist(), self.names.tolist(), self.enderecos.tolist(),
+                                                   self.lat.tolist(), self.lon.tolist())
+        }
+
+    def compute_matrix(self, max_stores: int = STORES_MATRIX_MAX):
+        """Calcula a matriz loja x loja (float32), se a rede couber no limite."""
+        if self.matrix is None and 0 < len(self) <= max_stores:
+            coords = np.column_stack([self.lat, self.lon])
+            self.matrix = distance_matrix(coords, method=self.method).astype(np.float32)
+        return self.matrix
+
+    def index(self) -> StoreIndex:
+        """Índice espacial das lojas, criado uma vez."""
+        with self._lock:
+            if self._index is None:
+                self._index = StoreIndex(self.as_dict())
+            return self._index
+
+    def distances(self, method: Optional[str] = None) -> StoreDistances:
+        """Distâncias loja x loja, reaproveitando a matriz do cache quando o método é o mesmo."""
+        method = method or self.method
+        with self._lock:
+            if method not in self._distances:
+                matrix = self.matrix.astype(np.float64) if self.matrix is not None and method == self.method else None
+                self._distances[method] = StoreDistances(self.as_dict(), method, matrix)
+            return self._distances[method]
+
+    def save(self, path: str, source_meta: Dict):
+        """Grava o cache em .npz (sem pickle), de forma atômica."""
+        arrays = {
+            "format_version": np.array(FORMAT_VERSION),
+            "method": np.array(self.method),
+            "ids": self.ids, "names": self.names, "enderecos": self.enderecos,
+            "lat": self.lat, "lon": self.lon,
+            "source_size": np.array(source_meta["size"]),
+            "source_mtime": np.array(source_meta["mtime"]),
+            "source_sha256": np.array(source_meta["sha256"]),
+        }
+        if self.matrix is not None:
+            arrays["matrix"] = self.matrix
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".npz")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, **arrays)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, path: str):
+        """Lê o cache; retorna (catálogo, metadados da planilha de origem)."""
+        with np.load(path, allow_pickle=False) as data:
+            if int(data["format_version"]) != FORMAT_VERSION:
+                raise ValueError(f"Versão de cache de lojas incompatível: {path}")
+            catalog = cls(data["ids"], data["names"], data["enderecos"], data["lat"], data["lon"],
+                          data["matrix"] if "matrix" in data else None, str(data["method"]))
+            meta = {"size": int(data["source_size"]), "mtime": float(data["source_mtime"]),
+                    "sha256": str(data["source_sha256"])}
+        return catalog, meta
+
+
+def _file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_stores(source: str = STORES_SOURCE_PATH, cache_path: Optional[str] = STORES_CACHE_PATH,
+                method: str = STORES_DISTANCE_METHOD) -> StoreCatalog:
+    """Carrega o cadastro de lojas, relendo a planilha apenas se ela mudou.
+
+    Se tamanho e mtime batem com o cache, a planilha nem é aberta. Se
+    mudaram mas o conteúdo (SHA-256) é o mesmo, só os metadados são
+    atualizados. Caso contrário a planilha é lida, a matriz de distâncias é
+    recalculada e o cache é regravado.
+    """
+    stat = os.stat(source)
+    meta = {"size": stat.st_size, "mtime": stat.st_mtime, "sha256": None}
+    cached = None
+    if cache_path and os.path.exists(cache_path):
+        try:
+            cached, cached_meta = StoreCatalog.load(cache_path)
+        except Exception:
+            cached = None  # cache corrompido ou de outra versão: reconstrói
+        if cached is not None and cached.method == method:
+            if cached_meta["size"] == meta["size"] and cached_meta["mtime"] == meta["mtime"]:
+                return cached
+            meta["sha256"] = _file_sha256(source)
+            if cached_meta["sha256"] == meta["sha256"]:
+                cached.save(cache_path, meta)
+                return cached
+
+    import pandas as pd  # só é necessário quando a planilha precisa ser lida
+
+    catalog = StoreCatalog.from_dataframe(pd.read_excel(source), method)
+    catalog.compute_matrix()
+    if cache_path:
+        meta["sha256"] = meta["sha256"] or _file_sha256(source)
+        catalog.save(cache_path, meta)
+    return catalog
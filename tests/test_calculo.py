@@ -0,0 +1,35 @@
+import pandas as pd
+import pytest
+
+from calculo import processar_arquivo
+
+TURMA = pd.DataFrame({
+    "nome": ["1", "2", "Ana"],
+    "obs": [None, None, "late"],
+    "md1": [75, 60, 82.5],
+    "challenge": [60, 70, 90],
+})
+
+
+def _ler(path):
+    return pd.read_parquet(path) if path.endswith(".parquet") else pd.read_csv(path, dtype={"nome": str})
+
+
+@pytest.mark.parametrize("saida", ["o.csv", "o.csv.gz", "o.parquet"])
+@pytest.mark.parametrize("entrada", ["t.csv", "t.parquet"])
+def test_coluna_que_muda_de_tipo_entre_blocos(tmp_path, entrada, saida):
+    if "parquet" in entrada + saida:
+        pytest.importorskip("pyarrow")
+    entrada, saida = str(tmp_path / entrada), str(tmp_path / saida)
+    if entrada.endswith(".parquet"):
+        TURMA.to_parquet(entrada, index=False)
+    else:
+        TURMA.to_csv(entrada, index=False)
+
+    assert processar_arquivo(entrada, saida, chunk_size=1) == 3
+
+    resultado = _ler(saida)
+    assert list(resultado["nome"]) == ["1", "2", "Ana"]
+    assert resultado["obs"].isna().tolist() == [True, True, False]
+    assert resultado["obs"].iloc[2] == "late"
+    assert resultado["md2_necessaria"].tolist() == [65.0, 80.0, 57.5]
@@ -0,0 +1,29 @@
+import pytest
+
+from catalog_search import SearchIndex
+
+PRODUTOS = [
+    {"id": 1, "codigoReferencia": "GP32960", "nomeProduto": "Pastilha de freio", "marca": "Cobreq"},
+    {"id": 2, "codigoReferencia": "0 986-494", "nomeProduto": "Disco de freio", "marca": "Bosch"},
+    {"id": 3, "codigoReferencia": "GP1000", "nomeProduto": "Pastilha de freio", "marca": "Cobreq"},
+]
+
+
+@pytest.fixture(scope="module")
+def index():
+    return SearchIndex.from_products(PRODUTOS)
+
+
+@pytest.mark.parametrize("query", ["GP32960", "GP-32960", "gp 32960", "GP.3296"])
+def test_codigo_com_separador_encontra_codigo_sem(index, query):
+    assert [hit.product.codigoReferencia for hit in index.search(query)] == ["GP32960"]
+
+
+@pytest.mark.parametrize("query", ["0986494", "0 986-494", "986"])
+def test_codigo_sem_separador_encontra_codigo_com(index, query):
+    assert [hit.product.codigoReferencia for hit in index.search(query)] == ["0 986-494"]
+
+
+def test_termos_continuam_exigindo_todos(index):
+    assert {hit.product.id for hit in index.search("pastilha cobreq")} == {1, 3}
+    assert index.search("pastilha bosch") == []